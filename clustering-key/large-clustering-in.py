@@ -1,5 +1,6 @@
 #!/usr/bin/python3
 
+import os
 import sys
 import argparse
 import time
@@ -10,6 +11,9 @@ from cassandra.cluster import Cluster
 from cassandra.auth import PlainTextAuthProvider
 from cassandra.policies import DCAwareRoundRobinPolicy
 
+# Shared key distributions (key_samplers.py, needs numpy) live with the sample app
+SAMPLE_APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'sample_app')
+
 class ClusteringKeyINTester:
     def __init__(self, hosts=['127.0.0.1'], port=9042, keyspace='test_clustering_in', 
                  username=None, password=None):
@@ -191,11 +195,33 @@ class ClusteringKeyINTester:
                 'error': str(e)
             }
     
-    async def run_concurrent_in_queries(self, available_keys, in_query_size=50, concurrency=50, duration_seconds=10):
+    def pick_keys(self, available_keys, in_query_size, sampler=None):
+        """Distinct clustering keys for one IN query, drawn uniformly or from a key sampler"""
+        size = min(in_query_size, len(available_keys))
+        if sampler is None:
+            return random.sample(available_keys, size)
+        picked = {}
+        # Skewed samplers repeat popular keys; under extreme skew the list may come out shorter
+        for _ in range(8):
+            for index in sampler.sample(size * 2).tolist():
+                picked.setdefault(index, None)
+                if len(picked) == size:
+                    return [available_keys[i] for i in picked]
+        return [available_keys[i] for i in picked]
+
+    async def run_concurrent_in_queries(self, available_keys, in_query_size=50, concurrency=50, duration_seconds=10,
+                                        key_dist=None):
         """Run concurrent IN queries for a specified duration"""
         print(f"\nRunning concurrent IN queries for {duration_seconds} seconds:")
         print(f"  IN query size: {in_query_size} clustering keys")
         print(f"  Concurrency level: {concurrency}")
+        sampler = None
+        if key_dist:
+            sys.path.insert(0, SAMPLE_APP_DIR)
+            from key_samplers import parse_sampler
+            # Samples are indexes into available_keys
+            sampler = parse_sampler(key_dist, 0, len(available_keys) - 1)
+            print(f"  Key distribution: {sampler.describe()}")
         
         start_time = time.time()
         end_time = start_time + duration_seconds
@@ -211,8 +237,8 @@ class ClusteringKeyINTester:
         async def run_single_query():
             nonlocal query_counter
             async with semaphore:
-                # Randomly select clustering keys for the IN query
-                query_keys = random.sample(available_keys, min(in_query_size, len(available_keys)))
+                # Select clustering keys for the IN query
+                query_keys = self.pick_keys(available_keys, in_query_size, sampler)
                 current_query_id = query_counter
                 query_counter += 1
                 return await self.perform_in_query(query_keys, current_query_id)
@@ -333,6 +359,10 @@ async def main():
                        help='Concurrency of read requests (default: 50)')
     parser.add_argument('--duration', type=int, default=10,
                        help='Duration to run queries in seconds (default: 10)')
+    parser.add_argument('--key-dist', default=None,
+                       help='Clustering key popularity for the IN lists: uniform, zipfian[:theta], '
+                            'hotspot[:hot_fraction[:hot_ops]], sequential or latest[:theta] '
+                            '(default: distinct keys picked uniformly)')
     parser.add_argument('--cleanup', action='store_true',
                        help='Drop the table after test')
     parser.add_argument('--query-only', action='store_true',
@@ -380,7 +410,8 @@ async def main():
             available_keys=available_keys,
             in_query_size=args.in_query_size,
             concurrency=args.concurrency,
-            duration_seconds=args.duration
+            duration_seconds=args.duration,
+            key_dist=args.key_dist
         )
         
         if args.cleanup:
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+
+"""
+Generate synthetic Bigtable-shaped Parquet files for ingest benchmarks.
+
+Files use the same nested schema as the production exports read by
+stream_parquet_to_scylladb.py:
+
+    rowkey: string
+    <family>: struct<column: list<struct<name: string,
+                                         cell: list<struct<timestamp: timestamp[us], value: binary>>>>>
+
+All arrays are built vectorized from NumPy offsets and buffers, one row group
+at a time. Files are written in parallel and every file is derived from the
+seed alone, so the same command always produces the same bytes regardless of
+the number of worker processes.
+
+Usage:
+    ./generate_bigtable_parquet.py -o synth --files 8 --rows 200000
+    ./generate_bigtable_parquet.py -o synth --from-report streaming_analysis_report.txt --value-size lognormal:24,1.6
+"""
+
+import os
+import re
+import time
+import logging
+import argparse
+from multiprocessing import Pool, cpu_count
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DEFAULT_FAMILIES = ['mp', 'dc', 'ib', 'pb', 'is', 'ta', 'cb', 'ha', 'of', 'ie', 'if', 'up', 'ci', 'd', 'ra', 't', 'e', 'ch']
+# Cell timestamps are spread over the 90 days before this instant
+REFERENCE_TIME_US = 1756684800 * 1000000  # 2025-09-01T00:00:00Z
+TIME_SPAN_US = 90 * 24 * 3600 * 1000000
+VALUE_POOL_BYTES = 4 * 1024 * 1024
+
+CELL_TYPE = pa.struct([pa.field('timestamp', pa.timestamp('us')), pa.field('value', pa.binary())])
+CELL_LIST_TYPE = pa.list_(pa.field('element', CELL_TYPE, nullable=False))
+COLUMN_TYPE = pa.struct([pa.field('name', pa.string()), pa.field('cell', CELL_LIST_TYPE, nullable=False)])
+COLUMN_LIST_TYPE = pa.list_(pa.field('element', COLUMN_TYPE, nullable=False))
+FAMILY_TYPE = pa.struct([pa.field('column', COLUMN_LIST_TYPE, nullable=False)])
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def bigtable_schema(families):
+    return pa.schema([pa.field('rowkey', pa.string())] + [pa.field(f, FAMILY_TYPE) for f in families])
+
+
+def parse_value_size(spec):
+    """'fixed:N', 'uniform:A,B' or 'lognormal:MEDIAN,SIGMA' -> (kind, params)"""
+    kind, _, args = spec.partition(':')
+    params = [float(a) for a in args.split(',') if a]
+    expected = {'fixed': 1, 'uniform': 2, 'lognormal': 2}
+    if kind not in expected or len(params) != expected[kind]:
+        raise argparse.ArgumentTypeError(f"Invalid value size spec: {spec}")
+    return kind, params
+
+
+def parse_analysis_report(path):
+    """Read family weights, cells per record and the families-per-row histogram from an analysis report"""
+    section = None
+    family_cells = {}
+    families_per_row = {}
+    records = cells = 0
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith('Total Records Processed:'):
+                records = int(line.split(':')[1])
+            elif line.startswith('Total Cells Processed:'):
+                cells = int(line.split(':')[1])
+            elif line.startswith('COLUMN FAMILY DISTRIBUTION'):
+                section = 'families'
+            elif line.startswith('FAMILIES PER ROW DISTRIBUTION'):
+                section = 'per_row'
+            elif line.endswith(':') and line.isupper():
+                section = None
+            elif section == 'families':
+                m = re.match(r'^(\S+): (\d+) cells$', line)
+                if m:
+                    family_cells[m.group(1)] = int(m.group(2))
+            elif section == 'per_row':
+                m = re.match(r'^(\d+) families: (\d+) rows$', line)
+                if m:
+                    families_per_row[int(m.group(1))] = int(m.group(2))
+    if not family_cells or not records:
+        raise ValueError(f"{path} does not look like a streaming analysis report")
+    return {
+        'family_cells': family_cells,
+        'families_per_row': families_per_row,
+        'cells_per_record': cells / records,
+    }
+
+
+class GeneratorProfile:
+    """
+    Shape of the synthetic data. Each row draws how many families it has,
+    picks them weighted by their share of cells, then draws cells per family
+    so that each family's expected cell share matches its weight.
+    """
+
+    def __init__(self, families, weights, families_per_row, cells_per_row, qualifiers,
+                 versions, value_size, value_entropy):
+        self.families = list(families)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.weights /= self.weights.sum()
+        ks = np.array(sorted(families_per_row), dtype=np.int64)
+        freq = np.array([families_per_row[k] for k in ks], dtype=np.float64)
+        self.families_per_row_k = np.clip(ks, 1, len(self.families))
+        self.families_per_row_p = freq / freq.sum()
+        self.cells_per_row = cells_per_row
+        self.qualifiers = qualifiers
+        self.versions = max(1.0, versions)
+        self.value_size = value_size
+        self.value_entropy = value_entropy
+        self.presence = self._estimate_presence()
+        # Mean cells per (row, family) when the family is present
+        self.cells_when_present = np.maximum(1.0, self.cells_per_row * self.weights / np.maximum(self.presence, 1e-9))
+
+    def choose_families(self, rng, n):
+        """Boolean (n, F) matrix of the families present in each row (weighted sampling without replacement)"""
+        k = rng.choice(self.families_per_row_k, size=n, p=self.families_per_row_p)
+        # Gumbel top-k: adding Gumbel noise to log-weights and taking the k largest
+        # samples k families without replacement, proportionally to their weights
+        keys = np.log(np.maximum(self.weights, 1e-12)) + rng.gumbel(size=(n, len(self.families)))
+        ranks = np.argsort(np.argsort(-keys, axis=1), axis=1)
+        return ranks < k[:, None]
+
+    def _estimate_presence(self):
+        rng = np.random.default_rng(0)
+        return self.choose_families(rng, 20000).mean(axis=0)
+
+
+def _value_pool(rng, entropy):
+    """Byte pool that values are sliced from; lower entropy means more compressible values"""
+    pool = rng.integers(0, 256, size=VALUE_POOL_BYTES, dtype=np.uint8)
+    low_entropy = rng.random(VALUE_POOL_BYTES) >= entropy
+    pool[low_entropy] = rng.integers(0, 4, size=int(low_entropy.sum()), dtype=np.uint8)
+    return pool
+
+
+def _value_sizes(rng, spec, n):
+    kind, params = spec
+    if kind == 'fixed':
+        sizes = np.full(n, params[0])
+    elif kind == 'uniform':
+        sizes = rng.integers(int(params[0]), int(params[1]) + 1, size=n)
+    else:
+        sizes = rng.lognormal(np.log(params[0]), params[1], size=n)
+    return np.clip(np.rint(sizes), 0, VALUE_POOL_BYTES).astype(np.int64)
+
+
+def _row_keys(rng, n):
+    raw = rng.integers(0, 2 ** 63, size=(n, 2), dtype=np.int64).astype(np.uint64)
+    return [f"k:{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+            for h in (f"{a:016x}{b:016x}" for a, b in raw.tolist())]
+
+
+def _offsets(counts):
+    offsets = np.zeros(len(counts) + 1, dtype=np.int32)
+    np.cumsum(counts, out=offsets[1:])
+    return offsets
+
+
+def _family_array(rng, profile, family_idx, present, pool):
+    """Build one family column for a row group"""
+    n = len(present)
+    mean_cells = profile.cells_when_present[family_idx]
+    mean_qualifiers = max(1.0, mean_cells / profile.versions)
+
+    # Qualifiers per row (0 where the family is absent), capped by the qualifier cardinality
+    q_counts = np.where(present, 1 + rng.poisson(mean_qualifiers - 1, size=n), 0)
+    q_counts = np.minimum(q_counts, profile.qualifiers)
+    q_offsets = _offsets(q_counts)
+    total_q = int(q_offsets[-1])
+
+    # Distinct qualifiers within a row: random start per row plus position within the row
+    row_of_q = np.repeat(np.arange(n), q_counts)
+    position = np.arange(total_q) - q_offsets[:-1][row_of_q]
+    start = rng.integers(0, profile.qualifiers, size=n)
+    q_index = (start[row_of_q] + position) % profile.qualifiers
+    names = pa.array([f"q{i}" for i in q_index.tolist()], type=pa.string())
+
+    # Cell versions per qualifier
+    c_counts = 1 + rng.poisson(profile.versions - 1, size=total_q)
+    c_offsets = _offsets(c_counts)
+    total_cells = int(c_offsets[-1])
+
+    timestamps = REFERENCE_TIME_US - rng.integers(0, TIME_SPAN_US, size=total_cells)
+    sizes = _value_sizes(rng, profile.value_size, total_cells)
+    v_offsets = np.zeros(total_cells + 1, dtype=np.int64)
+    np.cumsum(sizes, out=v_offsets[1:])
+    starts = rng.integers(0, VALUE_POOL_BYTES - sizes.max(initial=0) + 1, size=total_cells)
+    gather = np.repeat(starts - v_offsets[:-1], sizes) + np.arange(int(v_offsets[-1]))
+    data = pool[gather]
+    values = pa.LargeBinaryArray.from_buffers(pa.large_binary(), total_cells,
+                                              [None, pa.py_buffer(v_offsets), pa.py_buffer(data)]).cast(pa.binary())
+
+    cells = pa.StructArray.from_arrays([pa.array(timestamps, type=pa.timestamp('us')), values],
+                                       fields=list(CELL_TYPE))
+    cell_lists = pa.ListArray.from_arrays(pa.array(c_offsets), cells, type=CELL_LIST_TYPE)
+    columns = pa.StructArray.from_arrays([names, cell_lists], fields=list(COLUMN_TYPE))
+    column_lists = pa.ListArray.from_arrays(pa.array(q_offsets), columns, type=COLUMN_LIST_TYPE)
+    return pa.StructArray.from_arrays([column_lists], fields=list(FAMILY_TYPE),
+                                      mask=pa.array(~present)), total_cells
+
+
+def generate_file(args):
+    """Write one Parquet file; args = (path, seed_sequence, rows, row_group_size, profile, compression)"""
+    path, seed_seq, rows, row_group_size, profile, compression = args
+    rng = np.random.default_rng(seed_seq)
+    pool = _value_pool(rng, profile.value_entropy)
+    schema = bigtable_schema(profile.families)
+    total_cells = 0
+    start = time.time()
+    with pq.ParquetWriter(path, schema, compression=compression) as writer:
+        for first in range(0, rows, row_group_size):
+            n = min(row_group_size, rows - first)
+            present = profile.choose_families(rng, n)
+            arrays = [pa.array(_row_keys(rng, n), type=pa.string())]
+            for f in range(len(profile.families)):
+                array, cells = _family_array(rng, profile, f, present[:, f], pool)
+                arrays.append(array)
+                total_cells += cells
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+    return path, rows, total_cells, os.path.getsize(path), time.time() - start
+
+
+def build_profile(opts):
+    if opts.from_report:
+        report = parse_analysis_report(opts.from_report)
+        families = list(report['family_cells'])
+        weights = [report['family_cells'][f] for f in families]
+        families_per_row = report['families_per_row'] or {max(1, len(families) // 2): 1}
+        cells_per_row = report['cells_per_record']
+    else:
+        families = DEFAULT_FAMILIES[:opts.families] if opts.families <= len(DEFAULT_FAMILIES) \
+            else [f"f{i}" for i in range(opts.families)]
+        weights = np.ones(len(families))
+        families_per_row = {min(opts.families_per_row, len(families)): 1}
+        cells_per_row = opts.cells_per_row
+    return GeneratorProfile(families, weights, families_per_row, cells_per_row, opts.qualifiers,
+                            opts.versions, opts.value_size, opts.value_entropy)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic Bigtable-shaped Parquet files')
+    parser.add_argument('-o', '--output-dir', default='synthetic', help='Directory for the generated files')
+    parser.add_argument('--files', type=int, default=4, help='Number of files to write')
+    parser.add_argument('--rows', type=int, default=100000, help='Rows per file')
+    parser.add_argument('--row-group-size', type=int, default=1000, help='Rows per Parquet row group')
+    parser.add_argument('--families', type=int, default=len(DEFAULT_FAMILIES), help='Number of column families')
+    parser.add_argument('--families-per-row', type=int, default=8, help='Families present in each row')
+    parser.add_argument('--cells-per-row', type=float, default=520.0, help='Mean cells per row across all families')
+    parser.add_argument('--qualifiers', type=int, default=5000, help='Qualifier cardinality per family')
+    parser.add_argument('--versions', type=float, default=1.0, help='Mean cell versions per qualifier')
+    parser.add_argument('--value-size', type=parse_value_size, default=parse_value_size('lognormal:16,1.5'),
+                        help='Value size distribution: fixed:N, uniform:A,B or lognormal:MEDIAN,SIGMA')
+    parser.add_argument('--value-entropy', type=float, default=0.5, help='Fraction of random bytes in values (0..1)')
+    parser.add_argument('--from-report', default=None, help='Take family weights and row shape from a streaming analysis report')
+    parser.add_argument('--compression', default='snappy', help='Parquet compression codec')
+    parser.add_argument('--seed', type=int, default=42, help='Seed; the same seed always produces the same files')
+    parser.add_argument('--workers', type=int, default=0, help='Parallel writer processes (0 = cpu_count())')
+    opts = parser.parse_args()
+
+    profile = build_profile(opts)
+    os.makedirs(opts.output_dir, exist_ok=True)
+    seeds = np.random.SeedSequence(opts.seed).spawn(opts.files)
+    jobs = [(os.path.join(opts.output_dir, f"synthetic-{i:05d}.parquet"), seeds[i], opts.rows,
+             opts.row_group_size, profile, opts.compression) for i in range(opts.files)]
+
+    logger.info(f"Generating {opts.files} files x {opts.rows} rows, families={len(profile.families)}, "
+                f"cells/row≈{profile.cells_per_row:.1f}, value size={opts.value_size}")
+    workers = max(1, min(opts.workers or cpu_count(), opts.files))
+    start = time.time()
+    total_bytes = total_cells = 0
+    with Pool(workers) as pool:
+        for path, rows, cells, size, elapsed in pool.imap_unordered(generate_file, jobs):
+            total_bytes += size
+            total_cells += cells
+            logger.info(f"Wrote {path}: {rows} rows, {cells} cells, {size / 1024 / 1024:.1f} MB in {elapsed:.1f}s")
+    elapsed = time.time() - start
+    logger.info(f"Done: {total_cells} cells, {total_bytes / 1024 / 1024:.1f} MB in {elapsed:.1f}s "
+                f"({total_bytes / 1024 / 1024 / elapsed:.1f} MB/s)")
+
+
+if __name__ == "__main__":
+    main()
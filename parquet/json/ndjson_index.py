@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+
+"""
+Byte-offset line index for NDJSON exports.
+
+The index is a small sidecar file (<input>.idx) that records the byte offset
+of every Nth line plus summary counts. Readers use it to seek straight to a
+line range instead of re-reading the export from the first byte.
+
+Usage:
+    ./ndjson_index.py build prod_revised.json [--stride 10000]
+    ./ndjson_index.py info prod_revised.json
+"""
+
+import os
+import json
+import time
+import logging
+import argparse
+from typing import Iterator, Optional, Tuple
+
+INDEX_SUFFIX = '.idx'
+INDEX_VERSION = 1
+DEFAULT_STRIDE = 10000
+READ_BLOCK_SIZE = 16 * 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+def index_path_for(json_file_path: str) -> str:
+    """Sidecar index path for an NDJSON file"""
+    return json_file_path + INDEX_SUFFIX
+
+
+class LineIndexBuilder:
+    """
+    Collects line offsets while a file is read sequentially from the start.
+
+    offsets[k] is the byte offset of line k * stride + 1 (lines are 1-based),
+    so offsets[0] is always 0.
+    """
+
+    def __init__(self, stride: int = DEFAULT_STRIDE):
+        if stride < 1:
+            raise ValueError("Index stride must be >= 1")
+        self.stride = stride
+        self.offsets = [0]
+        self.line_count = 0
+        self.byte_count = 0
+        self.record_count = None
+        self.cell_count = None
+
+    def add_line(self, line_length: int):
+        """Account for one raw line (including its newline) of line_length bytes"""
+        self.line_count += 1
+        self.byte_count += line_length
+        if self.line_count % self.stride == 0:
+            self.offsets.append(self.byte_count)
+
+    def add_block(self, block: bytes):
+        """Account for a raw block of bytes; used by the fast build pass"""
+        next_boundary = (len(self.offsets)) * self.stride
+        newlines = block.count(b'\n')
+        if self.line_count + newlines < next_boundary:
+            self.line_count += newlines
+            self.byte_count += len(block)
+            return
+
+        pos = 0
+        while True:
+            nl = block.find(b'\n', pos)
+            if nl < 0:
+                break
+            self.line_count += 1
+            pos = nl + 1
+            if self.line_count % self.stride == 0:
+                self.offsets.append(self.byte_count + pos)
+        self.byte_count += len(block)
+
+    def finish(self, trailing_partial_line: bool = False):
+        """Count a final line that has no terminating newline"""
+        if trailing_partial_line:
+            self.line_count += 1
+
+    def save(self, json_file_path: str, index_file_path: Optional[str] = None) -> str:
+        """Write the sidecar index next to json_file_path"""
+        index_file_path = index_file_path or index_path_for(json_file_path)
+        stat = os.stat(json_file_path)
+
+        # An offset equal to the file size points past the last line; drop it
+        offsets = [o for o in self.offsets if o < stat.st_size] or [0]
+
+        index = {
+            'version': INDEX_VERSION,
+            'file': os.path.basename(json_file_path),
+            'file_size': stat.st_size,
+            'file_mtime': stat.st_mtime,
+            'stride': self.stride,
+            'line_count': self.line_count,
+            'record_count': self.record_count,
+            'cell_count': self.cell_count,
+            'offsets': offsets,
+        }
+        tmp_path = index_file_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, index_file_path)
+        logger.info(f"Saved line index {index_file_path} ({self.line_count} lines, {len(offsets)} offsets)")
+        return index_file_path
+
+
+class LineIndex:
+    """A loaded sidecar index for one NDJSON file"""
+
+    def __init__(self, json_file_path: str, index: dict):
+        self.json_file_path = json_file_path
+        self.stride = index['stride']
+        self.offsets = index['offsets']
+        self.line_count = index['line_count']
+        self.record_count = index.get('record_count')
+        self.cell_count = index.get('cell_count')
+        self.file_size = index['file_size']
+
+    @classmethod
+    def load(cls, json_file_path: str, index_file_path: Optional[str] = None) -> Optional['LineIndex']:
+        """Load the sidecar index, or return None if it is missing or stale"""
+        index_file_path = index_file_path or index_path_for(json_file_path)
+        if not os.path.exists(index_file_path):
+            return None
+        try:
+            with open(index_file_path, 'r') as f:
+                index = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable index {index_file_path}: {e}")
+            return None
+
+        if index.get('version') != INDEX_VERSION:
+            logger.warning(f"Ignoring index {index_file_path}: unsupported version {index.get('version')}")
+            return None
+        stat = os.stat(json_file_path)
+        if stat.st_size != index['file_size'] or stat.st_mtime != index['file_mtime']:
+            logger.warning(f"Ignoring stale index {index_file_path}: {json_file_path} changed since it was built")
+            return None
+        return cls(json_file_path, index)
+
+    def locate(self, line_num: int) -> Tuple[int, int]:
+        """Return (byte_offset, line_num_at_offset) of the nearest indexed line <= line_num"""
+        if line_num < 1:
+            line_num = 1
+        slot = min((line_num - 1) // self.stride, len(self.offsets) - 1)
+        return self.offsets[slot], slot * self.stride + 1
+
+    def line_ranges(self, parts: int) -> Iterator[Tuple[int, Optional[int]]]:
+        """Split the file into `parts` contiguous (start_line, end_line) shards on index boundaries"""
+        slots = len(self.offsets)
+        parts = max(1, min(parts, slots))
+        for p in range(parts):
+            first_slot = p * slots // parts
+            next_slot = (p + 1) * slots // parts
+            start_line = first_slot * self.stride + 1
+            end_line = next_slot * self.stride if p < parts - 1 else None
+            yield start_line, end_line
+
+
+def iter_raw_lines(json_file_path: str, start_line: int = 1, end_line: Optional[int] = None,
+                   index: Optional[LineIndex] = None) -> Iterator[Tuple[int, int, bytes]]:
+    """
+    Yield (line_num, end_byte_offset, raw_line) for lines in [start_line, end_line].
+
+    With an index the file is opened at the nearest indexed offset; without one
+    the leading lines are skipped by scanning.
+    """
+    offset, line_num = (0, 1)
+    if index is not None and start_line > 1:
+        offset, line_num = index.locate(start_line)
+
+    with open(json_file_path, 'rb') as file:
+        file.seek(offset)
+        position = offset
+        for raw_line in file:
+            position += len(raw_line)
+            if end_line is not None and line_num > end_line:
+                break
+            if line_num >= start_line:
+                yield line_num, position, raw_line
+            line_num += 1
+
+
+def build_index(json_file_path: str, stride: int = DEFAULT_STRIDE) -> LineIndexBuilder:
+    """Fast pass: find line offsets by scanning raw blocks, without parsing JSON"""
+    builder = LineIndexBuilder(stride)
+    last_byte = b'\n'
+    with open(json_file_path, 'rb') as file:
+        while True:
+            block = file.read(READ_BLOCK_SIZE)
+            if not block:
+                break
+            builder.add_block(block)
+            last_byte = block[-1:]
+    builder.finish(trailing_partial_line=(last_byte != b'\n'))
+    return builder
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or inspect the byte-offset index of an NDJSON file')
+    parser.add_argument('command', choices=['build', 'info'], help='build the sidecar index or show an existing one')
+    parser.add_argument('file', help='Path to the NDJSON file')
+    parser.add_argument('--stride', type=int, default=DEFAULT_STRIDE, help='Record the offset of every Nth line')
+    opts = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if opts.command == 'build':
+        start_time = time.time()
+        builder = build_index(opts.file, opts.stride)
+        builder.save(opts.file)
+        elapsed = time.time() - start_time
+        rate_mb = builder.byte_count / 1024 / 1024 / elapsed if elapsed > 0 else 0
+        logger.info(f"Indexed {builder.line_count} lines ({builder.byte_count} bytes) in {elapsed:.2f} seconds ({rate_mb:.1f} MB/s)")
+    else:
+        index = LineIndex.load(opts.file)
+        if index is None:
+            logger.error(f"No valid index for {opts.file}; run: {parser.prog} build {opts.file}")
+            raise SystemExit(1)
+        print(f"File: {opts.file}")
+        print(f"File size: {index.file_size} bytes")
+        print(f"Lines: {index.line_count}")
+        print(f"Records: {index.record_count if index.record_count is not None else 'unknown'}")
+        print(f"Cells: {index.cell_count if index.cell_count is not None else 'unknown'}")
+        print(f"Stride: {index.stride} lines, {len(index.offsets)} offsets")
+
+
+if __name__ == "__main__":
+    main()
@@ -19,6 +19,7 @@ from cassandra.concurrent import execute_concurrent_with_args
 import gc
 import os
 from typing import Iterator, List, Dict, Any, Optional
+from ndjson_index import LineIndex, LineIndexBuilder, iter_raw_lines, DEFAULT_STRIDE
 
 ## Script args and Help
 parser = argparse.ArgumentParser(add_help=True)
@@ -32,6 +33,10 @@ parser.add_argument('-c', '--chunk-size', type=int, default=1000, help='Number o
 parser.add_argument('-b', '--batch-size', type=int, default=100, help='Number of records to insert in each batch')
 parser.add_argument('-m', '--max-memory', type=int, default=500, help='Maximum memory usage in MB before forcing garbage collection')
 parser.add_argument('-i', '--progress-interval', type=int, default=1000, help='Show progress every N records')
+parser.add_argument('--start-line', type=int, default=1, help='First line to process (1-based, seeks via the .idx sidecar when present)')
+parser.add_argument('--end-line', type=int, default=None, help='Last line to process (inclusive)')
+parser.add_argument('--build-index', action="store_true", help='Write the .idx sidecar while ingesting the whole file')
+parser.add_argument('--index-stride', type=int, default=DEFAULT_STRIDE, help='Index the byte offset of every Nth line')
 opts = parser.parse_args()
 
 SCYLLA_IP = opts.SCYLLA_IP.split(',')
@@ -44,6 +49,10 @@ CHUNK_SIZE = opts.chunk_size
 BATCH_SIZE = opts.batch_size
 MAX_MEMORY_MB = opts.max_memory
 PROGRESS_INTERVAL = opts.progress_interval
+START_LINE = opts.start_line
+END_LINE = opts.end_line
+BUILD_INDEX = opts.build_index
+INDEX_STRIDE = opts.index_stride
 
 ## Define KS + Table
 session = ""
@@ -104,35 +113,43 @@ class StreamingBigtableProcessor:
             logger.info(f"Memory usage ({memory_mb:.1f} MB) exceeds limit, forcing garbage collection")
             gc.collect()
 
-    def stream_json_records(self) -> Iterator[Dict[str, Any]]:
-        """Stream JSON records one at a time"""
+    def stream_json_records(self, start_line: int = 1, end_line: Optional[int] = None,
+                            index_builder: Optional[LineIndexBuilder] = None) -> Iterator[Dict[str, Any]]:
+        """Stream JSON records one at a time, optionally limited to a line range"""
         try:
             file_size = self.get_file_size()
-            bytes_read = 0
-
-            with open(self.json_file_path, 'r', encoding='utf-8') as file:
-                for line_num, line in enumerate(file, 1):
-                    bytes_read += len(line.encode('utf-8'))
-                    line = line.strip()
-
-                    if line:
-                        try:
-                            record = json.loads(line)
-                            record['_line_num'] = line_num
-                            record['_progress'] = (bytes_read / file_size) * 100
-                            yield record
-                        except json.JSONDecodeError as e:
-                            error_msg = f"Malformed JSON on line {line_num}: {e}"
-                            logger.warning(error_msg)
-                            self.stats['errors'].append(error_msg)
-                            self.error_count += 1
-                            continue
-
-                    # Show progress periodically
-                    if line_num % PROGRESS_INTERVAL == 0:
-                        progress = (bytes_read / file_size) * 100
-                        logger.info(f"Progress: {progress:.1f}% - Processed {line_num} lines")
-                        self.check_memory_usage()
+
+            index = None
+            if start_line > 1:
+                index = LineIndex.load(self.json_file_path)
+                if index is None:
+                    logger.warning(f"No line index for {self.json_file_path}, scanning to line {start_line}")
+                else:
+                    logger.info(f"Seeking to line {start_line} using {self.json_file_path}.idx")
+
+            for line_num, bytes_read, raw_line in iter_raw_lines(self.json_file_path, start_line, end_line, index):
+                if index_builder is not None:
+                    index_builder.add_line(len(raw_line))
+                line = raw_line.strip()
+
+                if line:
+                    try:
+                        record = json.loads(line)
+                        record['_line_num'] = line_num
+                        record['_progress'] = (bytes_read / file_size) * 100
+                        yield record
+                    except json.JSONDecodeError as e:
+                        error_msg = f"Malformed JSON on line {line_num}: {e}"
+                        logger.warning(error_msg)
+                        self.stats['errors'].append(error_msg)
+                        self.error_count += 1
+                        continue
+
+                # Show progress periodically
+                if line_num % PROGRESS_INTERVAL == 0:
+                    progress = (bytes_read / file_size) * 100
+                    logger.info(f"Progress: {progress:.1f}% - Processed {line_num} lines")
+                    self.check_memory_usage()
 
         except FileNotFoundError:
             logger.error(f"File not found: {self.json_file_path}")
@@ -234,13 +251,21 @@ class StreamingBigtableProcessor:
             # Don't clear the batch on error - could implement retry logic here
             raise
 
-    def stream_process_and_insert(self):
+    def stream_process_and_insert(self, start_line: int = 1, end_line: Optional[int] = None,
+                                  build_index: bool = False):
         """Main streaming processing function"""
         logger.info(f"Starting streaming processing of {self.json_file_path}")
         start_time = time.time()
 
+        index_builder = None
+        if build_index:
+            if start_line > 1 or end_line is not None:
+                logger.warning("Line index can only be built while ingesting the whole file, skipping")
+            else:
+                index_builder = LineIndexBuilder(INDEX_STRIDE)
+
         try:
-            for record in self.stream_json_records():
+            for record in self.stream_json_records(start_line, end_line, index_builder):
                 try:
                     # Process record and get database rows
                     db_rows = self.process_record_cells(record)
@@ -271,6 +296,11 @@ class StreamingBigtableProcessor:
             if self.insert_batch:
                 self.execute_batch_insert()
 
+            if index_builder is not None:
+                index_builder.record_count = self.stats['total_records']
+                index_builder.cell_count = self.stats['total_cells']
+                index_builder.save(self.json_file_path)
+
             # Final statistics
             elapsed = time.time() - start_time
             logger.info(f"Streaming processing complete!")
@@ -369,7 +399,7 @@ def main():
         logger.info("Starting streaming Bigtable data processing...")
 
         # Main streaming processing
-        processor.stream_process_and_insert()
+        processor.stream_process_and_insert(START_LINE, END_LINE, BUILD_INDEX)
 
         # Generate analysis report
         processor.generate_streaming_analysis_report()
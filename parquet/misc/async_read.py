@@ -3,9 +3,12 @@ import json
 import base64
 import struct
 import logging
+import argparse
+import threading
 from datetime import datetime
 from multiprocessing import Pool, cpu_count
 import asyncio
+import concurrent.futures
 
 from scyllapy import Scylla, Batch   # pip install scyllapy
 from cassandra.cluster import Cluster
@@ -20,8 +23,11 @@ KEYSPACE = "moloco"
 TABLE = "table_w_zstd"
 CQL = f"INSERT INTO {KEYSPACE}.{TABLE} (row_key, family, qualifier, timestamp, timestamp_micros, value_b64) VALUES (?, ?, ?, ?, ?, ?)"
 
-BATCH_SIZE = 2
-CHUNK_SIZE = 2
+BATCH_SIZE = 50      # rows per scyllapy batch
+CHUNK_SIZE = 100     # JSON records handed to a worker process at a time
+WRITERS = 64         # concurrent batch writers sharing the one connection
+MAX_PENDING = 2 * cpu_count()  # chunks allowed in flight between reader, workers and writers
+STOP_POLL = 0.5      # seconds the reader thread waits on the queue before checking for a stop
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
 logger = logging.getLogger(__name__)
@@ -49,22 +55,39 @@ def process_single_record(record):
         timestamp_dt = "2025-09-01T00:00:00Z"
         #timestamp_dt = datetime.fromtimestamp(timestamp / 1e6) if timestamp > 0 else None
         value_b64 = cell.get('value_b64', '')
-        print(row_key, family, qualifier, timestamp_dt, timestamp, value_b64)
+        # timestamp_micros is a text column in this table
         processed.append(
-            (row_key, family, qualifier, timestamp_dt, timestamp, value_b64)
+            (row_key, family, qualifier, timestamp_dt, str(timestamp), value_b64)
         )
     return processed
 
-def chunk_generator(json_file_path, chunk_size):
+def wait_for_slot(pending, stop):
+    """Take a slot from `pending`; False if `stop` was set first."""
+    while not pending.acquire(timeout=STOP_POLL):
+        if stop is not None and stop.is_set():
+            return False
+    return True
+
+def chunk_generator(json_file_path, chunk_size, pending=None, stop=None):
+    """
+    Yield lists of records. When `pending` is a semaphore, each chunk takes a
+    slot that the consumer releases once the chunk has been queued for writing,
+    which bounds the work imap_unordered pulls ahead of the writers. Setting
+    `stop` ends the generator early.
+    """
     chunk = []
     for record in stream_json_records(json_file_path):
         chunk.append(record)
         if len(chunk) >= chunk_size:
+            if pending is not None and not wait_for_slot(pending, stop):
+                return
             yield chunk
             chunk = []
     if chunk:
+        if pending is not None and not wait_for_slot(pending, stop):
+            return
         yield chunk
-    print("Chunk processed.")
+    logger.info("All chunks read.")
 
 def process_chunk_for_insert(records_chunk):
     """Process a chunk into DB-ready rows."""
@@ -73,39 +96,108 @@ def process_chunk_for_insert(records_chunk):
         result.extend(process_single_record(record))
     return result
 
-async def scylla_etl_async(ip_addrs, keyspace, cql, batch_data, username, password):
-    """Insert batch using async ScyllaPy batch API, with user/pass auth."""
-    scylla = Scylla(ip_addrs, keyspace=keyspace, username=username, password=password)
+def put_rows(loop, queue, rows, stop):
+    """Put onto the asyncio queue from another thread; False if `stop` was set while the queue was full."""
+    future = asyncio.run_coroutine_threadsafe(queue.put(rows), loop)
+    while True:
+        try:
+            future.result(timeout=STOP_POLL)
+            return True
+        except concurrent.futures.TimeoutError:
+            if stop.is_set():
+                future.cancel()
+                return False
+
+def produce_rows(json_file_path, loop, queue, processes, chunk_size, max_pending, stop):
+    """
+    Runs in a helper thread: fans chunks out to worker processes and hands
+    processed rows to the asyncio writers. queue.put blocks on a full queue,
+    so a slow cluster throttles the reader instead of growing memory. Once
+    `stop` is set (the writers failed) nothing drains the queue, so the
+    reader gives up instead of blocking forever.
+    """
+    pending = threading.BoundedSemaphore(max_pending)
+    try:
+        with Pool(processes) as pool:
+            for rows in pool.imap_unordered(process_chunk_for_insert,
+                                            chunk_generator(json_file_path, chunk_size, pending, stop)):
+                if not put_rows(loop, queue, rows, stop):
+                    logger.warning("Writers stopped, abandoning the remaining input.")
+                    break
+                pending.release()
+    finally:
+        put_rows(loop, queue, None, stop)
+
+async def batch_writer(scylla, queue, stats, batch_size):
+    """Pull processed rows off the queue and write them as batches until the reader is done."""
+    while True:
+        rows = await queue.get()
+        if rows is None:
+            # Pass the sentinel on so every writer sees it
+            await queue.put(None)
+            return
+        for i in range(0, len(rows), batch_size):
+            batch_rows = rows[i:i + batch_size]
+            batch = Batch()
+            for _ in batch_rows:
+                batch.add_query(CQL)
+            try:
+                await scylla.batch(batch, batch_rows)
+                stats['rows'] += len(batch_rows)
+                stats['batches'] += 1
+            except Exception as e:
+                stats['failed'] += len(batch_rows)
+                logger.warning(f"Batch of {len(batch_rows)} rows failed: {e}")
+
+async def scylla_etl_async(json_file_path, processes, chunk_size, batch_size, writers, max_pending):
+    """One long-lived scyllapy connection shared by many concurrent batch writers."""
+    scylla = Scylla(SCYLLA_IP, keyspace=KEYSPACE, username=USERNAME, password=PASSWORD)
     await scylla.startup()
-    batch = Batch()
-    # All queries identical and batch API in scyllapy supports this pattern
-    batch.add_query(cql)
-    await scylla.batch(batch, batch_data)
-    await scylla.shutdown()
-
-def flush_to_scylla(batch_rows):
-    """Sync wrapper to launch async batch insert from multiprocessing."""
+    stats = {'rows': 0, 'batches': 0, 'failed': 0}
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=max_pending)
+    stop = threading.Event()
+    start = loop.time()
+    try:
+        producer = loop.run_in_executor(None, produce_rows, json_file_path, loop, queue,
+                                        processes, chunk_size, max_pending, stop)
+        tasks = [asyncio.ensure_future(batch_writer(scylla, queue, stats, batch_size)) for _ in range(writers)]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # A writer died: stop the rest and let the reader thread see that nobody is draining the queue
+            stop.set()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await asyncio.gather(producer, return_exceptions=True)
+            raise
+        await producer
+    finally:
+        await scylla.shutdown()
+    elapsed = loop.time() - start
+    rate = stats['rows'] / elapsed if elapsed > 0 else 0
+    logger.info(f"Wrote {stats['rows']} rows in {stats['batches']} batches, {stats['failed']} failed rows, "
+                f"{elapsed:.2f} seconds ({rate:.1f} rows/sec)")
+
+def main(json_file_path, processes=None, chunk_size=CHUNK_SIZE, batch_size=BATCH_SIZE,
+         writers=WRITERS, max_pending=MAX_PENDING):
     asyncio.run(
-        scylla_etl_async(
-            SCYLLA_IP, KEYSPACE, CQL, batch_rows, USERNAME, PASSWORD
-        )
+        scylla_etl_async(json_file_path, processes or cpu_count(), chunk_size,
+                         batch_size, writers, max_pending)
     )
-
-def main(json_file_path):
-    # Multiprocess pool for CPU-bound extraction
-    with Pool(cpu_count()) as pool:
-        for records_chunk in chunk_generator(json_file_path, CHUNK_SIZE):
-            # Preprocess chunk into DB parameter rows
-            processed_rows = pool.apply(process_chunk_for_insert, (records_chunk,))
-            # Batch and send to Scylla
-            for i in range(0, len(processed_rows), BATCH_SIZE):
-                batch = processed_rows[i:i + BATCH_SIZE]
-                print("Flushing batch to Scylla:", i)
-                flush_to_scylla(batch)   # Async insert
-
     logger.info("ETL processing completed.")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(add_help=True)
+    parser.add_argument('-f', '--file', default="prod_revised.json", help='Path to the input JSON file')
+    parser.add_argument('-b', '--batch-size', type=int, default=BATCH_SIZE, help='Rows per batch statement')
+    parser.add_argument('-c', '--chunk-size', type=int, default=CHUNK_SIZE, help='Records per worker task')
+    parser.add_argument('-w', '--writers', type=int, default=WRITERS, help='Concurrent batch writers on the shared connection')
+    parser.add_argument('-P', '--processes', type=int, default=0, help='Worker processes for record processing (0 = cpu_count())')
+    parser.add_argument('--max-pending', type=int, default=MAX_PENDING, help='Chunks buffered between reader and writers')
+    opts = parser.parse_args()
+
     create_ks = f"""CREATE KEYSPACE IF NOT EXISTS {KEYSPACE}
       WITH replication = {{'class' : 'org.apache.cassandra.locator.NetworkTopologyStrategy', 'replication_factor' : 3}}
       AND tablets = {{'enabled': 'true' }};
@@ -123,5 +215,4 @@ if __name__ == "__main__":
     session.execute(create_table)
     print("Table created.")
     session.shutdown()
-    main("prod_revised.json")
-
+    main(opts.file, opts.processes, opts.chunk_size, opts.batch_size, opts.writers, opts.max_pending)
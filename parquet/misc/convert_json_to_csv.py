@@ -1,6 +1,10 @@
 #!/usr/bin/env python3
+import os
+import sys
 import json
+import time
 import base64
+import argparse
 import pandas as pd
 from collections import defaultdict
 import struct
@@ -11,6 +15,9 @@ import logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# schema_from_parquet.py, which names the family tables, lives one level up
+PARQUET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
 class BigtableDataProcessor:
     """
     Approach 1: Basic data extraction and analysis from Bigtable-like JSON data
@@ -211,10 +218,266 @@ class BigtableDataProcessor:
         logger.info(f"Data exported to {output_file} ({len(df)} rows)")
         return df
 
-def main():
+class StreamingFamilyConverter:
+    """
+    Stream Bigtable-like NDJSON into one output file per column family.
+
+    Cells are buffered per family in columnar lists and flushed through
+    pyarrow writers, so memory is bounded by flush_rows per family. Each
+    family rolls over to a new part file once it reaches max_file_bytes.
+
+    Output columns match the family-per-table layout used by the ingest
+    scripts: (row_key, qualifier, timestamp, raw_value). CSV output is
+    written for cqlsh COPY FROM (timestamp as epoch milliseconds, blob as
+    0x-prefixed hex); Parquet output keeps native timestamp/binary types.
+
+    With a token_sorter, cells are emitted in Murmur3 token order of their
+    row_key instead of source order; with token_boundaries as well, each
+    family is split into one file set per token range.
+    """
+
+    COLUMNS = ['row_key', 'qualifier', 'timestamp', 'raw_value']
+
+    def __init__(self, json_file_path, output_dir, output_format='csv', max_file_bytes=256 * 1024 * 1024,
+                 flush_rows=50000, keyspace='moloco', table_prefix='table',
+                 token_sorter=None, token_boundaries=None):
+        import pyarrow as pa
+        if PARQUET_DIR not in sys.path:
+            sys.path.append(PARQUET_DIR)
+
+        if output_format not in ('csv', 'parquet'):
+            raise ValueError(f"Unsupported output format: {output_format}")
+        self.json_file_path = json_file_path
+        self.output_dir = output_dir
+        self.output_format = output_format
+        self.max_file_bytes = max_file_bytes
+        self.flush_rows = flush_rows
+        self.keyspace = keyspace
+        self.table_prefix = table_prefix
+        self.token_sorter = token_sorter
+        self.token_boundaries = token_boundaries
+        self.current_bucket = {}
+
+        if output_format == 'csv':
+            self.schema = pa.schema([('row_key', pa.string()), ('qualifier', pa.string()),
+                                     ('timestamp', pa.int64()), ('raw_value', pa.string())])
+        else:
+            self.schema = pa.schema([('row_key', pa.string()), ('qualifier', pa.string()),
+                                     ('timestamp', pa.timestamp('us', tz='UTC')), ('raw_value', pa.binary())])
+
+        self.buffers = defaultdict(lambda: [[] for _ in self.COLUMNS])
+        self.writers = {}          # family -> (sink, writer, path)
+        self.part_numbers = defaultdict(int)
+        self.files = defaultdict(list)
+        self.stats = {
+            'total_records': 0,
+            'total_cells': 0,
+            'family_counts': defaultdict(int),
+            'errors': 0
+        }
+
+    def stream_records(self):
+        """Yield (line_num, record) one line at a time"""
+        with open(self.json_file_path, 'rb') as file:
+            for line_num, line in enumerate(file, 1):
+                line = line.strip()
+                if line:
+                    try:
+                        yield line_num, json.loads(line)
+                    except json.JSONDecodeError as e:
+                        logger.warning(f"Skipping malformed JSON on line {line_num}: {e}")
+                        self.stats['errors'] += 1
+
+    def convert_cell(self, cell):
+        """Return (qualifier, timestamp, raw_value) typed for the output format"""
+        qualifier = cell.get('qual', 'unknown')
+        ts_micros = cell.get('ts_micros', 0)
+        raw_value = base64.b64decode(cell.get('value_b64', ''))
+        if self.output_format == 'csv':
+            return qualifier, ts_micros // 1000, '0x' + raw_value.hex()
+        return qualifier, ts_micros, raw_value
+
+    def add_cell(self, family, row_key, qualifier, timestamp, raw_value):
+        buffer = self.buffers[family]
+        buffer[0].append(row_key)
+        buffer[1].append(qualifier)
+        buffer[2].append(timestamp)
+        buffer[3].append(raw_value)
+        if len(buffer[0]) >= self.flush_rows:
+            self.flush_family(family)
+
+    def _open_writer(self, family):
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+        import pyarrow.parquet as pq
+        from schema_from_parquet import sanitize_table_name
+
+        bucket = self.current_bucket.get(family)
+        self.part_numbers[(family, bucket)] += 1
+        part = self.part_numbers[(family, bucket)]
+        family_dir = os.path.join(self.output_dir, sanitize_table_name(family))
+        os.makedirs(family_dir, exist_ok=True)
+        if bucket is None:
+            name = f"part-{part:05d}.{self.output_format}"
+        else:
+            name = f"range-{bucket:05d}-part-{part:05d}.{self.output_format}"
+        path = os.path.join(family_dir, name)
+        sink = pa.OSFile(path, 'wb')
+        if self.output_format == 'csv':
+            writer = pa_csv.CSVWriter(sink, self.schema)
+        else:
+            writer = pq.ParquetWriter(sink, self.schema, compression='zstd')
+        self.writers[family] = (sink, writer, path)
+        self.files[family].append(path)
+        logger.info(f"Writing family {family} to {path}")
+        return self.writers[family]
+
+    def _close_writer(self, family):
+        sink, writer, path = self.writers.pop(family)
+        writer.close()
+        sink.close()
+
+    def flush_family(self, family):
+        """Write the buffered cells of one family and roll the file if it is full"""
+        import pyarrow as pa
+
+        buffer = self.buffers[family]
+        if not buffer[0]:
+            return
+        sink, writer, _ = self.writers.get(family) or self._open_writer(family)
+        writer.write_batch(pa.record_batch(buffer, schema=self.schema))
+        self.buffers[family] = [[] for _ in self.COLUMNS]
+        if sink.tell() >= self.max_file_bytes:
+            self._close_writer(family)
+
+    def drain_token_order(self):
+        """Replay sorted cells into the family writers, switching files at token range boundaries"""
+        from token_order import bucket_for_token
+
+        for token, _, (family, values) in self.token_sorter.sorted_items():
+            if self.token_boundaries is not None:
+                bucket = bucket_for_token(token, self.token_boundaries)
+                if self.current_bucket.get(family) != bucket:
+                    self.flush_family(family)
+                    if family in self.writers:
+                        self._close_writer(family)
+                    self.current_bucket[family] = bucket
+            self.add_cell(family, *values)
+
+    def close(self):
+        if self.token_sorter is not None:
+            self.drain_token_order()
+        for family in list(self.buffers.keys()):
+            self.flush_family(family)
+        for family in list(self.writers.keys()):
+            self._close_writer(family)
+
+    def convert(self):
+        """Stream the input file once and write all family files"""
+        logger.info(f"Converting {self.json_file_path} into {self.output_dir} ({self.output_format})")
+        start_time = time.time()
+        try:
+            if self.token_sorter is not None:
+                from token_order import murmur3_token
+            for line_num, record in self.stream_records():
+                row_key = record.get('row_key', f'unknown_{line_num}')
+                cells = record.get('cells', [])
+                self.stats['total_records'] += 1
+                self.stats['total_cells'] += len(cells)
+                token = murmur3_token(row_key) if self.token_sorter is not None else None
+                for cell in cells:
+                    family = cell.get('family', 'unknown')
+                    self.stats['family_counts'][family] += 1
+                    if token is None:
+                        self.add_cell(family, row_key, *self.convert_cell(cell))
+                    else:
+                        self.token_sorter.add(token, row_key, (family, (row_key, *self.convert_cell(cell))))
+        finally:
+            self.close()
+        elapsed = time.time() - start_time
+        logger.info(f"Converted {self.stats['total_records']} records, {self.stats['total_cells']} cells "
+                    f"in {elapsed:.2f} seconds")
+
+    def write_copy_script(self, output_file=None):
+        """Write the cqlsh COPY FROM statements that load the CSV parts"""
+        # The table names must match the DDL, so both come from schema_from_parquet
+        from schema_from_parquet import sanitize_table_name
+
+        output_file = output_file or os.path.join(self.output_dir, 'copy_from.cql')
+        columns = ', '.join(self.COLUMNS)
+        with open(output_file, 'w') as f:
+            for family in sorted(self.files):
+                table = f"{self.keyspace}.{self.table_prefix}_{sanitize_table_name(family)}"
+                for path in self.files[family]:
+                    f.write(f"COPY {table} ({columns}) FROM '{os.path.abspath(path)}' WITH HEADER = true;\n")
+        logger.info(f"cqlsh COPY script saved to {output_file}")
+        return output_file
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Convert Bigtable-like NDJSON into per-family CSV or Parquet files')
+    parser.add_argument('-f', '--file', default='prod_revised.json', help='Path to the input JSON file')
+    parser.add_argument('-o', '--output-dir', default='converted', help='Directory for the per-family output files')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv', help='Output file format')
+    parser.add_argument('--max-file-mb', type=int, default=256, help='Roll to a new part file after this many MB')
+    parser.add_argument('--flush-rows', type=int, default=50000, help='Cells buffered per family before a write')
+    parser.add_argument('-k', '--keyspace', default='moloco', help='Keyspace used in the generated COPY statements')
+    parser.add_argument('--token-order', action='store_true', help='Emit cells in Murmur3 token order of row_key (external sort)')
+    parser.add_argument('--token-ranges', type=int, default=0, help='Split each family into N equal token ranges (implies --token-order)')
+    parser.add_argument('--ring-hosts', default=None, help='Comma-separated hosts to read vnode/tablet boundaries from (implies --token-order)')
+    parser.add_argument('-u', '--username', default='cassandra', help='Username for --ring-hosts')
+    parser.add_argument('-p', '--password', default='cassandra', help='Password for --ring-hosts')
+    parser.add_argument('--ring-table', default=None, help='Table whose tablet boundaries to use with --ring-hosts (e.g. table_e)')
+    parser.add_argument('--sort-run-cells', type=int, default=1000000, help='Cells held in memory per sorted run before spilling')
+    parser.add_argument('--tmp-dir', default=None, help='Directory for sorted run files')
+    parser.add_argument('--legacy', action='store_true', help='Load everything into pandas and write analysis plus all_data.csv')
+    return parser.parse_args()
+
+def load_token_boundaries(opts):
+    """Token range boundaries requested on the command line, or None"""
+    from token_order import equal_token_boundaries, ring_token_boundaries
+
+    if opts.ring_hosts:
+        from cassandra.cluster import Cluster
+        from cassandra.auth import PlainTextAuthProvider
+        hosts = [h.strip() for h in opts.ring_hosts.split(',') if h.strip()]
+        cluster = Cluster(hosts, auth_provider=PlainTextAuthProvider(username=opts.username, password=opts.password))
+        try:
+            session = cluster.connect()
+            return ring_token_boundaries(session, opts.keyspace, opts.ring_table)
+        finally:
+            cluster.shutdown()
+    if opts.token_ranges > 0:
+        return equal_token_boundaries(opts.token_ranges)
+    return None
+
+def main_streaming(opts):
+    """Streaming execution: bounded memory, one file set per column family"""
+    token_sorter = None
+    token_boundaries = None
+    if opts.token_order or opts.token_ranges > 0 or opts.ring_hosts:
+        from token_order import ExternalTokenSorter
+        token_sorter = ExternalTokenSorter(run_size=opts.sort_run_cells, tmp_dir=opts.tmp_dir)
+        token_boundaries = load_token_boundaries(opts)
+
+    converter = StreamingFamilyConverter(opts.file, opts.output_dir, opts.format,
+                                         max_file_bytes=opts.max_file_mb * 1024 * 1024,
+                                         flush_rows=opts.flush_rows, keyspace=opts.keyspace,
+                                         token_sorter=token_sorter, token_boundaries=token_boundaries)
+    converter.convert()
+    if opts.format == 'csv':
+        converter.write_copy_script()
+
+    print("\nCONVERSION SUMMARY:")
+    print(f"Total Records: {converter.stats['total_records']}")
+    print(f"Total Cells: {converter.stats['total_cells']}")
+    print(f"Malformed Lines: {converter.stats['errors']}")
+    for family, count in sorted(converter.stats['family_counts'].items(), key=lambda x: x[1], reverse=True):
+        print(f"  {family}: {count} cells in {len(converter.files[family])} file(s)")
+
+def main(json_file_path='prod_revised.json'):
     """Main execution function"""
     # Initialize processor
-    processor = BigtableDataProcessor('prod_revised.json')
+    processor = BigtableDataProcessor(json_file_path)
     
     try:
         # Step 1: Load data
@@ -256,5 +519,9 @@ def main():
         raise
 
 if __name__ == "__main__":
-    main()
+    opts = parse_args()
+    if opts.legacy:
+        main(opts.file)
+    else:
+        main_streaming(opts)
 
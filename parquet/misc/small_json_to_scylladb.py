@@ -20,9 +20,19 @@ from cassandra.auth import PlainTextAuthProvider
 parser = argparse.ArgumentParser(add_help=True)
 
 parser.add_argument('-s', action="store", dest="SCYLLA_IP", default="127.0.0.1")
+parser.add_argument('-f', '--file', type=str, default="prod_revised.json", help='Path to the input JSON file')
+parser.add_argument('--bulk', action="store_true", help='Stream records and write them with concurrent execution (O(batch) memory)')
+parser.add_argument('-b', '--batch-size', type=int, default=5000, help='Cells per concurrent write batch in bulk mode')
+parser.add_argument('-c', '--concurrency', type=int, default=100, help='In-flight requests per batch in bulk mode')
+parser.add_argument('-x', '--export-csv', type=str, default=None, help='Also write the extracted cells to this CSV file (bulk mode)')
 opts = parser.parse_args()
 
 SCYLLA_IP = opts.SCYLLA_IP.split(',')
+FILENAME = opts.file
+BULK = opts.bulk
+BATCH_SIZE = opts.batch_size
+CONCURRENCY = opts.concurrency
+EXPORT_CSV = opts.export_csv
 print (SCYLLA_IP)
 
 ## Define KS + Table
@@ -217,9 +227,106 @@ class BigtableDataProcessor:
 
         return pd.DataFrame(rows)
     
-    def save_analysis_report(self, output_file='analysis_report.txt'):
+    def stream_records(self):
+        """Yield (line_num, record) one at a time instead of loading the whole file"""
+        try:
+            with open(self.json_file_path, 'rb') as file:
+                for line_num, line in enumerate(file, 1):
+                    line = line.strip()
+                    if line:
+                        try:
+                            yield line_num, json.loads(line)
+                        except json.JSONDecodeError as e:
+                            logger.warning(f"Skipping malformed JSON on line {line_num}: {e}")
+        except FileNotFoundError:
+            logger.error(f"File not found: {self.json_file_path}")
+            raise
+
+    def bulk_load(self, batch_size=BATCH_SIZE, concurrency=CONCURRENCY, csv_file=None):
+        """
+        Bulk mode: stream records, write cells with concurrent execution and
+        optionally append them to a CSV through a columnar writer.
+
+        Only one batch of cells is held in memory at a time; analysis
+        counters are accumulated on the fly.
+        """
+        cql_prepared = session.prepare(cql)
+        cql_prepared.consistency_level = ConsistencyLevel.ONE
+
+        family_counts = defaultdict(int)
+        qualifier_counts = defaultdict(int)
+        total_records = 0
+        total_cells = 0
+        total_failed = 0
+
+        csv_writer = None
+        if csv_file:
+            import pyarrow as pa
+            import pyarrow.csv as pa_csv
+            csv_schema = pa.schema([
+                ('row_key', pa.string()),
+                ('family', pa.string()),
+                ('qualifier', pa.string()),
+                ('timestamp', pa.timestamp('us')),
+                ('timestamp_micros', pa.int64()),
+                ('value_b64', pa.string()),
+            ])
+            csv_writer = pa_csv.CSVWriter(csv_file, csv_schema)
+
+        def flush(batch):
+            nonlocal total_failed
+            results = execute_concurrent_with_args(session, cql_prepared, batch,
+                                                   concurrency=concurrency, raise_on_first_error=False,
+                                                   results_generator=True)
+            total_failed += sum(1 for (success, _) in results if not success)
+            if csv_writer is not None:
+                # Transpose row tuples into columns for the columnar writer
+                columns = [list(col) for col in zip(*batch)]
+                csv_writer.write_batch(pa.record_batch(columns, schema=csv_schema))
+
+        start_time = time.time()
+        batch = []
+        try:
+            for line_num, record in self.stream_records():
+                row_key = record.get('row_key', f'unknown_{line_num}')
+                cells = record.get('cells', [])
+                total_records += 1
+                total_cells += len(cells)
+                for cell in cells:
+                    family = cell.get('family', 'unknown')
+                    qualifier = cell.get('qual', 'unknown')
+                    timestamp = cell.get('ts_micros', 0)
+                    family_counts[family] += 1
+                    qualifier_counts[qualifier] += 1
+                    timestamp_dt = datetime.fromtimestamp(timestamp / 1000000) if timestamp > 0 else None
+                    batch.append((row_key, family, qualifier, timestamp_dt, timestamp, cell.get('value_b64', '')))
+                    if len(batch) >= batch_size:
+                        flush(batch)
+                        batch = []
+            if batch:
+                flush(batch)
+        finally:
+            if csv_writer is not None:
+                csv_writer.close()
+
+        elapsed = time.time() - start_time
+        logger.info(f"Bulk load complete: {total_records} records, {total_cells} cells, "
+                    f"{total_failed} failures in {elapsed:.2f} seconds ({total_cells / elapsed if elapsed else 0:.1f} cells/sec)")
+        if csv_file:
+            logger.info(f"Data exported to {csv_file} ({total_cells} rows)")
+
+        return {
+            'total_records': total_records,
+            'total_cells': total_cells,
+            'avg_cells_per_record': total_cells / total_records if total_records else 0,
+            'family_distribution': dict(family_counts),
+            'top_qualifiers': dict(sorted(qualifier_counts.items(), key=lambda x: x[1], reverse=True)[:20])
+        }
+
+    def save_analysis_report(self, output_file='analysis_report.txt', analysis=None):
         """Save analysis report to file"""
-        analysis = self.analyze_data_structure()
+        if analysis is None:
+            analysis = self.analyze_data_structure()
         
         with open(output_file, 'w') as f:
             f.write("BIGTABLE DATA ANALYSIS REPORT\n")
@@ -248,10 +355,25 @@ class BigtableDataProcessor:
         logger.info(f"Data exported to {output_file} ({len(df)} rows)")
         return df
 
+def main_bulk():
+    """Bulk execution: stream, write concurrently and export incrementally"""
+    processor = BigtableDataProcessor(FILENAME)
+    try:
+        analysis = processor.bulk_load(BATCH_SIZE, CONCURRENCY, EXPORT_CSV)
+        processor.save_analysis_report(analysis=analysis)
+
+        print("\nDATA ANALYSIS SUMMARY:")
+        print(f"Total Records: {analysis['total_records']}")
+        print(f"Total Cells: {analysis['total_cells']}")
+        print(f"Average Cells per Record: {analysis['avg_cells_per_record']:.2f}")
+    except Exception as e:
+        logger.error(f"Processing failed: {e}")
+        raise
+
 def main():
     """Main execution function"""
     # Initialize processor
-    processor = BigtableDataProcessor('prod_revised.json')
+    processor = BigtableDataProcessor(FILENAME)
     
     try:
         # Step 1: Load data
@@ -314,6 +436,9 @@ if __name__ == "__main__":
     session.execute(f"""DROP TABLE if exists {keyspace}.{t};""")
     session.execute(create_table)
 
-    main()
+    if BULK:
+        main_bulk()
+    else:
+        main()
 
     session.shutdown()  
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Client-side Murmur3 token ordering for offline exports.
+
+Computing each partition key's token on the client lets converters emit
+cells in ring order, bucketed by token range (equal splits, vnode ranges or
+tablet boundaries), so a bulk load streams each replica's data in order.
+Sorting is done with bounded memory: sorted runs are spilled to temporary
+files and merged lazily.
+"""
+
+import os
+import heapq
+import pickle
+import logging
+import tempfile
+from bisect import bisect_left
+from typing import Any, Iterator, List, Optional, Tuple
+
+from cassandra.metadata import Murmur3Token
+
+MIN_TOKEN = -2 ** 63
+MAX_TOKEN = 2 ** 63 - 1
+
+logger = logging.getLogger(__name__)
+
+
+def murmur3_token(partition_key) -> int:
+    """Murmur3 token of a single-column text/blob partition key, as Scylla computes it"""
+    if isinstance(partition_key, str):
+        partition_key = partition_key.encode('utf-8')
+    return Murmur3Token.hash_fn(partition_key)
+
+
+def equal_token_boundaries(count: int) -> List[int]:
+    """Last tokens of `count` equal-width ranges covering the whole ring"""
+    count = max(1, count)
+    width = (MAX_TOKEN - MIN_TOKEN + 1) // count
+    boundaries = [MIN_TOKEN + width * (i + 1) - 1 for i in range(count - 1)]
+    boundaries.append(MAX_TOKEN)
+    return boundaries
+
+
+def ring_token_boundaries(session, keyspace: str, table: Optional[str] = None) -> List[int]:
+    """
+    Last tokens of the cluster's token ranges for keyspace(.table).
+
+    Tablet keyspaces are read from system.tablets, whose partition key is the
+    table id (resolved from system_schema.tables); tables without tablets use
+    the driver's token map.
+    """
+    if table:
+        row = next(iter(session.execute(
+            "SELECT id FROM system_schema.tables WHERE keyspace_name = %s AND table_name = %s",
+            (keyspace, table))), None)
+        if row is None:
+            raise ValueError(f"Table {keyspace}.{table} does not exist")
+        try:
+            rows = session.execute("SELECT last_token FROM system.tablets WHERE table_id = %s", (row.id,))
+            boundaries = sorted(r.last_token for r in rows)
+        except Exception as e:
+            logger.warning(f"Could not read tablet metadata for {keyspace}.{table} ({e}); "
+                           f"falling back to the vnode ring, which is wrong if the keyspace uses tablets")
+        else:
+            if boundaries:
+                logger.info(f"Using {len(boundaries)} tablet boundaries of {keyspace}.{table}")
+                return boundaries
+            logger.info(f"{keyspace}.{table} has no tablets (vnode keyspace), using the vnode ring")
+
+    token_map = session.cluster.metadata.token_map
+    if token_map is None or not token_map.ring:
+        raise ValueError("Token map is not available; enable token metadata or use equal token ranges")
+    boundaries = sorted(token.value for token in token_map.ring)
+    logger.info(f"Using {len(boundaries)} vnode ranges")
+    return boundaries
+
+
+def bucket_for_token(token: int, boundaries: List[int]) -> int:
+    """Index of the (previous_last_token, last_token] range owning `token`; wraps around the ring"""
+    bucket = bisect_left(boundaries, token)
+    return bucket if bucket < len(boundaries) else 0
+
+
+class ExternalTokenSorter:
+    """
+    Bounded-memory sort of (token, key, payload) items.
+
+    Items are buffered up to run_size, sorted and spilled to a temporary run
+    file; sorted_items() merges all runs lazily with heapq.merge.
+    """
+
+    SPILL_CHUNK = 10000
+
+    def __init__(self, run_size: int = 1000000, tmp_dir: Optional[str] = None):
+        self.run_size = run_size
+        self.tmp_dir = tmp_dir
+        self.buffer = []
+        self.runs = []
+        self.count = 0
+
+    def add(self, token: int, key: Any, payload: Any):
+        self.buffer.append((token, key, payload))
+        self.count += 1
+        if len(self.buffer) >= self.run_size:
+            self._spill()
+
+    def _spill(self):
+        self.buffer.sort(key=lambda item: (item[0], item[1]))
+        fd, path = tempfile.mkstemp(prefix='token_run_', suffix='.pkl', dir=self.tmp_dir)
+        with os.fdopen(fd, 'wb') as f:
+            for i in range(0, len(self.buffer), self.SPILL_CHUNK):
+                pickle.dump(self.buffer[i:i + self.SPILL_CHUNK], f, protocol=pickle.HIGHEST_PROTOCOL)
+        logger.debug(f"Spilled sorted run of {len(self.buffer)} items to {path}")
+        self.runs.append(path)
+        self.buffer = []
+
+    @staticmethod
+    def _read_run(path: str) -> Iterator[Tuple[int, Any, Any]]:
+        with open(path, 'rb') as f:
+            while True:
+                try:
+                    chunk = pickle.load(f)
+                except EOFError:
+                    return
+                yield from chunk
+
+    def sorted_items(self) -> Iterator[Tuple[int, Any, Any]]:
+        """Yield all items in (token, key) order and remove the run files"""
+        self.buffer.sort(key=lambda item: (item[0], item[1]))
+        if self.runs:
+            logger.info(f"Merging {len(self.runs)} sorted runs ({self.count} items)")
+        streams = [self._read_run(path) for path in self.runs] + [iter(self.buffer)]
+        try:
+            yield from heapq.merge(*streams, key=lambda item: (item[0], item[1]))
+        finally:
+            self.cleanup()
+
+    def cleanup(self):
+        for path in self.runs:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.runs = []
+        self.buffer = []
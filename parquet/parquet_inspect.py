@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+
+"""
+Size a Bigtable-shaped Parquet export without decoding it.
+
+The default report only reads the Parquet footer: rows, row-group layout and
+compressed/uncompressed bytes per family column, aggregated from column-chunk
+metadata. --sample N additionally decodes N evenly spaced row groups and
+computes, vectorized, cells/qualifiers per row and value-size percentiles per
+family.
+
+Usage:
+    ./parquet_inspect.py -f input.parquet
+    ./parquet_inspect.py -f input.parquet --sample 2 --json
+"""
+
+import json
+import argparse
+from collections import defaultdict
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+PERCENTILES = [50, 90, 99]
+
+
+def human_bytes(n):
+    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+        if abs(n) < 1024 or unit == 'TB':
+            return f"{n:.1f} {unit}" if unit != 'B' else f"{n} B"
+        n /= 1024
+
+
+def footer_report(parquet_file):
+    """Everything the footer gives for free: no data pages are read"""
+    metadata = parquet_file.metadata
+    families = defaultdict(lambda: {'compressed_bytes': 0, 'uncompressed_bytes': 0, 'leaf_values': 0})
+    row_groups = []
+
+    for rg_idx in range(metadata.num_row_groups):
+        rg = metadata.row_group(rg_idx)
+        compressed = 0
+        for col_idx in range(rg.num_columns):
+            chunk = rg.column(col_idx)
+            family = chunk.path_in_schema.split('.')[0]
+            families[family]['compressed_bytes'] += chunk.total_compressed_size
+            families[family]['uncompressed_bytes'] += chunk.total_uncompressed_size
+            # The leaf value column counts one entry per cell (plus empty-list placeholders)
+            if chunk.path_in_schema.endswith('.value'):
+                families[family]['leaf_values'] += chunk.num_values
+            compressed += chunk.total_compressed_size
+        row_groups.append({
+            'index': rg_idx,
+            'rows': rg.num_rows,
+            'compressed_bytes': compressed,
+            'uncompressed_bytes': rg.total_byte_size,
+        })
+
+    return {
+        'rows': metadata.num_rows,
+        'num_row_groups': metadata.num_row_groups,
+        'num_leaf_columns': metadata.num_columns,
+        'created_by': metadata.created_by,
+        'serialized_footer_bytes': metadata.serialized_size,
+        'row_groups': row_groups,
+        'families': dict(families),
+    }
+
+
+def _is_family_type(arrow_type):
+    """True for the Bigtable family shape struct<column: list<struct<..., cell: list<struct<..., value>>>>>"""
+    def field(struct_type, name):
+        if not pa.types.is_struct(struct_type) or struct_type.get_field_index(name) < 0:
+            return None
+        return struct_type.field(name).type
+
+    def list_of_struct_with(list_type, name):
+        if not (pa.types.is_list(list_type) or pa.types.is_large_list(list_type)):
+            return None
+        return field(list_type.value_type, name)
+
+    cell = list_of_struct_with(field(arrow_type, 'column') or pa.null(), 'cell')
+    value = list_of_struct_with(cell, 'value') if cell is not None else None
+    return value is not None and (pa.types.is_binary(value) or pa.types.is_large_binary(value)
+                                  or pa.types.is_string(value) or pa.types.is_large_string(value))
+
+
+def _family_sample_stats(family_array):
+    """Vectorized per-family statistics for one decoded struct<column: list<...>> array"""
+    columns = family_array.field('column')
+    qualifiers_per_row = pc.fill_null(pc.list_value_length(columns), 0)
+    column_entries = pc.list_flatten(columns)
+    cells = column_entries.field('cell')
+    cells_per_qualifier = pc.fill_null(pc.list_value_length(cells), 0)
+    cell_entries = pc.list_flatten(cells)
+    value_sizes = pc.fill_null(pc.binary_length(cell_entries.field('value')), 0)
+
+    # Cells per row: sum the per-qualifier cell counts back up to their parent rows
+    parents = pc.list_parent_indices(columns).to_numpy()
+    cells_per_row = np.bincount(parents, weights=cells_per_qualifier.to_numpy(zero_copy_only=False),
+                                minlength=len(family_array)).astype(np.int64)
+
+    return {
+        'rows': len(family_array),
+        'rows_with_family': int(np.count_nonzero(qualifiers_per_row.to_numpy(zero_copy_only=False))),
+        'qualifiers': int(pc.sum(qualifiers_per_row).as_py() or 0),
+        'cells': len(cell_entries),
+        'cells_per_row': cells_per_row,
+        'value_sizes': value_sizes.to_numpy(zero_copy_only=False),
+    }
+
+
+def sample_report(parquet_file, sample_row_groups):
+    """Decode a few evenly spaced row groups and compute per-family distributions"""
+    metadata = parquet_file.metadata
+    n = min(sample_row_groups, metadata.num_row_groups)
+    if n <= 0:
+        return None
+    picks = sorted(set(np.linspace(0, metadata.num_row_groups - 1, n).round().astype(int).tolist()))
+    schema = parquet_file.schema_arrow
+    # Only family-shaped columns have cells; the row key and any plain columns are listed, not sampled
+    family_names = [f.name for f in schema if _is_family_type(f.type)]
+    flat_columns = [f.name for f in schema if f.name not in family_names]
+
+    merged = defaultdict(lambda: {'rows': 0, 'rows_with_family': 0, 'qualifiers': 0, 'cells': 0,
+                                  'cells_per_row': [], 'value_sizes': []})
+    sampled_rows = 0
+    for rg_idx in picks:
+        sampled_rows += metadata.row_group(rg_idx).num_rows
+        if not family_names:
+            continue
+        table = parquet_file.read_row_group(rg_idx, columns=family_names)
+        for family in family_names:
+            stats = _family_sample_stats(table.column(family).combine_chunks())
+            m = merged[family]
+            for key in ('rows', 'rows_with_family', 'qualifiers', 'cells'):
+                m[key] += stats[key]
+            m['cells_per_row'].append(stats['cells_per_row'])
+            m['value_sizes'].append(stats['value_sizes'])
+
+    scale = metadata.num_rows / sampled_rows if sampled_rows else 0
+    families = {}
+    for family, m in merged.items():
+        value_sizes = np.concatenate(m['value_sizes']) if m['value_sizes'] else np.array([], dtype=np.int64)
+        cells_per_row = np.concatenate(m['cells_per_row']) if m['cells_per_row'] else np.array([], dtype=np.int64)
+        present = cells_per_row[cells_per_row > 0]
+        families[family] = {
+            'sampled_cells': m['cells'],
+            'sampled_qualifiers': m['qualifiers'],
+            'rows_with_family_pct': 100.0 * m['rows_with_family'] / m['rows'] if m['rows'] else 0.0,
+            'cells_per_row_mean': float(present.mean()) if present.size else 0.0,
+            'cells_per_row_max': int(present.max()) if present.size else 0,
+            'value_bytes_total': int(value_sizes.sum()),
+            'value_size_mean': float(value_sizes.mean()) if value_sizes.size else 0.0,
+            'value_size_percentiles': {f"p{p}": float(v) for p, v in
+                                       zip(PERCENTILES, np.percentile(value_sizes, PERCENTILES))} if value_sizes.size else {},
+            'value_size_max': int(value_sizes.max()) if value_sizes.size else 0,
+            'estimated_total_cells': int(m['cells'] * scale),
+            'estimated_total_value_bytes': int(value_sizes.sum() * scale),
+        }
+    return {'row_groups': picks, 'rows': sampled_rows, 'families': families, 'flat_columns': flat_columns}
+
+
+def print_report(path, footer, sample):
+    print(f"File: {path}")
+    print(f"Rows: {footer['rows']}, row groups: {footer['num_row_groups']}, leaf columns: {footer['num_leaf_columns']}")
+    print(f"Created by: {footer['created_by']}, footer: {human_bytes(footer['serialized_footer_bytes'])}")
+
+    rows = [rg['rows'] for rg in footer['row_groups']]
+    sizes = [rg['compressed_bytes'] for rg in footer['row_groups']]
+    if rows:
+        print(f"Row group rows: min {min(rows)}, max {max(rows)}; "
+              f"compressed size: min {human_bytes(min(sizes))}, max {human_bytes(max(sizes))}")
+
+    print("\nPER-FAMILY SIZE (footer metadata)")
+    print("-" * 78)
+    print(f"{'family':<12}{'compressed':>14}{'uncompressed':>16}{'ratio':>8}{'share':>8}{'leaf values':>14}")
+    total_compressed = sum(f['compressed_bytes'] for f in footer['families'].values()) or 1
+    for family, f in sorted(footer['families'].items(), key=lambda x: x[1]['compressed_bytes'], reverse=True):
+        ratio = f['uncompressed_bytes'] / f['compressed_bytes'] if f['compressed_bytes'] else 0
+        share = 100.0 * f['compressed_bytes'] / total_compressed
+        print(f"{family:<12}{human_bytes(f['compressed_bytes']):>14}{human_bytes(f['uncompressed_bytes']):>16}"
+              f"{ratio:>8.2f}{share:>7.1f}%{f['leaf_values']:>14}")
+
+    if sample:
+        print(f"\nSAMPLED SCAN ({sample['rows']} rows from row groups {sample['row_groups']})")
+        print("-" * 78)
+        print(f"{'family':<12}{'rows %':>8}{'cells/row':>11}{'p50':>8}{'p90':>8}{'p99':>8}{'max':>9}{'est. cells':>14}")
+        for family, f in sorted(sample['families'].items(), key=lambda x: x[1]['sampled_cells'], reverse=True):
+            pct = f['value_size_percentiles']
+            print(f"{family:<12}{f['rows_with_family_pct']:>7.1f}%{f['cells_per_row_mean']:>11.1f}"
+                  f"{pct.get('p50', 0):>8.0f}{pct.get('p90', 0):>8.0f}{pct.get('p99', 0):>8.0f}"
+                  f"{f['value_size_max']:>9}{f['estimated_total_cells']:>14}")
+        if sample['flat_columns']:
+            print(f"Not sampled (not family columns): {', '.join(sample['flat_columns'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect a Bigtable-shaped Parquet file from its metadata')
+    parser.add_argument('-f', '--file', default='input.parquet', help='Parquet file to inspect')
+    parser.add_argument('--sample', type=int, default=0, help='Decode N evenly spaced row groups for value statistics')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    opts = parser.parse_args()
+
+    parquet_file = pq.ParquetFile(opts.file)
+    footer = footer_report(parquet_file)
+    sample = sample_report(parquet_file, opts.sample) if opts.sample else None
+
+    if opts.json:
+        print(json.dumps({'file': opts.file, 'footer': footer, 'sample': sample}, indent=2))
+    else:
+        print_report(opts.file, footer, sample)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,58 +1,168 @@
 #!/usr/bin/env python3
+import re
+import argparse
+import pyarrow as pa
 import pyarrow.parquet as pq
 
+# Column order the family-per-table ingest binds its INSERT values in
+FAMILY_COLUMNS = ['row_key', 'qualifier', 'timestamp', 'raw_value']
+
+def _is_collection(cql_type):
+    return cql_type.startswith(('list<', 'set<', 'map<', 'tuple<'))
+
+def _frozen(cql_type):
+    # Collections nested inside collections must be frozen in CQL
+    return f"frozen<{cql_type}>" if _is_collection(cql_type) else cql_type
+
 def arrow_to_cql(pa_type):
-    pa_type_str = str(pa_type)
-    if pa_type_str in ['int8', 'int16', 'int32']:
+    """Map an Arrow type to the most compact CQL type, recursing into nested types"""
+    if pa.types.is_dictionary(pa_type):
+        return arrow_to_cql(pa_type.value_type)
+    if pa.types.is_int8(pa_type):
+        return 'tinyint'
+    if pa.types.is_int16(pa_type) or pa.types.is_uint8(pa_type):
+        return 'smallint'
+    if pa.types.is_int32(pa_type) or pa.types.is_uint16(pa_type):
         return 'int'
-    elif pa_type_str == 'int64':
+    if pa.types.is_int64(pa_type) or pa.types.is_uint32(pa_type):
         return 'bigint'
-    elif pa_type_str == 'float32':
+    if pa.types.is_uint64(pa_type):
+        return 'varint'
+    if pa.types.is_float16(pa_type) or pa.types.is_float32(pa_type):
         return 'float'
-    elif pa_type_str == 'float64':
+    if pa.types.is_float64(pa_type):
         return 'double'
-    elif pa_type_str == 'bool':
+    if pa.types.is_decimal(pa_type):
+        return 'decimal'
+    if pa.types.is_boolean(pa_type):
         return 'boolean'
-    elif pa_type_str in ['string', 'utf8']:
+    if pa.types.is_string(pa_type) or pa.types.is_large_string(pa_type):
         return 'text'
-    elif pa_type_str == 'binary':
+    if pa.types.is_binary(pa_type) or pa.types.is_large_binary(pa_type) or pa.types.is_fixed_size_binary(pa_type):
         return 'blob'
-    elif 'timestamp' in pa_type_str:
+    if pa.types.is_timestamp(pa_type):
         return 'timestamp'
-    elif pa_type_str in ['date32', 'date64', 'date']:
+    if pa.types.is_date(pa_type):
         return 'date'
-    else:
-        return 'text'  # default fallback
+    if pa.types.is_time(pa_type):
+        return 'time'
+    if pa.types.is_duration(pa_type):
+        return 'duration'
+    if pa.types.is_list(pa_type) or pa.types.is_large_list(pa_type) or pa.types.is_fixed_size_list(pa_type):
+        return f"list<{_frozen(arrow_to_cql(pa_type.value_type))}>"
+    if pa.types.is_map(pa_type):
+        return f"map<{_frozen(arrow_to_cql(pa_type.key_type))}, {_frozen(arrow_to_cql(pa_type.item_type))}>"
+    if pa.types.is_struct(pa_type):
+        fields = [_frozen(arrow_to_cql(pa_type.field(i).type)) for i in range(pa_type.num_fields)]
+        return f"frozen<tuple<{', '.join(fields)}>>"
+    return 'text'  # default fallback
+
+def bigtable_family_cell_types(pa_type):
+    """
+    If pa_type is a Bigtable export family column,
+        struct<column: list<struct<name, cell: list<struct<timestamp, value>>>>>
+    return the Arrow (qualifier, timestamp, value) types, otherwise None.
+    """
+    if not pa.types.is_struct(pa_type) or pa_type.num_fields != 1 or pa_type.field(0).name != 'column':
+        return None
+    columns = pa_type.field(0).type
+    if not pa.types.is_list(columns) or not pa.types.is_struct(columns.value_type):
+        return None
+    column = columns.value_type
+    names = [column.field(i).name for i in range(column.num_fields)]
+    if 'name' not in names or 'cell' not in names:
+        return None
+    cells = column.field('cell').type
+    if not pa.types.is_list(cells) or not pa.types.is_struct(cells.value_type):
+        return None
+    cell = cells.value_type
+    cell_names = [cell.field(i).name for i in range(cell.num_fields)]
+    if 'timestamp' not in cell_names or 'value' not in cell_names:
+        return None
+    return column.field('name').type, cell.field('timestamp').type, cell.field('value').type
+
+def sanitize_table_name(name):
+    # Cassandra table names must start with a letter and contain only alphanumeric and underscores
+    sanitized = re.sub(r'[^a-zA-Z0-9_]', '_', name)
+    if not sanitized[0].isalpha():
+        sanitized = 'f_' + sanitized
+    return sanitized
+
+def family_table_plan(schema, keyspace, table_prefix='table', compression=''):
+    """
+    Build the family-per-table layout for a Bigtable-shaped schema: the first
+    column is the row key and every other column is one family. Returns a list
+    of dicts with family, table, create, insert and columns (bind order).
+    """
+    row_key_type = arrow_to_cql(schema.field(0).type)
+    plan = []
+    for field in list(schema)[1:]:
+        cell_types = bigtable_family_cell_types(field.type)
+        if cell_types is None:
+            continue
+        qualifier_type, timestamp_type, value_type = (arrow_to_cql(t) for t in cell_types)
+        table = f"{table_prefix}_{sanitize_table_name(field.name)}"
+        with_compression = f"\n    AND compression = {{ {compression} }}" if compression is not None else ""
+        create = (f"CREATE TABLE IF NOT EXISTS {keyspace}.{table} (\n"
+                  f"    row_key {row_key_type},\n"
+                  f"    qualifier {qualifier_type},\n"
+                  f"    timestamp {timestamp_type},\n"
+                  f"    raw_value {value_type},\n"
+                  f"    PRIMARY KEY (row_key, timestamp, qualifier)\n"
+                  f") WITH CLUSTERING ORDER BY (timestamp DESC, qualifier ASC){with_compression};")
+        insert = (f"INSERT INTO {keyspace}.{table} ({', '.join(FAMILY_COLUMNS)}) "
+                  f"VALUES ({', '.join('?' for _ in FAMILY_COLUMNS)})")
+        plan.append({'family': field.name, 'table': table, 'create': create,
+                     'insert': insert, 'columns': list(FAMILY_COLUMNS)})
+    return plan
 
 def generate_scylla_schema(parquet_file_path, table_name, primary_key_cols):
     # Read parquet schema
     schema = pq.read_schema(parquet_file_path)
-    
+
     # Generate columns with mapped CQL types
     columns = []
     for name, pa_type in zip(schema.names, schema.types):
         cql_type = arrow_to_cql(pa_type)
         columns.append(f"\"{name}\" {cql_type}")
-    
+
     # Format primary key, supports composite keys
     if isinstance(primary_key_cols, str):
         primary_key_cols = [primary_key_cols]
-    
+
     #if len(primary_key_cols) == 1:
     #    primary_key = primary_key_cols[0]
     #else:
     primary_key = "(" + ", ".join(primary_key_cols) + ")"
-    
+
     cql = f"CREATE TABLE {table_name} (\n    " + ",\n    ".join(columns) + f",\n    PRIMARY KEY {primary_key}\n);"
     return cql
 
+def generate_insert(table_name, column_names):
+    """Prepared INSERT matching generate_scylla_schema's column order"""
+    quoted = ', '.join(f"\"{name}\"" for name in column_names)
+    return f"INSERT INTO {table_name} ({quoted}) VALUES ({', '.join('?' for _ in column_names)})"
+
 if __name__ == "__main__":
-    parquet_path = "input.parquet"  # Replace with your file path
-    table = "parquet"                 # Desired ScyllaDB table name
-    
-    # Specify your primary key columns here (at least partition key)
-    primary_keys = ["rowkey"]         # Replace with your primary key columns
-    
-    cql_schema = generate_scylla_schema(parquet_path, table, primary_keys)
-    print(cql_schema)
+    parser = argparse.ArgumentParser(description='Generate CQL schema and prepared INSERTs from a Parquet file')
+    parser.add_argument('-f', '--file', default="input.parquet", help='Parquet file to read the schema from')
+    parser.add_argument('-k', '--keyspace', default="moloco_zdic", help='Keyspace for family-per-table output')
+    parser.add_argument('-t', '--table', default="parquet", help='Table name (flat layout) or table prefix (family layout)')
+    parser.add_argument('--pk', default="rowkey", help='Comma-separated primary key columns (flat layout)')
+    parser.add_argument('--flat', action='store_true', help='Always emit one flat table, even for Bigtable-shaped files')
+    opts = parser.parse_args()
 
+    schema = pq.read_schema(opts.file)
+    plan = [] if opts.flat else family_table_plan(schema, opts.keyspace, opts.table, compression=None)
+    if plan:
+        # Bigtable export: one table per column family
+        for entry in plan:
+            print(f"-- family {entry['family']}")
+            print(entry['create'])
+            print(f"-- {entry['insert']}")
+            print(f"-- bind order: {', '.join(entry['columns'])}\n")
+    else:
+        primary_keys = [c.strip() for c in opts.pk.split(',') if c.strip()]
+        print(generate_scylla_schema(opts.file, opts.table, primary_keys))
+        print(f"-- {generate_insert(opts.table, schema.names)}")
+        print(f"-- bind order: {', '.join(schema.names)}")
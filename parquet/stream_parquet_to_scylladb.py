@@ -17,6 +17,7 @@ from cassandra.policies import DCAwareRoundRobinPolicy, TokenAwarePolicy
 from cassandra.auth import PlainTextAuthProvider
 from cassandra import ConsistencyLevel
 from cassandra.concurrent import execute_concurrent_with_args
+from schema_from_parquet import family_table_plan
 
 ## Script args and Help
 parser = argparse.ArgumentParser(add_help=True)
@@ -61,6 +62,8 @@ c = compression[MODE]
 table = "table"
 keyspace = f"moloco_{modes[MODE]}"
 # cql = f"""INSERT INTO {keyspace}.{table} (row_key, family, qualifier, timestamp, raw_value) VALUES (?,?,?,?,?) """
+family_tables = {}        # family -> family_table_plan entry
+family_prepared = {}      # family -> prepared INSERT, prepared once per family
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -123,7 +126,7 @@ class StreamingBigtableProcessor:
                 if self.column_names is None:
                     self.column_names = list(df.columns)
                     logger.info(f"Detected columns: {self.column_names}")
-                    create_tables_by_column_family(self.column_names)
+                    create_tables_by_column_family(self.column_names, parquet_file.schema_arrow)
 
                 for idx, row in df.iterrows():
                     record = row.to_dict()
@@ -177,7 +180,8 @@ class StreamingBigtableProcessor:
         families_in_row = set()  # Track families found in this row
         for family in self.column_names[1:]:
             nested_cell = record.get(family, None)
-            if nested_cell is None:
+            # Families without a table (warned about in create_tables_by_column_family) are skipped
+            if nested_cell is None or family not in family_tables:
                 continue
             families_in_row.add(family)  # Add family to set
             try:
@@ -225,20 +229,16 @@ class StreamingBigtableProcessor:
         rows = self.family_batches[family]
         if not rows:
             return
-        import re
-        def sanitize_table_name(name):
-            sanitized = re.sub(r'[^a-zA-Z0-9_]', '_', name)
-            if not sanitized[0].isalpha():
-                sanitized = 'f_' + sanitized
-            return sanitized
-
         try:
-            sanitized_family = sanitize_table_name(family)
-            table_name = f"{table}_{sanitized_family}"
-            cql_family = f"""INSERT INTO {keyspace}.{table_name} (row_key, qualifier, timestamp, raw_value) VALUES (?,?,?,?) """
-            cql_prepared = session.prepare(cql_family)
-            cql_prepared.consistency_level = ConsistencyLevel.ONE
-            batch_data = [(r['row_key'], r['qualifier'], r['timestamp'], r['raw_value']) for r in rows]
+            entry = family_tables[family]
+            table_name = entry['table']
+            cql_prepared = family_prepared.get(family)
+            if cql_prepared is None:
+                cql_prepared = session.prepare(entry['insert'])
+                cql_prepared.consistency_level = ConsistencyLevel.ONE
+                family_prepared[family] = cql_prepared
+            columns = entry['columns']
+            batch_data = [tuple(r[col] for col in columns) for r in rows]
             execute_concurrent_with_args(
                 session,
                 cql_prepared,
@@ -409,32 +409,23 @@ def main():
         logger.error(f"Streaming processing failed: {e}")
         raise
 
-def create_tables_by_column_family(column_names: List[str]):
+def create_tables_by_column_family(column_names: List[str], schema):
     """Create ScyllaDB tables based on detected column families"""
     if not column_names or len(column_names) < 2:
         raise ValueError("Column names must include at least one family column")
-    import re
-    def sanitize_table_name(name):
-        # Cassandra table names must start with a letter and contain only alphanumeric and underscores
-        sanitized = re.sub(r'[^a-zA-Z0-9_]', '_', name)
-        if not sanitized[0].isalpha():
-            sanitized = 'f_' + sanitized
-        return sanitized
-
-    for family in column_names[1:]:  # Skip first column (row_key)
-        sanitized_family = sanitize_table_name(family)
-        t = f"table_{sanitized_family}"
-        logger.info(f"Creating table {keyspace}.{t} with compression {c}")
-        create_table = f"""CREATE TABLE IF NOT EXISTS {keyspace}.{t}
-            (row_key text, qualifier text, timestamp timestamp, raw_value blob,
-            PRIMARY KEY (row_key, timestamp, qualifier))
-            WITH CLUSTERING ORDER BY (timestamp DESC, qualifier ASC)
-            AND compression = {{ {c} }};
-            """
+
+    # Table layout, CQL types and INSERT column order all come from the Parquet schema
+    for entry in family_table_plan(schema, keyspace, table, compression=c):
+        family_tables[entry['family']] = entry
+        logger.info(f"Creating table {keyspace}.{entry['table']} with compression {c}")
         try:
-            session.execute(create_table)
+            session.execute(entry['create'])
         except Exception as e:
-            logger.error(f"Failed to create table {keyspace}.{t}: {e}")
+            logger.error(f"Failed to create table {keyspace}.{entry['table']}: {e}")
+
+    missing = [family for family in column_names[1:] if family not in family_tables]
+    if missing:
+        logger.warning(f"Columns without the Bigtable family layout are skipped: {missing}")
 
 def get_cluster():
     """Get ScyllaDB cluster connection with optimized settings"""
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+asyncio wrapper around the driver's execute_async.
+
+ResponseFutures complete on the driver's I/O thread; wrap_future hands the
+result to the event loop with call_soon_threadsafe, so coroutines can await
+queries directly. AsyncSession adds an in-flight limit: submit() waits only
+for a free slot and returns immediately, keeping up to max_in_flight requests
+outstanding while the coroutine goes on generating the next rows.
+Latency is taken on the driver thread when the response arrives, so time the
+loop spends busy (e.g. generating the next chunk) before it runs the done
+callback is not counted as request latency.
+
+Usage:
+    async def load(session, prepared, rows):
+        aio = AsyncSession(session, max_in_flight=256)
+        for row in rows:
+            await aio.submit(prepared, row)
+        await aio.drain()
+        rows = await aio.execute(select, (42,))
+"""
+
+import time
+import asyncio
+import threading
+
+from histogram import LatencyHistogram
+
+
+def wrap_future(response_future, loop=None, on_complete=None):
+    """
+    asyncio.Future resolved with the first page of rows (or the error) of a
+    ResponseFuture. on_complete(perf_counter_time) runs on the driver thread
+    as soon as the response arrives, before the loop is notified.
+    """
+    loop = loop or asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def resolve(setter, value):
+        if not future.done():
+            setter(value)
+
+    def completed(setter, value):
+        if on_complete is not None:
+            on_complete(time.perf_counter())
+        loop.call_soon_threadsafe(resolve, setter, value)
+
+    response_future.add_callbacks(
+        lambda rows: completed(future.set_result, rows),
+        lambda exc: completed(future.set_exception, exc))
+    return future
+
+
+class AsyncSession:
+    """Runs statements on the event loop with at most max_in_flight outstanding"""
+
+    def __init__(self, session, max_in_flight=256, stats=None):
+        self.session = session
+        self.max_in_flight = max_in_flight
+        self.stats = stats
+        self.slots = asyncio.Semaphore(max_in_flight)
+        self.latency = LatencyHistogram()
+        # Recorded from the driver thread(s)
+        self.latency_lock = threading.Lock()
+        self.issued = 0
+        self.completed = 0
+        self.failed = 0
+        self.last_error = None
+
+    def _record(self, sent, done):
+        with self.latency_lock:
+            self.latency.record(done - sent)
+
+    def _issue(self, statement, parameters, sent):
+        response_future = self.session.execute_async(statement, parameters)
+        if self.stats is not None:
+            self.stats.track(response_future)
+        return wrap_future(response_future, on_complete=lambda done: self._record(sent, done))
+
+    def _done(self, future):
+        self.completed += 1
+        if future.cancelled() or future.exception() is not None:
+            self.failed += 1
+            self.last_error = None if future.cancelled() else future.exception()
+        self.slots.release()
+
+    async def submit(self, statement, parameters=None):
+        """
+        Start a request once a slot is free; returns its asyncio.Future without
+        waiting for it. If the driver rejects the request up front (e.g. a bind
+        error), the future holds that exception and the slot is freed at once.
+        """
+        await self.slots.acquire()
+        try:
+            future = self._issue(statement, parameters, time.perf_counter())
+        except Exception as e:
+            future = asyncio.get_running_loop().create_future()
+            future.set_exception(e)
+        self.issued += 1
+        future.add_done_callback(self._done)
+        return future
+
+    async def execute(self, statement, parameters=None):
+        """Run a request within the in-flight limit and return its rows"""
+        return await (await self.submit(statement, parameters))
+
+    async def drain(self):
+        """Wait until every submitted request has completed"""
+        for _ in range(self.max_in_flight):
+            await self.slots.acquire()
+        for _ in range(self.max_in_flight):
+            self.slots.release()
+
+    @property
+    def in_flight(self):
+        return self.issued - self.completed
@@ -6,12 +6,16 @@ import datetime
 import random
 import sys
 import argparse
-from faker import Faker
+import json
+import queue
+import threading
 from cassandra.cluster import Cluster, ExecutionProfile, EXEC_PROFILE_DEFAULT
 from cassandra.concurrent import execute_concurrent_with_args
 from cassandra import ConsistencyLevel
 from cassandra.auth import PlainTextAuthProvider
 from cassandra.policies import DCAwareRoundRobinPolicy, TokenAwarePolicy
+from rowgen import RowGenerator
+from histogram import LatencyHistogram
 
 # Constants
 COMPRESSION = "'sstable_compression': 'ZstdWithDictsCompressor'"
@@ -35,6 +39,11 @@ def parse_args():
     parser.add_argument('-b', '--batch_size', type=int, default=2000, help='Batch size for inserts')
     parser.add_argument('--cl', default="LOCAL_QUORUM", help="Consistency Level (ONE, TWO, QUORUM, etc.)")
     parser.add_argument('--dc', default='dc1', help='Local datacenter name for ScyllaDB')
+    parser.add_argument('--fanout', action="store_true", help='Generate each batch once and write it to all tables concurrently')
+    parser.add_argument('--concurrency', type=int, default=100, help='In-flight writes per table (--fanout)')
+    parser.add_argument('--prefetch', type=int, default=4, help='Batches a table writer may fall behind the generator (--fanout)')
+    parser.add_argument('--seed', type=int, default=None, help='Make rows a pure function of (seed, id) (--fanout)')
+    parser.add_argument('--summary_json', default=None, help='Write the per-table fan-out summary to this JSON file')
 
     return parser.parse_args()
 
@@ -92,6 +101,8 @@ def insert_data(session, keyspace, table, tablets, compression, consistency_leve
     cql = f"""INSERT INTO {keyspace}.{table} (id, ssn, imei, os, phonenum, balance, pdate, v1, v2, v3, v4, v5) VALUES (?,?,?,?,?,?,?, ?,?,?,?,?)"""
     prepared = session.prepare(cql)
     prepared.consistency_level = getattr(ConsistencyLevel, consistency_level)
+    # Only the legacy per-row path uses Faker; import it lazily
+    from faker import Faker
     fake = Faker()
 
     logger.info(f'Inserting {row_count} rows with batch size={batch_size}')
@@ -111,6 +122,140 @@ def insert_data(session, keyspace, table, tablets, compression, consistency_leve
 
     logger.info(f'All batches done, total insertion failures: {total_failed}')
 
+class TableWriter:
+    """Writes the shared batches to one table with its own in-flight limit and latency histogram"""
+
+    def __init__(self, session, prepared, table, compression, concurrency, prefetch):
+        self.session = session
+        self.prepared = prepared
+        self.table = table
+        self.compression = compression
+        self.concurrency = concurrency
+        self.batches = queue.Queue(maxsize=max(1, prefetch))
+        self.slots = threading.Semaphore(concurrency)
+        self.lock = threading.Lock()
+        self.latency = LatencyHistogram()
+        self.rows = 0
+        self.failed = 0
+        self.last_error = None
+        self.fatal_error = None
+        self.unissued = 0
+        self.start = None
+        self.finished = None
+        self.thread = threading.Thread(target=self._run, name=f"writer-{table}", daemon=True)
+
+    def _done(self, sent, error=None):
+        latency = time.perf_counter() - sent
+        with self.lock:
+            self.latency.record(latency)
+            if error is None:
+                self.rows += 1
+            else:
+                self.failed += 1
+                self.last_error = error
+        self.slots.release()
+
+    def _write_batch(self, batch):
+        self.unissued = len(batch)
+        for row in batch:
+            self.slots.acquire()
+            self.unissued -= 1
+            sent = time.perf_counter()
+            try:
+                future = self.session.execute_async(self.prepared, row)
+                future.add_callbacks(lambda _, s=sent: self._done(s), lambda exc, s=sent: self._done(s, exc))
+            except Exception as e:
+                self._done(sent, e)
+
+    def _run(self):
+        self.start = time.perf_counter()
+        try:
+            while True:
+                batch = self.batches.get()
+                if batch is None:
+                    break
+                self._write_batch(batch)
+        except Exception as e:
+            self.fatal_error = e
+            logger.error(f"Writer for {self.table} stopped: {e}")
+            with self.lock:
+                self.failed += self.unissued
+            # Keep consuming so the generator never blocks on this writer's full queue
+            while True:
+                batch = self.batches.get()
+                if batch is None:
+                    break
+                with self.lock:
+                    self.failed += len(batch)
+        for _ in range(self.concurrency):
+            self.slots.acquire()
+        self.finished = time.perf_counter()
+
+    def summary(self):
+        seconds = (self.finished or time.perf_counter()) - self.start
+        return {
+            'compression': self.compression,
+            'rows': self.rows,
+            'failed': self.failed,
+            'error': str(self.fatal_error) if self.fatal_error is not None else None,
+            'seconds': seconds,
+            'rows_per_s': self.rows / seconds if seconds else 0.0,
+            'latency': self.latency.summary(),
+        }
+
+def row_payload_bytes(row):
+    # int id, float balance and date are 4 bytes each; ssn, imei, os, phonenum and v1..v5 are text
+    return 12 + sum(len(v.encode('utf-8')) for v in row[1:5] + row[7:])
+
+def insert_data_fanout(session, keyspace, tables, compressions, tablets, consistency_level, row_count,
+                       batch_size, concurrency, prefetch, seed=None):
+    """Generate every batch once and write it to all tables concurrently, one writer thread per table"""
+    writers = []
+    for tbl, comp in zip(tables, compressions):
+        create_schema(session, keyspace, tbl, tablets, comp)
+        cql = f"""INSERT INTO {keyspace}.{tbl} (id, ssn, imei, os, phonenum, balance, pdate, v1, v2, v3, v4, v5) VALUES (?,?,?,?,?,?,?, ?,?,?,?,?)"""
+        prepared = session.prepare(cql)
+        prepared.consistency_level = getattr(ConsistencyLevel, consistency_level)
+        writers.append(TableWriter(session, prepared, tbl, comp, concurrency, prefetch))
+
+    rowgen = RowGenerator(seed=seed, deterministic=seed is not None)
+    logger.info(f'Fan-out: inserting {row_count} rows into {len(tables)} tables with batch size={batch_size}, '
+                f'{concurrency} in flight per table')
+    for writer in writers:
+        writer.thread.start()
+
+    start = time.perf_counter()
+    payload_bytes = 0
+    for batch_num, first in enumerate(range(1, row_count + 1, batch_size), start=1):
+        batch = rowgen.generate(first, min(batch_size, row_count - first + 1))
+        payload_bytes += sum(row_payload_bytes(row) for row in batch)
+        # Blocks only when the slowest table is more than `prefetch` batches behind
+        for writer in writers:
+            writer.batches.put(batch)
+        if batch_num % 10 == 0:
+            logger.info(f'Generated {first + len(batch) - 1}/{row_count} rows; ' +
+                        ', '.join(f"{w.table}={w.rows}" for w in writers))
+    for writer in writers:
+        writer.batches.put(None)
+    for writer in writers:
+        writer.thread.join()
+    elapsed = time.perf_counter() - start
+
+    summary = {'rows': row_count, 'payload_bytes_per_table': payload_bytes, 'seconds': elapsed,
+               'seed': seed, 'tables': {}}
+    logger.info(f'Fan-out done in {elapsed:.1f}s; {payload_bytes / 1024 / 1024:.1f} MB client payload written to each table')
+    for writer in writers:
+        s = summary['tables'][writer.table] = writer.summary()
+        lat = s['latency']
+        logger.info(f"  {writer.table:<18} {s['rows']} rows in {s['seconds']:.1f}s ({s['rows_per_s']:,.0f} rows/s, "
+                    f"{payload_bytes * s['rows'] / max(row_count, 1) / 1024 / 1024 / s['seconds']:.1f} MB/s), failed={s['failed']}, "
+                    f"mean={lat['mean_ms']:.2f}ms p99={lat['p99_ms']:.2f}ms max={lat['max_ms']:.2f}ms")
+        if writer.fatal_error is not None:
+            logger.error(f"  {writer.table}: writer stopped early: {writer.fatal_error}")
+        if writer.last_error is not None:
+            logger.warning(f"  {writer.table}: last error: {writer.last_error}")
+    return summary
+
 opts = parse_args()
 
 def main():
@@ -154,6 +299,14 @@ def main():
             if opts.drop:
                 logger.info(f"Dropping keyspace {opts.keyspace} if exists.")
                 session.execute(f"DROP KEYSPACE IF EXISTS {opts.keyspace};")
+            if opts.fanout:
+                summary = insert_data_fanout(session, opts.keyspace, table, compression, TABLETS, opts.cl,
+                                             opts.row_count, opts.batch_size, opts.concurrency, opts.prefetch, opts.seed)
+                if opts.summary_json:
+                    with open(opts.summary_json, 'w') as f:
+                        json.dump(summary, f, indent=2)
+                    logger.info(f"Summary written to {opts.summary_json}")
+                return
             for n in range(len(table)):
                 tbl=table[n]
                 comp=compression[n]
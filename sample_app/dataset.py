@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Pre-generated myTable datasets in Arrow IPC files.
+
+`generate` writes rows once, in the myTable schema, to an uncompressed Arrow
+IPC file (one record batch per --batch_size rows). Loaders then memory-map the
+file and slice their id ranges out of it, so a benchmark spends its CPU on the
+driver rather than on generating data, and the same dataset can be replayed
+across runs and clusters:
+
+    ./dataset.py generate -o rows.arrow -r 10000000 --seed 42
+    ./dataset.py info rows.arrow
+    ./loader_multithread.py -s node1,node2 --dataset rows.arrow
+
+With --seed the rows are the same ones `loader_multithread.py --seed` would
+write, so `verify_load.py --seed` can check a load made from the file.
+"""
+
+import os
+import time
+import logging
+import argparse
+import datetime
+
+import pyarrow as pa
+
+from rowgen import RowGenerator, COLUMNS
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+logger = logging.getLogger(__name__)
+
+# CQL types of myTable: id int, balance float, pdate date, everything else text
+SCHEMA = pa.schema([
+    ('id', pa.int32()), ('ssn', pa.string()), ('imei', pa.string()), ('os', pa.string()),
+    ('phonenum', pa.string()), ('balance', pa.float32()), ('pdate', pa.date32()),
+    ('v1', pa.string()), ('v2', pa.string()), ('v3', pa.string()), ('v4', pa.string()), ('v5', pa.string()),
+])
+EPOCH = datetime.date(1970, 1, 1)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Generate and inspect memory-mappable myTable datasets')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    gen = commands.add_parser('generate', help='Write rows to an Arrow IPC file')
+    gen.add_argument('-o', '--output', required=True, help='Output file')
+    gen.add_argument('-r', '--row_count', type=int, default=100000, help='Number of rows')
+    gen.add_argument('--start_id', type=int, default=1, help='First id')
+    gen.add_argument('-b', '--batch_size', type=int, default=20000, help='Rows per record batch')
+    gen.add_argument('--seed', type=int, default=None, help='Make every row a pure function of (seed, id), as the seeded loaders do')
+
+    info = commands.add_parser('info', help='Describe a dataset file')
+    info.add_argument('path', help='Dataset file')
+    return parser.parse_args()
+
+
+def rows_to_batch(rows):
+    """RowGenerator tuples -> RecordBatch in SCHEMA"""
+    columns = list(zip(*rows))
+    # pdate is generated as 'YYYY-MM-DD'; date32 stores days since the epoch
+    columns[6] = [(datetime.date.fromisoformat(d) - EPOCH).days for d in columns[6]]
+    arrays = [pa.array(col, type=pa.int32()).cast(field.type) if field.name == 'pdate' else pa.array(col, type=field.type)
+              for col, field in zip(columns, SCHEMA)]
+    return pa.RecordBatch.from_arrays(arrays, schema=SCHEMA)
+
+
+def generate_dataset(path, row_count, start_id=1, batch_size=20000, seed=None):
+    deterministic = seed is not None
+    rowgen = RowGenerator(seed=seed, deterministic=deterministic)
+    metadata = {'first_id': str(start_id), 'rows': str(row_count),
+                'seed': '' if seed is None else str(seed), 'columns': ','.join(COLUMNS)}
+    start = time.perf_counter()
+    with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, SCHEMA.with_metadata(metadata)) as writer:
+        end_id = start_id + row_count - 1
+        for first in range(start_id, end_id + 1, batch_size):
+            count = min(batch_size, end_id - first + 1)
+            writer.write_batch(rows_to_batch(rowgen.generate(first, count)))
+            if (first - start_id) // batch_size % 50 == 49:
+                logger.info(f"Generated {first + count - start_id}/{row_count} rows")
+    elapsed = time.perf_counter() - start
+    logger.info(f"Wrote {row_count} rows (ids {start_id}-{start_id + row_count - 1}) to {path} in {elapsed:.1f}s "
+                f"({row_count / max(elapsed, 1e-9):,.0f} rows/s, {os.path.getsize(path) / 1024 / 1024:.1f} MB)")
+
+
+class DatasetReader:
+    """
+    Memory-mapped, zero-copy view of a dataset file. generate(start_id, count)
+    has the same interface as RowGenerator.generate, so loaders can take rows
+    from either; ids must be contiguous, as `generate` writes them.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.source = pa.memory_map(path, 'r')
+        self.table = pa.ipc.open_file(self.source).read_all()
+        self.rows = self.table.num_rows
+        ids = self.table.column('id')
+        self.first_id = ids[0].as_py() if self.rows else 1
+        if self.rows and ids[self.rows - 1].as_py() != self.first_id + self.rows - 1:
+            raise ValueError(f"{path}: ids are not contiguous from {self.first_id}")
+        metadata = self.table.schema.metadata or {}
+        seed = metadata.get(b'seed', b'').decode()
+        self.seed = int(seed) if seed else None
+
+    @property
+    def last_id(self):
+        return self.first_id + self.rows - 1
+
+    def generate(self, start_id, count):
+        """Rows for ids start_id .. start_id + count - 1, as tuples in COLUMNS order"""
+        offset = start_id - self.first_id
+        if offset < 0 or offset + count > self.rows:
+            raise ValueError(f"ids {start_id}-{start_id + count - 1} are outside {self.path} "
+                             f"({self.first_id}-{self.last_id})")
+        chunk = self.table.slice(offset, count)
+        return list(zip(*(chunk.column(name).to_pylist() for name in COLUMNS)))
+
+    def close(self):
+        self.source.close()
+
+
+def describe(path):
+    dataset = DatasetReader(path)
+    logger.info(f"{path}: {dataset.rows} rows, ids {dataset.first_id}-{dataset.last_id}, "
+                f"{dataset.table.column('id').num_chunks} record batches, {os.path.getsize(path) / 1024 / 1024:.1f} MB, "
+                f"seed {dataset.seed if dataset.seed is not None else 'none (random rows)'}")
+    logger.info(f"schema: {', '.join(f'{f.name} {f.type}' for f in dataset.table.schema)}")
+    if dataset.rows:
+        logger.info(f"first row: {dataset.generate(dataset.first_id, 1)[0]}")
+
+
+def main():
+    opts = parse_args()
+    if opts.command == 'generate':
+        generate_dataset(opts.output, opts.row_count, opts.start_id, opts.batch_size, opts.seed)
+    else:
+        describe(opts.path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Fixed-memory latency histogram with ~1% relative precision.
+
+Values are recorded as integer microseconds into log-linear buckets (HDR
+style: 64 linear sub-buckets per power of two), so recording is O(1),
+memory is a few thousand counters regardless of sample count, and
+histograms from several processes merge exactly by adding counts.
+"""
+
+SUB_BUCKET_BITS = 6
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS          # 64
+LINEAR_LIMIT = SUB_BUCKETS * 2              # values below 128us are exact
+MAX_EXPONENT = 40                           # ~12.7 days in microseconds
+BUCKET_COUNT = LINEAR_LIMIT + MAX_EXPONENT * SUB_BUCKETS
+
+
+def _bucket_index(value):
+    if value < LINEAR_LIMIT:
+        return max(0, value)
+    shift = value.bit_length() - (SUB_BUCKET_BITS + 1)
+    index = LINEAR_LIMIT + (shift - 1) * SUB_BUCKETS + ((value >> shift) - SUB_BUCKETS)
+    return min(index, BUCKET_COUNT - 1)
+
+
+def _bucket_upper(index):
+    """Highest value that maps to bucket `index`"""
+    if index < LINEAR_LIMIT:
+        return index
+    shift = (index - LINEAR_LIMIT) // SUB_BUCKETS + 1
+    mantissa = (index - LINEAR_LIMIT) % SUB_BUCKETS + SUB_BUCKETS
+    return ((mantissa + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    PERCENTILES = [50, 90, 99, 99.9, 99.99]
+
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def record(self, seconds):
+        """Record one latency given in seconds"""
+        self.record_us(int(seconds * 1000000))
+
+    def record_us(self, micros):
+        self.counts[_bucket_index(micros)] += 1
+        self.count += 1
+        self.total += micros
+        if self.min is None or micros < self.min:
+            self.min = micros
+        if micros > self.max:
+            self.max = micros
+
+    def merge(self, other):
+        """Add another histogram (or its to_dict() form) into this one"""
+        if isinstance(other, dict):
+            other = LatencyHistogram.from_dict(other)
+        for i, n in enumerate(other.counts):
+            if n:
+                self.counts[i] += n
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        self.max = max(self.max, other.max)
+        return self
+
+    def percentile_us(self, pct):
+        if not self.count:
+            return 0
+        target = max(1, int(round(pct / 100.0 * self.count + 0.5 - 1e-9)))
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return min(_bucket_upper(i), self.max)
+        return self.max
+
+    def mean_us(self):
+        return self.total / self.count if self.count else 0.0
+
+    def to_dict(self):
+        """Compact picklable/JSON form: only non-empty buckets"""
+        return {'buckets': {i: n for i, n in enumerate(self.counts) if n},
+                'count': self.count, 'total': self.total, 'min': self.min, 'max': self.max}
+
+    @classmethod
+    def from_dict(cls, data):
+        hist = cls()
+        for i, n in data['buckets'].items():
+            hist.counts[int(i)] = n
+        hist.count = data['count']
+        hist.total = data['total']
+        hist.min = data['min']
+        hist.max = data['max']
+        return hist
+
+    def summary(self):
+        """Millisecond summary dict for reports"""
+        result = {'count': self.count, 'mean_ms': self.mean_us() / 1000.0,
+                  'min_ms': (self.min or 0) / 1000.0, 'max_ms': self.max / 1000.0}
+        for pct in self.PERCENTILES:
+            result[f"p{pct:g}_ms"] = self.percentile_us(pct) / 1000.0
+        return result
+
+    def format(self):
+        s = self.summary()
+        return (f"n={s['count']} mean={s['mean_ms']:.2f}ms p50={s['p50_ms']:.2f}ms p90={s['p90_ms']:.2f}ms "
+                f"p99={s['p99_ms']:.2f}ms p99.9={s['p99.9_ms']:.2f}ms max={s['max_ms']:.2f}ms")
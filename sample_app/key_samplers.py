@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Key-popularity distributions for read workloads.
+
+Every sampler draws integer keys in [low, high] a block at a time with NumPy,
+so next_key() is a list pop and sample(n) a single vectorized call:
+
+    uniform                 every key equally likely
+    zipfian[:THETA]         power-law popularity (YCSB), default theta 0.99; popular
+                            keys are scattered over the range rather than clustered at low
+    hotspot[:FRAC[:OPS]]    OPS of the accesses (default 0.8) go to the first FRAC of the
+                            keys (default 0.2), uniformly within each part
+    sequential              low, low+1, ... high, then wraps (a scan); workers interleave
+    latest[:THETA]          zipfian over recency: the most recently written key is the most
+                            popular; callers report writes with advance(key)
+
+Usage:
+    sampler = parse_sampler('zipfian:1.1', 1, row_count)
+    key = sampler.next_key()
+    keys = sampler.sample(50)
+    logger.info(sampler.describe())
+"""
+
+import math
+
+import numpy as np
+
+KEY_DISTRIBUTIONS = "uniform, zipfian[:theta], hotspot[:hot_fraction[:hot_ops]], sequential or latest[:theta]"
+SAMPLER_HELP = f"Key distribution: {KEY_DISTRIBUTIONS}"
+# Keys drawn per refill of the next_key() buffer
+BLOCK = 4096
+# zeta(n, theta) is summed exactly up to here, then approximated by an integral
+ZETA_EXACT_TERMS = 1000000
+
+
+def _zeta(n, theta):
+    """sum(i ** -theta for i in 1..n)"""
+    exact = min(n, ZETA_EXACT_TERMS)
+    total = 0.0
+    for start in range(1, exact + 1, 1 << 20):
+        i = np.arange(start, min(exact, start + (1 << 20) - 1) + 1, dtype=np.float64)
+        total += float(np.sum(i ** -theta))
+    if n > exact:
+        # Euler-Maclaurin: integral from exact to n, plus the end-point correction
+        a, b = float(exact), float(n)
+        total += (b ** (1 - theta) - a ** (1 - theta)) / (1 - theta) + (b ** -theta - a ** -theta) / 2.0
+    return total
+
+
+def _coprime_multiplier(n):
+    """Odd multiplier coprime to n with multiplier * n < 2**63, for an overflow-free affine permutation"""
+    a = min(0x9E3779B1, max(1, (1 << 63) // max(n, 1) - 1)) | 1
+    while math.gcd(a, n) != 1:
+        a -= 2
+    return max(a, 1)
+
+
+class KeySampler:
+    name = 'sampler'
+
+    def __init__(self, low, high, rng=None):
+        if high < low:
+            raise ValueError(f"Empty key range {low}..{high}")
+        self.low = low
+        self.high = high
+        self.count = high - low + 1
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.buffer = []
+
+    def sample(self, n):
+        """n keys as an int64 array"""
+        raise NotImplementedError
+
+    def next_key(self):
+        if not self.buffer:
+            self.buffer = self.sample(BLOCK).tolist()[::-1]
+        return self.buffer.pop()
+
+    def advance(self, key):
+        """Report a written key; only `latest` uses it"""
+
+    def describe(self, n=100000, hot_keys=1000):
+        """Skew seen over n draws: share taken by the hot_keys most drawn keys, and repeats of earlier draws"""
+        _, counts = np.unique(self.sample(n), return_counts=True)
+        top = int(np.sort(counts)[::-1][:hot_keys].sum())
+        # Every draw of a key after its first would hit an unbounded cache
+        repeats = n - len(counts)
+        return (f"{self.name} over {self.low}..{self.high}: {100.0 * top / n:.1f}% of {n} draws go to the "
+                f"{hot_keys} hottest keys, {100.0 * repeats / n:.1f}% repeat an earlier key")
+
+
+class UniformSampler(KeySampler):
+    name = 'uniform'
+
+    def sample(self, n):
+        return self.rng.integers(self.low, self.high + 1, size=n, dtype=np.int64)
+
+
+class ZipfianSampler(KeySampler):
+    """
+    Bounded zipfian over ranks 0..count-1. theta < 1 uses the YCSB (Gray et al.)
+    closed form; theta > 1 uses NumPy's zipf with out-of-range draws redrawn.
+    With scramble, ranks are mapped to keys by an affine permutation.
+    """
+
+    def __init__(self, low, high, theta=0.99, rng=None, scramble=True):
+        super().__init__(low, high, rng)
+        if theta <= 0:
+            raise ValueError("zipfian theta must be > 0")
+        # The closed form divides by 1 - theta
+        self.theta = 0.9999 if theta == 1 else theta
+        self.name = f"zipfian:{theta:g}"
+        self.scramble = scramble
+        self.multiplier = _coprime_multiplier(self.count)
+        self.offset = int(self.rng.integers(0, self.count))
+        if self.theta < 1:
+            self.zetan = _zeta(self.count, self.theta)
+            zeta2 = 1.0 + 0.5 ** self.theta
+            self.alpha = 1.0 / (1.0 - self.theta)
+            # With two keys or fewer every draw falls in the first two ranks and eta is unused
+            self.eta = ((1.0 - (2.0 / self.count) ** (1.0 - self.theta)) / (1.0 - zeta2 / self.zetan)
+                        if self.count > 2 else 0.0)
+
+    def ranks(self, n):
+        if self.theta > 1:
+            ranks = self.rng.zipf(self.theta, size=n) - 1
+            out = ranks >= self.count
+            while out.any():
+                ranks[out] = self.rng.zipf(self.theta, size=int(out.sum())) - 1
+                out = ranks >= self.count
+            return ranks.astype(np.int64)
+        u = self.rng.random(n)
+        uz = u * self.zetan
+        ranks = (self.count * (self.eta * u - self.eta + 1.0) ** self.alpha).astype(np.int64)
+        ranks[uz < 1.0 + 0.5 ** self.theta] = 1
+        ranks[uz < 1.0] = 0
+        return np.minimum(ranks, self.count - 1)
+
+    def sample(self, n):
+        ranks = self.ranks(n)
+        if self.scramble:
+            ranks = (ranks * self.multiplier + self.offset) % self.count
+        return self.low + ranks
+
+
+class HotspotSampler(KeySampler):
+    def __init__(self, low, high, hot_fraction=0.2, hot_ops=0.8, rng=None):
+        super().__init__(low, high, rng)
+        if not 0 < hot_fraction <= 1 or not 0 <= hot_ops <= 1:
+            raise ValueError("hotspot needs 0 < hot_fraction <= 1 and 0 <= hot_ops <= 1")
+        self.hot = max(1, int(self.count * hot_fraction))
+        self.hot_ops = hot_ops
+        self.name = f"hotspot:{hot_fraction:g}:{hot_ops:g}"
+
+    def sample(self, n):
+        hot = self.rng.random(n) < self.hot_ops
+        cold_count = self.count - self.hot
+        keys = self.rng.integers(0, self.hot, size=n, dtype=np.int64)
+        if cold_count > 0:
+            keys[~hot] = self.hot + self.rng.integers(0, cold_count, size=int((~hot).sum()), dtype=np.int64)
+        return self.low + keys
+
+
+class SequentialSampler(KeySampler):
+    """Scan in key order and wrap; worker w of W starts at low + w and steps by W"""
+
+    name = 'sequential'
+
+    def __init__(self, low, high, rng=None, worker_index=0, workers=1):
+        super().__init__(low, high, rng)
+        self.offset = worker_index
+        self.stride = workers
+        self.position = 0
+
+    def sample(self, n):
+        steps = self.offset + (self.position + np.arange(n, dtype=np.int64)) * self.stride
+        self.position += n
+        return self.low + steps % self.count
+
+
+class LatestSampler(KeySampler):
+    """Zipfian distance back from the latest written key (high until advance() is called)"""
+
+    def __init__(self, low, high, theta=0.99, rng=None):
+        super().__init__(low, high, rng)
+        self.recency = ZipfianSampler(0, self.count - 1, theta, self.rng, scramble=False)
+        self.latest = high
+        self.name = f"latest:{theta:g}"
+
+    def advance(self, key):
+        self.latest = key
+
+    def next_key(self):
+        # Buffer recency ranks rather than keys, so advance() applies to the very next draw
+        if not self.buffer:
+            self.buffer = self.recency.ranks(BLOCK).tolist()
+        return self.low + (self.latest - self.low - self.buffer.pop()) % self.count
+
+    def sample(self, n):
+        return self.low + (self.latest - self.low - self.recency.ranks(n)) % self.count
+
+
+def parse_sampler(spec, low, high, rng=None, worker_index=0, workers=1):
+    """'zipfian:1.2' -> ZipfianSampler(low, high, 1.2); see SAMPLER_HELP"""
+    name, *args = (spec or 'uniform').strip().lower().split(':')
+    try:
+        args = [float(a) for a in args]
+    except ValueError:
+        raise ValueError(f"Invalid key distribution '{spec}', expected {KEY_DISTRIBUTIONS}")
+    if name == 'uniform':
+        return UniformSampler(low, high, rng)
+    if name in ('zipfian', 'zipf'):
+        return ZipfianSampler(low, high, *(args[:1] or [0.99]), rng=rng)
+    if name == 'hotspot':
+        return HotspotSampler(low, high, *args[:2], rng=rng)
+    if name in ('sequential', 'seq'):
+        return SequentialSampler(low, high, rng, worker_index, workers)
+    if name == 'latest':
+        return LatestSampler(low, high, *(args[:1] or [0.99]), rng=rng)
+    raise ValueError(f"Unknown key distribution '{spec}', expected {KEY_DISTRIBUTIONS}")
+
+
+if __name__ == "__main__":
+    import time
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Show the skew and sampling speed of a key distribution')
+    parser.add_argument('dist', nargs='+', help=SAMPLER_HELP)
+    parser.add_argument('-r', '--row_count', type=int, default=1000000, help='Keys 1..row_count')
+    parser.add_argument('-n', '--draws', type=int, default=1000000, help='Keys to draw')
+    opts = parser.parse_args()
+    for spec in opts.dist:
+        start = time.perf_counter()
+        sampler = parse_sampler(spec, 1, opts.row_count)
+        setup = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(opts.draws):
+            sampler.next_key()
+        elapsed = time.perf_counter() - start
+        print(f"{sampler.describe()}; setup {setup:.3f}s, next_key {elapsed / opts.draws * 1e9:.0f}ns")
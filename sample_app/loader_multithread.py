@@ -2,15 +2,16 @@
 import logging
 import time
 import datetime
-import random
 import sys
 import argparse
 import os
-from math import ceil
-from faker import Faker
+import queue
+import threading
+from rowgen import RowGenerator
+from shard_stats import ShardStats
+from open_loop import OpenLoopRunner, log_open_loop_result, merge_results
 from multiprocessing import get_context, cpu_count
 from cassandra.cluster import Cluster, ExecutionProfile, EXEC_PROFILE_DEFAULT
-from cassandra.concurrent import execute_concurrent_with_args
 from cassandra import ConsistencyLevel
 from cassandra.auth import PlainTextAuthProvider
 from cassandra.policies import DCAwareRoundRobinPolicy, TokenAwarePolicy
@@ -18,8 +19,14 @@ from cassandra.policies import DCAwareRoundRobinPolicy, TokenAwarePolicy
 # Constants
 COMPRESSION = "'sstable_compression': 'ZstdWithDictsCompressor'"
 TABLETS = "true"
-DATE_FORMAT = '%Y-%m-%d'
 LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+# Imported once by the fork server; forked workers start with them loaded.
+# '__main__' preloads the running script itself. Missing modules are skipped.
+FORKSERVER_PRELOAD = ['__main__', 'numpy', 'faker', 'cassandra.cluster', 'cassandra.policies',
+                      'cassandra.auth', 'rowgen', 'shard_stats', 'open_loop']
+STARTUP_PHASES = ['process', 'imports', 'generator', 'connect', 'prepare']
+# When this module finished loading in the current process; see _startup_phases
+MODULE_LOADED_AT = time.time()
 
 # Logging Setup
 logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
@@ -33,23 +40,24 @@ def parse_args():
     parser.add_argument('-k', '--keyspace', default="mykeyspace", help='Keyspace name')
     parser.add_argument('-d', '--drop', action="store_true", help='Drop keyspace if exists')
     parser.add_argument('-t', '--table', default="myTable", help='Table name')
-    parser.add_argument('-r', '--row_count', type=int, default=100000, help='Number of rows to insert')
+    parser.add_argument('-r', '--row_count', type=int, default=None, help='Number of rows to insert (default 100000, or every row of --dataset)')
     parser.add_argument('-b', '--batch_size', type=int, default=2000, help='Batch size for inserts')
     parser.add_argument('--cl', default="LOCAL_QUORUM", help="Consistency Level (ONE, TWO, QUORUM, etc.)")
     parser.add_argument('--dc', default='dc1', help='Local datacenter name for ScyllaDB')
     parser.add_argument('--workers', type=int, default=0, help='Number of worker processes (0 = cpu_count())')
+    parser.add_argument('--concurrency', type=int, default=100, help='In-flight async writes per worker')
+    parser.add_argument('--prefetch', type=int, default=2, help='Generated chunks queued ahead of the writer in each worker')
+    parser.add_argument('--rate', type=float, default=0, help='Open-loop mode: total target rows/s across all workers (0 = as fast as possible)')
+    parser.add_argument('--range_size', type=int, default=20000, help='Ids per work range handed to a worker on demand')
+    parser.add_argument('--progress_interval', type=float, default=5.0, help='Seconds between aggregate progress reports')
     parser.add_argument('--shard_aware', action="store_true", help='If set, you should pass host:19042 to connect to shard-aware port')
+    parser.add_argument('--seed', type=int, default=None, help='Make every row a pure function of (seed, id) so the load can be verified with verify_load.py')
+    parser.add_argument('--start_method', default='spawn', choices=['spawn', 'forkserver'],
+                        help='How worker processes start; forkserver imports the driver, numpy and faker once and forks workers from it')
+    parser.add_argument('--dataset', default=None, help='Stream rows from a file written by `dataset.py generate` instead of generating them')
+    parser.add_argument('--shard_stats', action="store_true", help='Report connections per shard and request distribution/latency per host and shard')
     return parser.parse_args()
 
-def str_time_prop(start, end, fmt, prop):
-    stime = time.mktime(time.strptime(start, fmt))
-    etime = time.mktime(time.strptime(end, fmt))
-    ptime = stime + prop * (etime - stime)
-    return time.strftime(fmt, time.localtime(ptime))
-
-def random_date(start, end, prop):
-    return str_time_prop(start, end, DATE_FORMAT, prop)
-
 def create_schema(session, keyspace, table, tablets, compression):
     create_ks = f"""
         CREATE KEYSPACE IF NOT EXISTS {keyspace}
@@ -63,26 +71,6 @@ def create_schema(session, keyspace, table, tablets, compression):
     session.execute(create_ks)
     session.execute(create_table)
 
-def generate_row(fake, i):
-    ssn = '-'.join([str(random.randint(100,999)), str(random.randint(10,99)), str(random.randint(1000,9999))])
-    imei = str(random.randint(100000000000000,999999999999999))
-    os_name = random.choice(['Android','iOS','Windows','Samsung','Nokia'])
-    phone = '-'.join([str(random.randint(200,999)), str(random.randint(100,999)), str(random.randint(1000,9999))])
-    bal = round(random.uniform(10.5, 999.5), 2)
-    dat = random_date("2019-01-01", "2019-04-01", random.random())
-    base_string = f"IMEI:{imei}|OS:{os_name}|Phone:{phone}"
-    v = []
-    for _ in range(5):
-        if len(base_string) < 200:
-            sentences = []
-            while sum(len(s) for s in sentences) < 200 - len(base_string):
-                sentences.append(fake.sentence())
-            padding = ' '.join(sentences)[:200 - len(base_string)]
-            v.append(base_string + padding)
-        else:
-            v.append(base_string[:200])
-    return (i, ssn, imei, os_name, phone, bal, dat, *v)
-
 def chunked_ids(start_id, end_id, batch_size):
     i = start_id
     while i <= end_id:
@@ -90,11 +78,22 @@ def chunked_ids(start_id, end_id, batch_size):
         yield (i, j)
         i = j + 1
 
-def _init_worker_rng(worker_index):
-    # Unique seeds per worker for stdlib random and Faker to avoid duplicates
-    seed = int.from_bytes(os.urandom(8), 'little') ^ int(time.time_ns()) ^ worker_index
-    random.seed(seed)
-    Faker.seed(seed)
+def _worker_seed(worker_index):
+    # Unique seed per worker for the row generator to avoid duplicates
+    return int.from_bytes(os.urandom(8), 'little') ^ int(time.time_ns()) ^ worker_index
+
+def _mp_context(start_method):
+    ctx = get_context(start_method)
+    if start_method == 'forkserver':
+        ctx.set_forkserver_preload(FORKSERVER_PRELOAD)
+    return ctx
+
+def _startup_phases(launched_at, entered_at):
+    """Split launch -> worker entry at the moment this module finished loading in the worker"""
+    # A spawned worker re-imports this script, so launch -> load covers interpreter start and
+    # every import; with a preloading fork server it loaded before the launch and counts as 0
+    imports = max(0.0, MODULE_LOADED_AT - launched_at)
+    return {'process': max(0.0, entered_at - launched_at - imports), 'imports': imports}
 
 def _build_cluster_and_session(hosts, username, password, dc, local_loopback, shard_aware=False ):
     # Create fresh Cluster/Session per process, post-fork
@@ -127,7 +126,102 @@ def _build_cluster_and_session(hosts, username, password, dc, local_loopback, sh
     session = cluster.connect()
     return cluster, session
 
-def _worker_insert_range(
+class InflightWriter:
+    """
+    Keeps up to `concurrency` execute_async writes in flight across chunk
+    boundaries; completions are counted from the driver's callback thread.
+    """
+
+    def __init__(self, session, prepared, concurrency, stats=None):
+        self.session = session
+        self.prepared = prepared
+        self.concurrency = concurrency
+        self.stats = stats
+        self.slots = threading.Semaphore(concurrency)
+        self.lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+        self.last_error = None
+
+    def _on_success(self, _):
+        with self.lock:
+            self.completed += 1
+        self.slots.release()
+
+    def _on_error(self, exc):
+        with self.lock:
+            self.completed += 1
+            self.failed += 1
+            self.last_error = exc
+        self.slots.release()
+
+    def submit(self, rows):
+        for row in rows:
+            self.slots.acquire()
+            future = self.session.execute_async(self.prepared, row)
+            if self.stats is not None:
+                self.stats.track(future)
+            future.add_callbacks(self._on_success, self._on_error)
+
+    def counts(self):
+        with self.lock:
+            return self.completed, self.failed
+
+    def drain(self):
+        # Taking every slot means every submitted write has completed
+        for _ in range(self.concurrency):
+            self.slots.acquire()
+        for _ in range(self.concurrency):
+            self.slots.release()
+
+def _produce_chunks(rowgen, range_queue, batch_size, chunk_queue):
+    """Producer thread: generate the next chunks while the current ones are being written"""
+    try:
+        while True:
+            id_range = range_queue.get()
+            if id_range is None:
+                break
+            start_id, end_id = id_range
+            for (s_id, e_id) in chunked_ids(start_id, end_id, batch_size):
+                chunk_queue.put(rowgen.generate(s_id, e_id - s_id + 1))
+        chunk_queue.put(None)
+    except Exception as e:
+        chunk_queue.put(e)
+
+def _open_loop_insert(worker_index, session, prepared, chunk_queue, rate, concurrency, batch_size,
+                      progress_interval, stats, progress_queue):
+    """Issue rows at a fixed per-worker rate, measuring latency from each row's intended start"""
+    def rows():
+        while True:
+            chunk = chunk_queue.get()
+            if chunk is None:
+                return
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield from chunk
+
+    source = rows()
+    reported = [0, 0]
+
+    def issue(i):
+        row = next(source, None)
+        if row is None:
+            return None
+        future = session.execute_async(prepared, row)
+        if stats is not None:
+            stats.track(future)
+        if i % batch_size == 0:
+            completed, errors = runner.completed, runner.errors
+            progress_queue.put(('progress', worker_index, completed - reported[0], errors - reported[1]))
+            reported[:] = [completed, errors]
+        return future
+
+    # Only worker 0 logs schedule lag, to keep log chatter down
+    runner = OpenLoopRunner(issue, rate=rate, max_in_flight=concurrency, report_interval=progress_interval,
+                            logger=logger if worker_index == 0 else None, name=f"worker {worker_index}")
+    return runner, runner.run()
+
+def _worker_insert_ranges(
     worker_index,
     hosts,
     username,
@@ -136,45 +230,167 @@ def _worker_insert_range(
     table,
     dc,
     consistency_level,
-    start_id,
-    end_id,
     batch_size,
     local_loopback,
-    shard_aware
+    shard_aware,
+    concurrency,
+    prefetch,
+    shard_stats,
+    seed,
+    rate,
+    progress_interval,
+    range_queue,
+    progress_queue,
+    dataset=None,
+    launched_at=None
 ):
-    # Per-process RNG
-    _init_worker_rng(worker_index)
-    fake = Faker()
+    entered_at = time.time()
+    startup = _startup_phases(launched_at or entered_at, entered_at)
+    # With a seed rows depend only on (seed, id); otherwise each worker gets its own RNG.
+    # The generator builds its text corpus once per worker. A dataset file is
+    # memory-mapped instead, so the worker only slices rows out of it.
+    if dataset is not None:
+        from dataset import DatasetReader
+        rowgen = DatasetReader(dataset)
+    elif seed is not None:
+        rowgen = RowGenerator(seed=seed, deterministic=True)
+    else:
+        rowgen = RowGenerator(seed=_worker_seed(worker_index))
+    startup['generator'] = time.time() - entered_at
 
-    cluster, session = _build_cluster_and_session(hosts, username, password, dc, local_loopback, shard_aware)
+    writer = None
+    reported_rows = reported_failed = 0
+    cluster = session = None
     try:
+        phase_start = time.time()
+        cluster, session = _build_cluster_and_session(hosts, username, password, dc, local_loopback, shard_aware)
+        startup['connect'] = time.time() - phase_start
         # Prepare statement per worker
+        phase_start = time.time()
         cql = f"""INSERT INTO {keyspace}.{table} (id, ssn, imei, os, phonenum, balance, pdate, v1, v2, v3, v4, v5) VALUES (?,?,?,?,?,?,?, ?,?,?,?,?)"""
         prepared = session.prepare(cql)
         prepared.consistency_level = getattr(ConsistencyLevel, consistency_level)
+        startup['prepare'] = time.time() - phase_start
+        progress_queue.put(('startup', worker_index, startup))
+        stats = ShardStats(cluster) if shard_stats else None
+        writer = InflightWriter(session, prepared, concurrency, stats)
 
-        total = 0
-        total_failed = 0
-        for (s_id, e_id) in chunked_ids(start_id, end_id, batch_size):
-            batch = [generate_row(fake, i) for i in range(s_id, e_id + 1)]
-            results = execute_concurrent_with_args(session, prepared, batch, concurrency=100)
-            failed = sum(1 for (success, _) in results if not success)
-            total += len(batch)
-            total_failed += failed
+        # Generation runs in a producer thread, bounded by `prefetch` chunks, so the
+        # next chunk is built while the previous chunk's writes are still in flight.
+        # Fast workers simply pull more ranges from the shared queue.
+        chunk_queue = queue.Queue(maxsize=max(1, prefetch))
+        producer = threading.Thread(target=_produce_chunks, args=(rowgen, range_queue, batch_size, chunk_queue), daemon=True)
+        producer.start()
+        if rate:
+            runner, result = _open_loop_insert(worker_index, session, prepared, chunk_queue, rate, concurrency,
+                                               batch_size, progress_interval, stats, progress_queue)
+            producer.join()
+            completed, failed, last_error = result['completed'], result['errors'], runner.last_error
+            progress_queue.put(('open_loop', worker_index, result))
+        else:
+            while True:
+                chunk = chunk_queue.get()
+                if chunk is None:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                writer.submit(chunk)
+                completed, failed = writer.counts()
+                progress_queue.put(('progress', worker_index, completed - reported_rows, failed - reported_failed))
+                reported_rows, reported_failed = completed, failed
+            writer.drain()
+            producer.join()
+            completed, failed = writer.counts()
+            last_error = writer.last_error
+        if last_error is not None:
+            logger.warning(f"Worker {worker_index} last write error: {last_error}")
+        if stats is not None:
+            # Pools are fully open by now; one worker's view is representative
             if worker_index == 0:
-                # Reduce log chatter by letting only worker 0 log per-batch
-                logger.info(f'Worker {worker_index} inserted {len(batch)} rows (failed={failed}), id [{s_id}-{e_id}]')
-        return (worker_index, total, total_failed)
+                stats.log_connection_report(logger)
+            progress_queue.put(('shard_stats', worker_index, stats.snapshot()))
+        progress_queue.put(('done', worker_index, completed, failed))
+    except Exception as e:
+        completed, failed = writer.counts() if writer else (0, 0)
+        progress_queue.put(('error', worker_index, completed, failed, str(e)))
     finally:
         try:
-            session.shutdown()
+            if session is not None:
+                session.shutdown()
         except Exception:
             pass
         try:
-            cluster.shutdown()
+            if cluster is not None:
+                cluster.shutdown()
         except Exception:
             pass
 
+def _log_startup_summary(startup_times):
+    """Slowest, median and fastest worker per startup phase"""
+    if not startup_times:
+        return
+    ready = sorted(sum(t.values()) for t in startup_times.values())
+    logger.info(f"Worker startup ({len(ready)} workers): ready after {ready[0]:.2f}s min, "
+                f"{ready[len(ready) // 2]:.2f}s median, {ready[-1]:.2f}s max")
+    for phase in STARTUP_PHASES:
+        values = sorted(t.get(phase, 0.0) for t in startup_times.values())
+        logger.info(f"  {phase:<10} min {values[0]:.2f}s, median {values[len(values) // 2]:.2f}s, max {values[-1]:.2f}s")
+
+def _report_progress(progress_queue, processes, row_count, progress_interval, shard_stats=None, open_loop_results=None,
+                     startup_times=None):
+    """Drain worker progress messages and log aggregate rows/s until every worker has finished"""
+    worker_rows = {w: 0 for w in processes}
+    worker_failed = {w: 0 for w in processes}
+    finished = set()
+    start = last_report = time.time()
+    rows_at_last_report = 0
+
+    while len(finished) < len(processes):
+        try:
+            message = progress_queue.get(timeout=1)
+        except queue.Empty:
+            message = None
+            # A worker that died without reporting would otherwise hang the parent
+            for w, proc in processes.items():
+                if w not in finished and not proc.is_alive() and proc.exitcode not in (None, 0):
+                    logger.error(f"Worker {w} exited with code {proc.exitcode} without reporting")
+                    finished.add(w)
+
+        if message is not None:
+            kind, w = message[0], message[1]
+            if kind == 'progress':
+                worker_rows[w] += message[2]
+                worker_failed[w] += message[3]
+            elif kind == 'shard_stats':
+                if shard_stats is not None:
+                    shard_stats.merge(message[2])
+            elif kind == 'startup':
+                if startup_times is not None:
+                    startup_times[w] = message[2]
+                logger.info(f"Worker {w} ready after {sum(message[2].values()):.2f}s: " +
+                            ', '.join(f"{phase} {message[2].get(phase, 0.0):.2f}s" for phase in STARTUP_PHASES))
+            elif kind == 'open_loop':
+                if open_loop_results is not None:
+                    open_loop_results.append(message[2])
+            else:
+                worker_rows[w], worker_failed[w] = message[2], message[3]
+                finished.add(w)
+                if kind == 'error':
+                    logger.error(f"Worker {w} failed after {message[2]} rows: {message[4]}")
+                else:
+                    logger.info(f"Worker {w} complete: rows={message[2]}, failed={message[3]}")
+
+        now = time.time()
+        if now - last_report >= progress_interval:
+            done = sum(worker_rows.values())
+            logger.info(f"Progress: {done}/{row_count} rows ({100.0 * done / max(row_count, 1):.1f}%), "
+                        f"{(done - rows_at_last_report) / (now - last_report):,.0f} rows/s now, "
+                        f"{done / (now - start):,.0f} rows/s overall, failed={sum(worker_failed.values())}, "
+                        f"active workers={len(processes) - len(finished)}")
+            last_report, rows_at_last_report = now, done
+
+    return worker_rows, worker_failed
+
 def insert_data_parallel(
     hosts,
     username,
@@ -188,7 +404,17 @@ def insert_data_parallel(
     row_count,
     batch_size,
     workers,
-    shard_aware
+    shard_aware,
+    range_size,
+    progress_interval,
+    concurrency,
+    prefetch,
+    shard_stats=False,
+    seed=None,
+    rate=0,
+    dataset=None,
+    first_id=1,
+    start_method='spawn'
 ):
     # One control session in parent to create schema (safe and simple)
     local_loopback = (hosts and hosts[0] == '127.0.0.1')
@@ -205,56 +431,88 @@ def insert_data_parallel(
         except Exception:
             pass
 
-    # Partition id space evenly among workers
     procs = workers if workers > 0 else cpu_count()
     procs = max(1, procs)
-    span = ceil(row_count / procs)
-
-    logger.info(f"Starting {procs} workers, total rows={row_count}, per-worker target≈{span}, batch_size={batch_size}")
-
-    ctx = get_context("spawn")
-    with ctx.Pool(processes=procs) as pool:
-        jobs = []
-        for w in range(procs):
-            start_id = w * span + 1
-            end_id = min((w + 1) * span, row_count)
-            if start_id > end_id:
-                continue
-            jobs.append(pool.apply_async(
-                _worker_insert_range,
-                kwds=dict(
-                    worker_index=w,
-                    hosts=hosts,
-                    username=username,
-                    password=password,
-                    keyspace=keyspace,
-                    table=table,
-                    dc=dc,
-                    consistency_level=consistency_level,
-                    start_id=start_id,
-                    end_id=end_id,
-                    batch_size=batch_size,
-                    local_loopback=local_loopback,
-                    shard_aware=shard_aware
-                )
-            ))
-        pool.close()
-        pool.join()
-
-    total_rows = 0
-    total_failed = 0
-    for j in jobs:
-        w_idx, cnt, failed = j.get()
-        total_rows += cnt
-        total_failed += failed
-        logger.info(f"Worker {w_idx} complete: rows={cnt}, failed={failed}")
+    range_size = max(batch_size, range_size)
+
+    ctx = _mp_context(start_method)
+    # Small id ranges handed out on demand, followed by one stop sentinel per worker
+    range_queue = ctx.Queue()
+    progress_queue = ctx.Queue()
+    ranges = list(chunked_ids(first_id, first_id + row_count - 1, range_size))
+    for id_range in ranges:
+        range_queue.put(id_range)
+    for _ in range(procs):
+        range_queue.put(None)
+
+    logger.info(f"Starting {procs} workers ({start_method}), total rows={row_count}, {len(ranges)} ranges of {range_size} rows, batch_size={batch_size}, in-flight/worker={concurrency}")
 
+    processes = {}
+    for w in range(procs):
+        proc = ctx.Process(
+            target=_worker_insert_ranges,
+            kwargs=dict(
+                worker_index=w,
+                hosts=hosts,
+                username=username,
+                password=password,
+                keyspace=keyspace,
+                table=table,
+                dc=dc,
+                consistency_level=consistency_level,
+                batch_size=batch_size,
+                local_loopback=local_loopback,
+                shard_aware=shard_aware,
+                concurrency=concurrency,
+                prefetch=prefetch,
+                shard_stats=shard_stats,
+                seed=seed,
+                rate=rate / procs if rate else 0,
+                progress_interval=progress_interval,
+                range_queue=range_queue,
+                progress_queue=progress_queue,
+                dataset=dataset,
+                launched_at=time.time()
+            )
+        )
+        proc.start()
+        processes[w] = proc
+
+    stats = ShardStats(None) if shard_stats else None
+    open_loop_results = []
+    startup_times = {}
+    worker_rows, worker_failed = _report_progress(progress_queue, processes, row_count, progress_interval, stats, open_loop_results,
+                                                  startup_times)
+    for proc in processes.values():
+        proc.join()
+
+    total_rows = sum(worker_rows.values())
+    total_failed = sum(worker_failed.values())
     logger.info(f"All workers done: inserted={total_rows}, failures={total_failed}")
+    _log_startup_summary(startup_times)
+    if open_loop_results:
+        log_open_loop_result(logger, merge_results(open_loop_results, name=f"insert @ {rate:,.0f}/s"))
+    if stats is not None:
+        stats.log_request_report(logger)
 
 def main():
     opts = parse_args()
     hosts = [h.strip() for h in opts.hosts.split(',') if h.strip()]
 
+    first_id = 1
+    if opts.dataset:
+        from dataset import DatasetReader
+        data = DatasetReader(opts.dataset)
+        first_id = data.first_id
+        if opts.row_count is None or opts.row_count > data.rows:
+            opts.row_count = data.rows
+        if opts.seed is not None and opts.seed != data.seed:
+            logger.warning(f"--seed {opts.seed} is ignored; rows come from {opts.dataset} (seed {data.seed})")
+        logger.info(f"Dataset: {opts.dataset}, ids {data.first_id}-{data.last_id}")
+        data.close()
+    elif opts.row_count is None:
+        opts.row_count = 100000
+
     logger.info(f"Connecting to cluster: {hosts} with user {opts.username}")
     logger.info(f"Using keyspace: {opts.keyspace}, table: {opts.table}")
     logger.info(f"Local DC: {opts.dc}")
@@ -293,7 +551,17 @@ def main():
             row_count=opts.row_count,
             batch_size=opts.batch_size,
             workers=opts.workers,
-            shard_aware=opts.shard_aware
+            shard_aware=opts.shard_aware,
+            range_size=opts.range_size,
+            progress_interval=opts.progress_interval,
+            concurrency=opts.concurrency,
+            prefetch=opts.prefetch,
+            shard_stats=opts.shard_stats,
+            seed=opts.seed,
+            rate=opts.rate,
+            dataset=opts.dataset,
+            first_id=first_id,
+            start_method=opts.start_method
         )
         elapsed = datetime.datetime.now() - start_time
         logger.info(f"Total insertion time: {elapsed}")
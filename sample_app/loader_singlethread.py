@@ -3,10 +3,12 @@
 import logging
 import time
 import datetime
-import random
 import sys
 import argparse
-from faker import Faker
+import asyncio
+from rowgen import RowGenerator
+from shard_stats import ShardStats
+from aio_cql import AsyncSession
 from cassandra.cluster import Cluster, ExecutionProfile, EXEC_PROFILE_DEFAULT
 from cassandra.concurrent import execute_concurrent_with_args
 from cassandra import ConsistencyLevel
@@ -16,7 +18,6 @@ from cassandra.policies import DCAwareRoundRobinPolicy, TokenAwarePolicy
 # Constants
 COMPRESSION = "'sstable_compression': 'ZstdWithDictsCompressor'"
 TABLETS = "true"
-DATE_FORMAT = '%Y-%m-%d'
 LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
 
 # Logging Setup
@@ -35,19 +36,13 @@ def parse_args():
     parser.add_argument('-b', '--batch_size', type=int, default=2000, help='Batch size for inserts')
     parser.add_argument('--cl', default="LOCAL_QUORUM", help="Consistency Level (ONE, TWO, QUORUM, etc.)")
     parser.add_argument('--dc', default='dc1', help='Local datacenter name for ScyllaDB')
+    parser.add_argument('--seed', type=int, default=None, help='Make every row a pure function of (seed, id) so the load can be verified with verify_load.py')
+    parser.add_argument('--shard_stats', action="store_true", help='Report connections per shard and request distribution per host and shard')
+    parser.add_argument('--asyncio', action="store_true", help='Keep --concurrency writes in flight continuously from an asyncio loop instead of one execute_concurrent call per batch')
+    parser.add_argument('--concurrency', type=int, default=256, help='In-flight writes in --asyncio mode')
 
     return parser.parse_args()
 
-def str_time_prop(start, end, fmt, prop):
-    """Return a time at a proportion of a range of two formatted times."""
-    stime = time.mktime(time.strptime(start, fmt))
-    etime = time.mktime(time.strptime(end, fmt))
-    ptime = stime + prop * (etime - stime)
-    return time.strftime(fmt, time.localtime(ptime))
-
-def random_date(start, end, prop):
-    return str_time_prop(start, end, DATE_FORMAT, prop)
-
 def create_schema(session, keyspace, table, tablets, compression):
     logger.info("Creating keyspace and table (if not exists).")
     create_ks = f"""
@@ -62,37 +57,18 @@ def create_schema(session, keyspace, table, tablets, compression):
     session.execute(create_ks)
     session.execute(create_table)
 
-def generate_row(fake, i):
-    ssn = '-'.join([str(random.randint(100,999)), str(random.randint(10,99)), str(random.randint(1000,9999))])
-    imei = str(random.randint(100000000000000,999999999999999))
-    os = random.choice(['Android','iOS','Windows','Samsung','Nokia'])
-    phone = '-'.join([str(random.randint(200,999)), str(random.randint(100,999)), str(random.randint(1000,9999))])
-    bal = round(random.uniform(10.5, 999.5), 2)
-    dat = random_date("2019-01-01", "2019-04-01", random.random())
-    base_string = f"IMEI:{imei}|OS:{os}|Phone:{phone}"
-    v = []
-    for _ in range(5):
-        if len(base_string) < 200:
-            sentences = []
-            while sum(len(s) for s in sentences) < 200 - len(base_string):
-                sentences.append(fake.sentence())
-            padding = ' '.join(sentences)[:200 - len(base_string)]
-            v.append(base_string + padding)
-        else:
-            v.append(base_string[:200])
-    return (i, ssn, imei, os, phone, bal, dat, *v)
-
 def chunked(iterable, batch_size):
     """Yield successive chunk_size-sized chunks from iterable."""
     for i in range(0, len(iterable), batch_size):
         yield iterable[i:i + batch_size]
 
-def insert_data(session, keyspace, table, tablets, compression, consistency_level, row_count, batch_size):
+def insert_data(session, keyspace, table, tablets, compression, consistency_level, row_count, batch_size, shard_stats=False, seed=None):
     create_schema(session, keyspace, table, tablets, compression)
     cql = f"""INSERT INTO {keyspace}.{table} (id, ssn, imei, os, phonenum, balance, pdate, v1, v2, v3, v4, v5) VALUES (?,?,?,?,?,?,?, ?,?,?,?,?)"""
     prepared = session.prepare(cql)
     prepared.consistency_level = getattr(ConsistencyLevel, consistency_level)
-    fake = Faker()
+    rowgen = RowGenerator(seed=seed, deterministic=seed is not None)
+    stats = ShardStats(session.cluster) if shard_stats else None
 
     logger.info(f'Inserting {row_count} rows with batch size={batch_size}')
 
@@ -102,14 +78,63 @@ def insert_data(session, keyspace, table, tablets, compression, consistency_leve
         end_idx = min(batch_num * batch_size, row_count)
         if start_idx > row_count:
             break
-        batch = [generate_row(fake, i) for i in range(start_idx, end_idx + 1)]
+        batch = rowgen.generate(start_idx, end_idx - start_idx + 1)
         results = execute_concurrent_with_args(session, prepared, batch, concurrency=100)
         failed = sum(1 for (success, _) in results if not success)
+        if stats is not None:
+            # Per-request latency is not exposed by execute_concurrent; count placement only
+            for (success, result) in results:
+                if success:
+                    stats.record(result.response_future)
         now = datetime.datetime.now()
         logger.info('Batch %d: %d rows, %d failures at %s' % (batch_num, len(batch), failed, now.strftime('%Y-%m-%d %H:%M:%S')))
         total_failed += failed
 
     logger.info(f'All batches done, total insertion failures: {total_failed}')
+    if stats is not None:
+        stats.log_connection_report(logger)
+        stats.log_request_report(logger)
+
+async def _insert_rows_async(session, prepared, rowgen, row_count, batch_size, concurrency, stats):
+    aio = AsyncSession(session, concurrency, stats)
+    start = time.perf_counter()
+    last_report = start
+    reported = 0
+    for batch_num, first in enumerate(range(1, row_count + 1, batch_size), start=1):
+        # Generation runs on the loop between submissions while earlier writes are still in flight
+        batch = rowgen.generate(first, min(batch_size, row_count - first + 1))
+        for row in batch:
+            await aio.submit(prepared, row)
+        now = time.perf_counter()
+        logger.info('Batch %d: %d rows submitted, %d completed, %d failures, %d in flight, %.0f rows/s'
+                    % (batch_num, len(batch), aio.completed, aio.failed, aio.in_flight,
+                       (aio.completed - reported) / max(now - last_report, 1e-9)))
+        last_report, reported = now, aio.completed
+    await aio.drain()
+    elapsed = time.perf_counter() - start
+    written = aio.completed - aio.failed
+    logger.info(f'Wrote {written} rows in {elapsed:.1f}s ({written / max(elapsed, 1e-9):,.0f} rows/s), '
+                f'{aio.failed} failed, {concurrency} in flight: {aio.latency.format()}')
+    if aio.last_error is not None:
+        logger.warning(f'Last write error: {aio.last_error}')
+    return aio.failed
+
+def insert_data_async(session, keyspace, table, tablets, compression, consistency_level, row_count, batch_size,
+                      concurrency, shard_stats=False, seed=None):
+    """Single-process loader that keeps `concurrency` writes in flight from one asyncio loop"""
+    create_schema(session, keyspace, table, tablets, compression)
+    cql = f"""INSERT INTO {keyspace}.{table} (id, ssn, imei, os, phonenum, balance, pdate, v1, v2, v3, v4, v5) VALUES (?,?,?,?,?,?,?, ?,?,?,?,?)"""
+    prepared = session.prepare(cql)
+    prepared.consistency_level = getattr(ConsistencyLevel, consistency_level)
+    rowgen = RowGenerator(seed=seed, deterministic=seed is not None)
+    stats = ShardStats(session.cluster) if shard_stats else None
+
+    logger.info(f'Inserting {row_count} rows with asyncio, {concurrency} in flight, generating {batch_size} rows at a time')
+    total_failed = asyncio.run(_insert_rows_async(session, prepared, rowgen, row_count, batch_size, concurrency, stats))
+    logger.info(f'All batches done, total insertion failures: {total_failed}')
+    if stats is not None:
+        stats.log_connection_report(logger)
+        stats.log_request_report(logger)
 
 def main():
     opts = parse_args()
@@ -144,16 +169,33 @@ def main():
                 logger.info(f"Dropping keyspace {opts.keyspace} if exists.")
                 session.execute(f"DROP KEYSPACE IF EXISTS {opts.keyspace};")
             start_time = datetime.datetime.now()
-            insert_data(
-                session,
-                opts.keyspace,
-                opts.table,
-                TABLETS,
-                COMPRESSION,
-                opts.cl,
-                opts.row_count,
-                opts.batch_size
-            )
+            if opts.asyncio:
+                insert_data_async(
+                    session,
+                    opts.keyspace,
+                    opts.table,
+                    TABLETS,
+                    COMPRESSION,
+                    opts.cl,
+                    opts.row_count,
+                    opts.batch_size,
+                    opts.concurrency,
+                    opts.shard_stats,
+                    opts.seed
+                )
+            else:
+                insert_data(
+                    session,
+                    opts.keyspace,
+                    opts.table,
+                    TABLETS,
+                    COMPRESSION,
+                    opts.cl,
+                    opts.row_count,
+                    opts.batch_size,
+                    opts.shard_stats,
+                    opts.seed
+                )
             elapsed = datetime.datetime.now() - start_time
             logger.info(f"Total insertion time: {elapsed}")
     except Exception as e:
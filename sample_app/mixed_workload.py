@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Mixed read/write workload over the id-keyed myTable schema, like
+cassandra-stress `ops(insert=1,select=1)`.
+
+Each worker process draws weighted operations (insert, select, update,
+delete) against ids 1..row_count, picked by --key_dist, and runs them
+asynchronously through OpenLoopRunner: at a fixed total --rate split across
+workers (latency from intended start), or closed-loop with --concurrency
+operations in flight per worker. Throughput and latency histograms are reported per operation type,
+so read latency stays visible while writes run alongside.
+
+With --cache, selects go through a per-worker read-through cache (like one
+per application instance) that the worker's own inserts, updates and deletes
+invalidate, both when they are issued and when they complete, so a select
+racing the write cannot leave the old row cached. Other workers' writes never
+invalidate this worker's cache; set --cache_ttl to bound that staleness.
+Selects are reported as hit and miss, and only misses reach the cluster.
+
+Usage:
+    ./mixed_workload.py -s node1,node2 --ops insert=1,select=3 --rate 20000 --duration 300
+    ./mixed_workload.py -s node1 --ops select=8,update=1,delete=0.1 --workers 4 --seed 42
+    ./mixed_workload.py -s node1 --ops insert=1,select=4 --key_dist latest:0.99
+    ./mixed_workload.py -s node1 --ops select=9,update=1 --key_dist zipfian --cache tinylfu --cache_entries 50000
+"""
+
+import sys
+import time
+import queue
+import logging
+import argparse
+from multiprocessing import get_context, cpu_count
+
+import numpy as np
+from cassandra import ConsistencyLevel
+
+from rowgen import RowGenerator, COLUMNS
+from open_loop import OpenLoopRunner, log_open_loop_result, merge_results
+from key_samplers import parse_sampler, SAMPLER_HELP
+from row_cache import CachedResult, add_cache_args, cache_from_opts, log_cache_stats, merge_cache_stats
+from loader_multithread import _build_cluster_and_session, _worker_seed, create_schema, COMPRESSION, TABLETS
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+logger = logging.getLogger(__name__)
+
+OPERATIONS = ['insert', 'select', 'update', 'delete']
+# Operations drawn per numpy call; op choices are drawn in blocks
+DRAW_BLOCK = 4096
+# Inserts write this many consecutive ids from one generated chunk
+INSERT_CHUNK = 256
+
+
+def parse_ops(spec):
+    """'insert=1,select=3' -> {'insert': 1.0, 'select': 3.0}"""
+    weights = {}
+    for part in spec.split(','):
+        name, _, weight = part.strip().partition('=')
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Unknown operation '{name}', expected one of {', '.join(OPERATIONS)}")
+        try:
+            weights[name] = float(weight or 1)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Invalid weight in '{part}'")
+    if not weights or sum(weights.values()) <= 0:
+        raise argparse.ArgumentTypeError("At least one operation needs a positive weight")
+    return weights
+
+
+def parse_key_dist(spec):
+    """Validate a --key_dist spec; workers build their own sampler from it"""
+    try:
+        parse_sampler(spec, 1, 2)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return spec
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Weighted mixed read/write workload for myTable')
+    parser.add_argument('-s', '--hosts', default="127.0.0.1", help='Comma-separated ScyllaDB node Names or IPs')
+    parser.add_argument('-u', '--username', default="cassandra", help='Cassandra username')
+    parser.add_argument('-p', '--password', default="cassandra", help='Cassandra password')
+    parser.add_argument('-k', '--keyspace', default="mykeyspace", help='Keyspace name')
+    parser.add_argument('-t', '--table', default="myTable", help='Table name')
+    parser.add_argument('-r', '--row_count', type=int, default=100000, help='Id space the operations draw from (1..row_count)')
+    parser.add_argument('--ops', type=parse_ops, default=parse_ops('insert=1,select=1'),
+                        help='Operation weights, e.g. insert=1,select=3,update=1,delete=0.1')
+    parser.add_argument('--key_dist', type=parse_key_dist, default='uniform',
+                        help=SAMPLER_HELP + '; applies to select, update and delete ids, and latest follows the inserts')
+    parser.add_argument('--duration', type=float, default=60, help='Run time in seconds')
+    parser.add_argument('--warmup', type=float, default=0, help='Seconds at the start excluded from the histograms')
+    parser.add_argument('--rate', type=float, default=0, help='Total target ops/s across workers (0 = closed-loop)')
+    parser.add_argument('--concurrency', type=int, default=200, help='Maximum in-flight operations per worker')
+    parser.add_argument('--seed', type=int, default=None, help='Insert rows as a pure function of (seed, id), as the seeded loaders do')
+    parser.add_argument('--cl', default="LOCAL_QUORUM", help="Consistency Level (ONE, TWO, QUORUM, etc.)")
+    parser.add_argument('--dc', default='dc1', help='Local datacenter name for ScyllaDB')
+    parser.add_argument('--workers', type=int, default=0, help='Number of worker processes (0 = cpu_count())')
+    parser.add_argument('--shard_aware', action="store_true", help='If set, you should pass host:19042 to connect to shard-aware port')
+    add_cache_args(parser)
+    parser.add_argument('--progress_interval', type=float, default=5.0, help='Seconds between progress reports (worker 0)')
+    return parser.parse_args()
+
+
+class MixedOperations:
+    """Turns operation numbers into async requests; issue(i) is OpenLoopRunner's callback"""
+
+    def __init__(self, session, keyspace, table, consistency_level, weights, row_count, rowgen, rng, keys, cache=None):
+        self.session = session
+        self.row_count = row_count
+        self.rowgen = rowgen
+        self.rng = rng
+        self.keys = keys
+        self.cache = cache
+        self.labels = [op for op in OPERATIONS if weights.get(op, 0) > 0]
+        p = np.array([weights[op] for op in self.labels], dtype=np.float64)
+        self.probabilities = p / p.sum()
+        self.ops_block = []
+        self.insert_rows = []
+
+        statements = {
+            'insert': f"INSERT INTO {keyspace}.{table} ({', '.join(COLUMNS)}) VALUES ({', '.join('?' for _ in COLUMNS)})",
+            'select': f"SELECT * FROM {keyspace}.{table} WHERE id = ?",
+            'update': f"UPDATE {keyspace}.{table} SET balance = ?, phonenum = ? WHERE id = ?",
+            'delete': f"DELETE FROM {keyspace}.{table} WHERE id = ?",
+        }
+        self.prepared = {}
+        for label in self.labels:
+            prepared = session.prepare(statements[label])
+            prepared.consistency_level = getattr(ConsistencyLevel, consistency_level)
+            self.prepared[label] = prepared
+
+    def _refill(self):
+        self.ops_block = self.rng.choice(len(self.labels), size=DRAW_BLOCK, p=self.probabilities).tolist()
+
+    def _next_insert_row(self):
+        if not self.insert_rows:
+            start = int(self.rng.integers(1, max(2, self.row_count - INSERT_CHUNK + 2)))
+            count = min(INSERT_CHUNK, self.row_count - start + 1)
+            self.insert_rows = self.rowgen.generate(start, count)[::-1]
+        return self.insert_rows.pop()
+
+    def issue(self, i):
+        if not self.ops_block:
+            self._refill()
+        label = self.labels[self.ops_block.pop()]
+        if label == 'insert':
+            values = self._next_insert_row()
+            row_id = values[0]
+            self.keys.advance(row_id)
+        elif label == 'update':
+            row_id = self.keys.next_key()
+            values = (round(float(self.rng.uniform(10.5, 999.5)), 2),
+                      f"{self.rng.integers(200, 1000)}-{self.rng.integers(100, 1000)}-{self.rng.integers(1000, 10000)}",
+                      row_id)
+        else:
+            row_id = self.keys.next_key()
+            values = (row_id,)
+        if self.cache is None:
+            return label, self.session.execute_async(self.prepared[label], values)
+        if label != 'select':
+            self.cache.invalidate(row_id)
+            future = self.session.execute_async(self.prepared[label], values)
+            # A select issued before the write was applied may have reserved or filled the old row since
+            future.add_callbacks(lambda _: self.cache.invalidate(row_id), lambda _: self.cache.invalidate(row_id))
+            return label, future
+        rows = self.cache.get(row_id)
+        if rows is not None:
+            return 'hit', CachedResult(rows)
+        token = self.cache.reserve(row_id)
+        future = self.session.execute_async(self.prepared[label], values)
+        future.add_callbacks(lambda rows: self.cache.fill(row_id, rows, token),
+                             lambda _: self.cache.cancel(row_id, token))
+        return 'miss', future
+
+
+def _worker_run(worker_index, workers, opts, hosts, local_loopback, rate, result_queue):
+    cluster = session = None
+    try:
+        seed = opts.seed if opts.seed is not None else _worker_seed(worker_index)
+        rowgen = RowGenerator(seed=seed, deterministic=opts.seed is not None)
+        rng = np.random.default_rng(_worker_seed(worker_index))
+        cluster, session = _build_cluster_and_session(hosts, opts.username, opts.password, opts.dc, local_loopback, opts.shard_aware)
+        keys = parse_sampler(opts.key_dist, 1, opts.row_count, rng, worker_index, workers)
+        cache = cache_from_opts(opts)
+        ops = MixedOperations(session, opts.keyspace, opts.table, opts.cl, opts.ops, opts.row_count, rowgen, rng, keys, cache)
+        runner = OpenLoopRunner(ops.issue, rate=rate, duration=opts.duration, max_in_flight=opts.concurrency,
+                                warmup=opts.warmup, report_interval=opts.progress_interval,
+                                logger=logger if worker_index == 0 else None, name=f"worker {worker_index}")
+        result = runner.run()
+        if runner.last_error is not None:
+            logger.warning(f"Worker {worker_index} last error: {runner.last_error}")
+        if cache is not None:
+            result['cache'] = cache.stats()
+        result_queue.put(('done', worker_index, result))
+    except Exception as e:
+        result_queue.put(('error', worker_index, str(e)))
+    finally:
+        try:
+            if session is not None:
+                session.shutdown()
+        except Exception:
+            pass
+        try:
+            if cluster is not None:
+                cluster.shutdown()
+        except Exception:
+            pass
+
+
+def run_mixed(opts, hosts):
+    local_loopback = (hosts and hosts[0] == '127.0.0.1')
+    if 'insert' in opts.ops:
+        ctrl_cluster, ctrl_session = _build_cluster_and_session(hosts, opts.username, opts.password, opts.dc, local_loopback, opts.shard_aware)
+        try:
+            create_schema(ctrl_session, opts.keyspace, opts.table, TABLETS, COMPRESSION)
+        finally:
+            ctrl_cluster.shutdown()
+
+    procs = max(1, opts.workers if opts.workers > 0 else cpu_count())
+    rate = opts.rate / procs if opts.rate else 0
+    mix = ', '.join(f"{op}={w:g}" for op, w in opts.ops.items())
+    logger.info(f"Starting {procs} workers for {opts.duration:.0f}s: ops {mix}, {opts.key_dist} ids 1..{opts.row_count}, "
+                + (f"{opts.rate:,.0f} ops/s open-loop" if opts.rate else f"closed-loop with {opts.concurrency} in flight/worker"))
+
+    ctx = get_context("spawn")
+    result_queue = ctx.Queue()
+    processes = {}
+    for w in range(procs):
+        proc = ctx.Process(target=_worker_run, args=(w, procs, opts, hosts, local_loopback, rate, result_queue))
+        proc.start()
+        processes[w] = proc
+
+    results = []
+    pending = set(processes)
+    while pending:
+        try:
+            kind, w, payload = result_queue.get(timeout=1)
+        except queue.Empty:
+            for w, proc in processes.items():
+                if w in pending and not proc.is_alive() and proc.exitcode not in (None, 0):
+                    logger.error(f"Worker {w} exited with code {proc.exitcode} without reporting")
+                    pending.discard(w)
+            continue
+        pending.discard(w)
+        if kind == 'error':
+            logger.error(f"Worker {w} failed: {payload}")
+        else:
+            results.append(payload)
+    for proc in processes.values():
+        proc.join()
+
+    if results:
+        log_open_loop_result(logger, merge_results(results, name='mixed'))
+        if any('cache' in r for r in results):
+            log_cache_stats(logger, merge_cache_stats([r['cache'] for r in results if 'cache' in r]))
+    return results
+
+
+def main():
+    opts = parse_args()
+    hosts = [h.strip() for h in opts.hosts.split(',') if h.strip()]
+    start = time.time()
+    results = run_mixed(opts, hosts)
+    logger.info(f"Total run time: {time.time() - start:.1f}s")
+    sys.exit(0 if results else 1)
+
+
+if __name__ == "__main__":
+    main()
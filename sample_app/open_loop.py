@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Open-loop, fixed-rate operation scheduler (cassandra-stress `fixed=N/s` style).
+
+Operation i has an intended start time derived from the target rate, and is
+issued as soon as that time arrives, regardless of how many earlier
+operations are still running. Latency is measured from the intended start
+time, so time spent waiting behind a slow client or server (coordinated
+omission) is included; service time (actual send to completion) is kept
+separately for comparison.
+
+The rate may be a constant or a function of elapsed seconds, which lets
+callers shape load (ramps, sine waves, bursts) with the same engine. A rate
+of None/0 runs the same machinery closed-loop. Operations may carry a label
+(insert, select, ...) to get per-operation histograms.
+
+Usage:
+    def issue(i):
+        return session.execute_async(prepared, (random_id(),))   # None stops the run
+
+    runner = OpenLoopRunner(issue, rate=5000, duration=60, logger=logger)
+    result = runner.run()
+    logger.info(runner.corrected.format())
+
+    # 1000/s at night, 5000/s at the daily peak, compressed into 10 minutes
+    runner = OpenLoopRunner(issue, rate=shaped_rate('sine', 1000, 5000, period=600))
+"""
+
+import math
+import time
+import threading
+
+from histogram import LatencyHistogram
+
+# Below this lag behind schedule the client is considered on time
+DEFAULT_BEHIND_THRESHOLD = 0.010
+SPIN_THRESHOLD = 0.0005
+RATE_SHAPES = ['constant', 'ramp', 'sine', 'burst']
+
+
+def shaped_rate(shape, rate, peak_rate=None, period=60.0, burst_duration=5.0):
+    """
+    rate(elapsed_seconds) for OpenLoopRunner:
+      constant  rate
+      ramp      rate rising linearly to peak_rate over `period` seconds, then flat
+      sine      rate at the start of every `period`, peak_rate half way through (diurnal)
+      burst     peak_rate for the first `burst_duration` seconds of every `period`, rate otherwise
+    """
+    peak = rate if peak_rate is None else peak_rate
+    if shape == 'constant':
+        return lambda _elapsed: rate
+    if shape == 'ramp':
+        return lambda elapsed: rate + (peak - rate) * min(1.0, elapsed / period)
+    if shape == 'sine':
+        return lambda elapsed: rate + (peak - rate) * (1.0 - math.cos(2.0 * math.pi * elapsed / period)) / 2.0
+    if shape == 'burst':
+        return lambda elapsed: peak if elapsed % period < burst_duration else rate
+    raise ValueError(f"Unknown rate shape '{shape}', expected one of {', '.join(RATE_SHAPES)}")
+
+
+class OpenLoopRunner:
+    def __init__(self, issue, rate, duration=None, max_in_flight=1000, warmup=0.0,
+                 report_interval=5.0, behind_threshold=DEFAULT_BEHIND_THRESHOLD, logger=None, name='ops'):
+        """
+        issue(i) must start operation i asynchronously and return its
+        ResponseFuture, or a (label, ResponseFuture) pair to also keep
+        per-operation-type histograms; None means there is nothing left to issue.
+        rate is ops/s, either a number or a callable rate(elapsed_seconds);
+        None or 0 runs closed-loop (issue whenever fewer than max_in_flight
+        operations are outstanding, latency = service time).
+        Operations intended to start within `warmup` seconds are not recorded.
+        """
+        self.issue = issue
+        self.closed_loop = not rate
+        self.rate = rate if callable(rate) else (lambda _elapsed, r=float(rate or 0): r)
+        self.duration = duration
+        self.max_in_flight = max_in_flight
+        self.warmup = warmup
+        self.report_interval = report_interval
+        self.behind_threshold = behind_threshold
+        self.logger = logger
+        self.name = name
+
+        self.slots = threading.Semaphore(max_in_flight)
+        self.lock = threading.Lock()
+        self.corrected = LatencyHistogram()   # intended start -> completion
+        self.service = LatencyHistogram()     # actual send -> completion
+        self.ops = {}                         # label -> per-operation counters and histograms
+        self.issued = 0
+        self.completed = 0
+        self.errors = 0
+        self.last_error = None
+        self.max_lag = 0.0
+        self.behind_seconds = 0.0
+
+    def _op(self, label):
+        op = self.ops.get(label)
+        if op is None:
+            op = self.ops[label] = {'issued': 0, 'errors': 0,
+                                    'corrected': LatencyHistogram(), 'service': LatencyHistogram()}
+        return op
+
+    def _complete(self, label, intended, sent, error=None):
+        done = time.perf_counter()
+        with self.lock:
+            self.completed += 1
+            op = self._op(label) if label is not None else None
+            if error is not None:
+                self.errors += 1
+                self.last_error = error
+                if op is not None:
+                    op['errors'] += 1
+            if intended - self.start >= self.warmup:
+                self.corrected.record(done - intended)
+                self.service.record(done - sent)
+                if op is not None:
+                    op['corrected'].record(done - intended)
+                    op['service'].record(done - sent)
+        self.slots.release()
+
+    def _next_interval(self, elapsed):
+        rate = self.rate(elapsed)
+        # A zero rate pauses issuing; poll the rate function again shortly
+        return 1.0 / rate if rate > 0 else None
+
+    def _issue_one(self, intended):
+        """Issue operation number self.issued; returns False once the source is exhausted"""
+        self.slots.acquire()
+        sent = time.perf_counter()
+        if self.closed_loop:
+            intended = sent
+        issued = self.issue(self.issued)
+        if issued is None:
+            self.slots.release()
+            return False
+        label, future = issued if isinstance(issued, tuple) else (None, issued)
+        if label is not None:
+            with self.lock:
+                self._op(label)['issued'] += 1
+        future.add_callbacks(
+            lambda _, l=label, i=intended, s=sent: self._complete(l, i, s),
+            lambda exc, l=label, i=intended, s=sent: self._complete(l, i, s, exc))
+        self.issued += 1
+        lag = sent - intended
+        if lag > self.max_lag:
+            self.max_lag = lag
+        return True
+
+    def run(self):
+        self.start = time.perf_counter()
+        end = self.start + self.duration if self.duration else None
+        intended = self.start
+        last_report = self.start
+        issued_at_last_report = 0
+        exhausted = False
+
+        while not exhausted:
+            now = time.perf_counter()
+            if self.closed_loop:
+                if end is not None and now >= end:
+                    break
+                exhausted = not self._issue_one(now)
+                intended = time.perf_counter()
+            else:
+                if end is not None and intended >= end:
+                    break
+                # Issue everything whose intended start time has passed
+                while intended <= now:
+                    if not self._issue_one(intended):
+                        exhausted = True
+                        break
+                    lag = time.perf_counter() - intended
+                    step = self._next_interval(intended - self.start)
+                    while step is None:
+                        time.sleep(0.01)
+                        intended = max(intended, time.perf_counter())
+                        step = self._next_interval(intended - self.start)
+                    intended += step
+                    if lag > self.behind_threshold:
+                        self.behind_seconds += step
+                    if end is not None and intended >= end:
+                        break
+
+            now = time.perf_counter()
+            if self.logger and now - last_report >= self.report_interval:
+                self._log_progress(now, last_report, issued_at_last_report, intended)
+                last_report, issued_at_last_report = now, self.issued
+
+            if not self.closed_loop:
+                wait = intended - time.perf_counter()
+                if wait > SPIN_THRESHOLD:
+                    time.sleep(wait - SPIN_THRESHOLD / 2)
+
+        # Wait for every issued operation to complete
+        for _ in range(self.max_in_flight):
+            self.slots.acquire()
+        for _ in range(self.max_in_flight):
+            self.slots.release()
+        return self.result()
+
+    def _log_progress(self, now, last_report, issued_at_last_report, intended):
+        lag = 0.0 if self.closed_loop else max(0.0, now - intended)
+        with self.lock:
+            in_flight = self.issued - self.completed
+            p99 = self.corrected.percentile_us(99) / 1000.0
+            per_op = ', '.join(f"{label} p99 {op['corrected'].percentile_us(99) / 1000.0:.2f}ms"
+                               for label, op in sorted(self.ops.items()))
+        achieved = (self.issued - issued_at_last_report) / (now - last_report)
+        target = 'closed-loop' if self.closed_loop else f"target {self.rate(now - self.start):,.0f}/s"
+        self.logger.info(f"[{self.name}] {target}, achieved {achieved:,.0f}/s, in-flight {in_flight}, "
+                         f"lag {lag * 1000:.1f}ms, p99 {p99:.2f}ms, errors {self.errors}"
+                         + (f" ({per_op})" if per_op else ""))
+        if lag > self.behind_threshold:
+            self.logger.warning(f"[{self.name}] client is {lag * 1000:.1f}ms behind schedule "
+                                f"(in-flight limit {self.max_in_flight}, or not enough client CPU); "
+                                f"latencies include the backlog")
+
+    def result(self):
+        elapsed = time.perf_counter() - self.start
+        with self.lock:
+            return {
+                'name': self.name,
+                'closed_loop': self.closed_loop,
+                'elapsed': elapsed,
+                'issued': self.issued,
+                'completed': self.completed,
+                'errors': self.errors,
+                'achieved_rate': self.issued / elapsed if elapsed else 0.0,
+                'max_lag_ms': self.max_lag * 1000.0,
+                'behind_seconds': self.behind_seconds,
+                'corrected': self.corrected.to_dict(),
+                'service': self.service.to_dict(),
+                'ops': {label: {'issued': op['issued'], 'errors': op['errors'],
+                                'corrected': op['corrected'].to_dict(), 'service': op['service'].to_dict()}
+                        for label, op in self.ops.items()},
+            }
+
+
+def log_open_loop_result(logger, result):
+    """Log a result() dict (or several merged by merge_results)"""
+    corrected = LatencyHistogram.from_dict(result['corrected'])
+    service = LatencyHistogram.from_dict(result['service'])
+    logger.info(f"[{result['name']}] issued {result['issued']} in {result['elapsed']:.1f}s "
+                f"({result['achieved_rate']:,.0f}/s), errors {result['errors']}, max lag {result['max_lag_ms']:.1f}ms, "
+                f"{result['behind_seconds']:.1f}s of schedule issued late")
+    if result.get('closed_loop'):
+        logger.info(f"[{result['name']}] latency (closed-loop):        {service.format()}")
+    else:
+        logger.info(f"[{result['name']}] latency from intended start: {corrected.format()}")
+        logger.info(f"[{result['name']}] service time:               {service.format()}")
+    for label, op in sorted(result.get('ops', {}).items()):
+        hist = LatencyHistogram.from_dict(op['service' if result.get('closed_loop') else 'corrected'])
+        rate = op['issued'] / result['elapsed'] if result['elapsed'] else 0.0
+        logger.info(f"[{result['name']}]   {label:<8} {op['issued']} ops ({rate:,.0f}/s), errors {op['errors']}: {hist.format()}")
+    if result['behind_seconds'] > 0:
+        logger.warning(f"[{result['name']}] client fell behind the target rate; "
+                       f"compare corrected and service percentiles to see the queueing delay")
+
+
+def merge_results(results, name=None):
+    """Combine per-process result() dicts into one"""
+    corrected = LatencyHistogram()
+    service = LatencyHistogram()
+    ops = {}
+    merged = {'name': name or (results[0]['name'] if results else 'ops'),
+              'closed_loop': bool(results) and all(r.get('closed_loop') for r in results),
+              'elapsed': 0.0, 'issued': 0, 'completed': 0, 'errors': 0, 'achieved_rate': 0.0,
+              'max_lag_ms': 0.0, 'behind_seconds': 0.0}
+    for r in results:
+        corrected.merge(r['corrected'])
+        service.merge(r['service'])
+        merged['elapsed'] = max(merged['elapsed'], r['elapsed'])
+        for key in ('issued', 'completed', 'errors', 'achieved_rate'):
+            merged[key] += r[key]
+        merged['max_lag_ms'] = max(merged['max_lag_ms'], r['max_lag_ms'])
+        merged['behind_seconds'] = max(merged['behind_seconds'], r['behind_seconds'])
+        for label, op in r.get('ops', {}).items():
+            m = ops.setdefault(label, {'issued': 0, 'errors': 0,
+                                       'corrected': LatencyHistogram(), 'service': LatencyHistogram()})
+            m['issued'] += op['issued']
+            m['errors'] += op['errors']
+            m['corrected'].merge(op['corrected'])
+            m['service'].merge(op['service'])
+    merged['corrected'] = corrected.to_dict()
+    merged['service'] = service.to_dict()
+    merged['ops'] = {label: dict(m, corrected=m['corrected'].to_dict(), service=m['service'].to_dict())
+                     for label, m in ops.items()}
+    return merged
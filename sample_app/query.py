@@ -3,10 +3,11 @@
 
 import time
 import logging
-import random
 import sys
 import argparse
+import queue
 from asyncio import sleep
+from multiprocessing import get_context, cpu_count
 from datetime import datetime, timedelta
 from cassandra.cluster import Cluster
 from cassandra import ConsistencyLevel
@@ -14,6 +15,13 @@ from cassandra.concurrent import execute_concurrent_with_args
 from cassandra.auth import PlainTextAuthProvider
 from cassandra.cluster import Cluster, ExecutionProfile, EXEC_PROFILE_DEFAULT
 from cassandra.policies import DCAwareRoundRobinPolicy, TokenAwarePolicy, RoundRobinPolicy
+from shard_stats import ShardStats
+from rowgen import RowGenerator
+from verify_load import compare_row
+from open_loop import OpenLoopRunner, log_open_loop_result, merge_results
+from key_samplers import parse_sampler, SAMPLER_HELP
+from histogram import LatencyHistogram
+from row_cache import CachedResult, add_cache_args, cache_from_opts, log_cache_stats, merge_cache_stats
 
 parser = argparse.ArgumentParser(description='ScyllaDB table query script')
 parser.add_argument('-s', '--hosts', default="127.0.0.1", help='Comma-separated ScyllaDB node Names or IPs')
@@ -26,6 +34,17 @@ parser.add_argument('--cl', dest="consistency_level", default="LOCAL_QUORUM", he
 parser.add_argument('--dc', dest='local_datacenter', default='dc1', help='Local datacenter name for ScyllaDB')
 parser.add_argument('--minutes', type=int, default=60, help='How long to run (minutes)')
 parser.add_argument('--interval', type=float, default=1.0, help='Delay between queries (seconds)')
+parser.add_argument('--rate', type=float, default=0, help='Open-loop mode: issue queries at this fixed rate (queries/s) instead of sleeping --interval')
+parser.add_argument('--max_in_flight', type=int, default=1000, help='Open-loop mode: maximum outstanding queries')
+parser.add_argument('--verify_seed', type=int, default=None, help='Check each returned row against the row generated from (seed, id) by a seeded load')
+parser.add_argument('--benchmark', action="store_true", help='Benchmark mode: --readers concurrent async readers per process, no per-query logging, throughput and latency percentiles')
+parser.add_argument('--readers', type=int, default=64, help='Benchmark mode: concurrent readers (queries in flight) per process')
+parser.add_argument('--duration', type=float, default=None, help='Benchmark mode: run time in seconds (default --minutes)')
+parser.add_argument('--warmup', type=float, default=0, help='Benchmark mode: seconds at the start excluded from the statistics')
+parser.add_argument('--processes', type=int, default=1, help='Benchmark mode: reader processes (0 = cpu_count())')
+parser.add_argument('--key_dist', default='uniform', help=SAMPLER_HELP + ' (e.g. zipfian:0.99, hotspot:0.2:0.8)')
+parser.add_argument('--shard_stats', action="store_true", help='Report connections per shard and query distribution/latency per host and shard')
+add_cache_args(parser)
 # parser.add_argument('--dc', dest='local_dc', default='GCE_US_WEST_1', help='Local datacenter name for ScyllaDB')
 opts = parser.parse_args()
 
@@ -46,12 +65,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-logger.info(f"Connecting to cluster: {hosts} with user {opts.username}")
-logger.info(f"Using keyspace: {opts.keyspace}, table: {opts.table}")
-logger.info(f"Local DC: {opts.local_datacenter}")
-logger.info(f"Using consistency level: {opts.consistency_level}") 
-logger.info(f"Row count to insert: {opts.row_count}") 
-
 class TableQueryRunner:
     def __init__(self, hosts, keyspace, table, username, password):
         self.hosts = hosts
@@ -59,6 +72,14 @@ class TableQueryRunner:
         self.table = table
         self.query_count = 0
         self.error_count = 0
+        self.shard_stats = None
+        self.verify_gen = RowGenerator(seed=opts.verify_seed, deterministic=True) if opts.verify_seed is not None else None
+        self.verified_count = 0
+        self.mismatch_count = 0
+        self.keys = parse_sampler(opts.key_dist, 1, row_count)
+        self.cache = cache_from_opts(opts)
+        self.hit_latency = LatencyHistogram()
+        self.miss_latency = LatencyHistogram()
         try:
             if hosts == ['127.0.0.1']:
                 profile = ExecutionProfile(load_balancing_policy=RoundRobinPolicy(), request_timeout=30)
@@ -77,6 +98,8 @@ class TableQueryRunner:
 
             self.session = self.cluster.connect()
             self.session.set_keyspace(self.keyspace)
+            if opts.shard_stats:
+                self.shard_stats = ShardStats(self.cluster)
             logger.info(f"Connected to cluster: {self.hosts}")
             logger.info(f"Using keyspace: {self.keyspace}, table: {self.table}")
             logger.info(f"Authentication successful for user: {username}, password: {'*' * len(password)}")
@@ -105,12 +128,32 @@ class TableQueryRunner:
             return False
         try:
             # query = random.choice(self.prepared_queries)
-            id=random.randint(1, row_count)
+            id=self.keys.next_key()
             query = self.prepared_queries[0]
-            result = self.session.execute(query, (id,))
-            rows = list(result)
-            self.query_count += 1
-            logger.info("Query #%d executed successfully, returned %d rows", self.query_count, len(rows))
+            start = time.perf_counter()
+            rows = self.cache.get(id) if self.cache is not None else None
+            if rows is not None:
+                self.hit_latency.record(time.perf_counter() - start)
+                self.query_count += 1
+                logger.info("Query #%d served from cache, %d rows", self.query_count, len(rows))
+            else:
+                token = self.cache.reserve(id) if self.cache is not None else None
+                try:
+                    result = self.session.execute(query, (id,))
+                    rows = list(result)
+                except Exception:
+                    if self.cache is not None:
+                        self.cache.cancel(id, token)
+                    raise
+                if self.shard_stats is not None:
+                    self.shard_stats.record(result.response_future, time.perf_counter() - start)
+                if self.cache is not None:
+                    self.cache.fill(id, rows, token)
+                    self.miss_latency.record(time.perf_counter() - start)
+                self.query_count += 1
+                logger.info("Query #%d executed successfully, returned %d rows", self.query_count, len(rows))
+            if self.verify_gen is not None:
+                self.verify_row(id, rows)
             if rows:
                 logger.info("Row sample: %s, %s", rows[0].id, rows[0].ssn)
             else:
@@ -121,6 +164,14 @@ class TableQueryRunner:
             logger.error(f"Query #{self.query_count + 1} failed: {e}")
             return False
 
+    def verify_row(self, id, rows):
+        expected = self.verify_gen.generate(id, 1)[0]
+        mismatched = compare_row(expected, rows[0]) if rows else ['missing']
+        self.verified_count += 1
+        if mismatched:
+            self.mismatch_count += 1
+            logger.warning(f"Row {id} does not match seed {opts.verify_seed}: {', '.join(mismatched)}")
+
     def run_for_duration(self, duration_minutes=10, query_interval_seconds=1):
         logger.info(f"Starting query runner for {duration_minutes} minutes...")
         start_time = datetime.now()
@@ -141,17 +192,172 @@ class TableQueryRunner:
         logger.info(f"Failed queries: {self.error_count}")
         logger.info(f"Success rate: {success_rate:.2f}%")
         logger.info(f"Average queries per second: {self.query_count / total_time.total_seconds():.2f}")
+        if self.verify_gen is not None:
+            logger.info(f"Verified rows: {self.verified_count}, mismatched: {self.mismatch_count}")
+        if self.cache is not None:
+            log_cache_stats(logger, self.cache.stats())
+            logger.info(f"[cache] hit latency:  {self.hit_latency.format()}")
+            logger.info(f"[cache] miss latency: {self.miss_latency.format()}")
+        if self.shard_stats is not None:
+            self.shard_stats.log_connection_report(logger)
+            self.shard_stats.log_request_report(logger)
+
+    def run_open_loop(self, rate, duration_minutes=10, max_in_flight=1000):
+        """Fixed-rate queries; latency is measured from each query's intended start time"""
+        logger.info(f"Starting open-loop query runner at {rate:,.0f} queries/s for {duration_minutes} minutes...")
+        self.prepare_queries()
+        if not self.prepared_queries:
+            logger.error("No prepared queries available")
+            return
+        runner = OpenLoopRunner(self.issue_select, rate=rate, duration=duration_minutes * 60, max_in_flight=max_in_flight,
+                                logger=logger, name='select')
+        result = runner.run()
+        self.query_count = result['completed']
+        self.error_count = result['errors']
+        logger.info("=== Final Statistics ===")
+        log_open_loop_result(logger, result)
+        if runner.last_error is not None:
+            logger.warning(f"Last query error: {runner.last_error}")
+        if self.cache is not None:
+            log_cache_stats(logger, self.cache.stats())
+        if self.shard_stats is not None:
+            self.shard_stats.log_connection_report(logger)
+            self.shard_stats.log_request_report(logger)
+
+    def issue_select(self, i):
+        """OpenLoopRunner callback: start one async point query; with a cache, labelled hit or miss"""
+        id = self.keys.next_key()
+        if self.cache is not None:
+            rows = self.cache.get(id)
+            if rows is not None:
+                return 'hit', CachedResult(rows)
+            token = self.cache.reserve(id)
+        try:
+            future = self.session.execute_async(self.prepared_queries[0], (id,))
+        except Exception:
+            if self.cache is not None:
+                self.cache.cancel(id, token)
+            raise
+        if self.shard_stats is not None:
+            self.shard_stats.track(future)
+        if self.cache is None:
+            return future
+        # Registered before OpenLoopRunner's callbacks, so the row is cached when the miss completes
+        future.add_callbacks(lambda rows: self.cache.fill(id, rows, token), lambda _: self.cache.cancel(id, token))
+        return 'miss', future
+
+    def run_benchmark(self, readers, duration, warmup=0.0, rate=0, worker_index=0, workers=1):
+        """
+        Closed-loop with `readers` queries in flight (or open-loop at `rate`),
+        no per-query logging; returns OpenLoopRunner's result dict.
+        """
+        self.prepare_queries()
+        if not self.prepared_queries:
+            raise RuntimeError("No prepared queries available")
+        # Sequential scans are interleaved across the reader processes
+        self.keys = parse_sampler(opts.key_dist, 1, row_count, worker_index=worker_index, workers=workers)
+        runner = OpenLoopRunner(self.issue_select, rate=rate, duration=duration, max_in_flight=readers, warmup=warmup,
+                                report_interval=10.0, logger=logger if worker_index == 0 else None,
+                                name=f"reader {worker_index}")
+        result = runner.run()
+        self.query_count = result['completed']
+        self.error_count = result['errors']
+        if runner.last_error is not None:
+            logger.warning(f"Reader {worker_index} last query error: {runner.last_error}")
+        if self.cache is not None:
+            result['cache'] = self.cache.stats()
+        return result
 
     def close(self):
         if self.cluster:
             self.cluster.shutdown()
             logger.info("Database connection closed")
 
+def _benchmark_worker(worker_index, workers, readers, duration, warmup, rate, result_queue):
+    runner = None
+    try:
+        runner = TableQueryRunner(hosts, keyspace, table, username, password)
+        result = runner.run_benchmark(readers, duration, warmup, rate, worker_index, workers)
+        stats = runner.shard_stats.snapshot() if runner.shard_stats is not None else None
+        result_queue.put(('done', worker_index, result, stats))
+    except Exception as e:
+        result_queue.put(('error', worker_index, str(e), None))
+    finally:
+        if runner is not None:
+            runner.close()
+
+def run_benchmark_processes(processes, readers, duration, warmup, rate):
+    """Benchmark mode over several processes; results and shard stats are merged in the parent"""
+    procs = max(1, processes if processes > 0 else cpu_count())
+    logger.info(f"Benchmark: {procs} processes x {readers} readers for {duration:.0f}s (warm-up {warmup:.0f}s), "
+                + (f"{rate:,.0f} queries/s open-loop" if rate else "closed-loop") + f", {opts.key_dist} ids 1..{row_count}")
+    ctx = get_context("spawn")
+    result_queue = ctx.Queue()
+    workers = {}
+    for w in range(procs):
+        proc = ctx.Process(target=_benchmark_worker, args=(w, procs, readers, duration, warmup, rate / procs if rate else 0, result_queue))
+        proc.start()
+        workers[w] = proc
+
+    results = []
+    stats = ShardStats(None) if opts.shard_stats else None
+    pending = set(workers)
+    while pending:
+        try:
+            kind, w, payload, snapshot = result_queue.get(timeout=1)
+        except queue.Empty:
+            for w, proc in workers.items():
+                if w in pending and not proc.is_alive() and proc.exitcode not in (None, 0):
+                    logger.error(f"Reader process {w} exited with code {proc.exitcode} without reporting")
+                    pending.discard(w)
+            continue
+        pending.discard(w)
+        if kind == 'error':
+            logger.error(f"Reader process {w} failed: {payload}")
+            continue
+        results.append(payload)
+        if stats is not None and snapshot is not None:
+            stats.merge(snapshot)
+    for proc in workers.values():
+        proc.join()
+
+    logger.info("=== Benchmark Results ===")
+    if results:
+        log_open_loop_result(logger, merge_results(results, name='select'))
+        if any('cache' in r for r in results):
+            log_cache_stats(logger, merge_cache_stats([r['cache'] for r in results if 'cache' in r]))
+    if stats is not None:
+        stats.log_request_report(logger)
+    return results
+
 def main():
+    logger.info(f"Connecting to cluster: {hosts} with user {opts.username}")
+    logger.info(f"Using keyspace: {opts.keyspace}, table: {opts.table}")
+    logger.info(f"Local DC: {opts.local_datacenter}")
+    logger.info(f"Using consistency level: {opts.consistency_level}")
+    logger.info(f"Row count to insert: {opts.row_count}")
+    try:
+        logger.info(f"Key distribution: {parse_sampler(opts.key_dist, 1, row_count).describe()}")
+        cache_from_opts(opts)
+    except ValueError as e:
+        logger.error(str(e))
+        sys.exit(1)
+    if opts.benchmark:
+        duration = opts.duration if opts.duration is not None else opts.minutes * 60
+        try:
+            results = run_benchmark_processes(opts.processes, opts.readers, duration, opts.warmup, opts.rate)
+        except KeyboardInterrupt:
+            logger.info("Script interrupted by user")
+            results = []
+        sys.exit(0 if results else 1)
+
     runner = TableQueryRunner(hosts, keyspace, table, username, password)
     try:
-        runner.run_for_duration(duration_minutes=opts.minutes,
-                                query_interval_seconds=opts.interval)
+        if opts.rate:
+            runner.run_open_loop(opts.rate, duration_minutes=opts.minutes, max_in_flight=opts.max_in_flight)
+        else:
+            runner.run_for_duration(duration_minutes=opts.minutes,
+                                    query_interval_seconds=opts.interval)
     except KeyboardInterrupt:
         logger.info("Script interrupted by user")
     except Exception as e:
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Local stub of the Scylla REST API endpoints used by storage_harvest.py.
+
+Serves a fake cluster with one URL prefix per node (/{node}/storage_service/...),
+so storage_harvest.py runs unchanged with --base_url 'http://127.0.0.1:PORT/{node}'.
+Every call is recorded. Flush, compaction and retrain_dict return nothing;
+estimate_compression_ratios and the disk-space metrics return canned JSON.
+
+--check runs StorageHarvester against an in-process stub and verifies the
+step order (flush, then one retrain, then compaction on every node) and the
+report math, including that a seed given as a host name is not counted next
+to its address and that per-replica figures are withheld when only part of
+the cluster was queried.
+
+Usage:
+    ./rest_stub.py --port 18080 --nodes 10.0.0.1,10.0.0.2,10.0.0.3
+    ./rest_stub.py --check
+"""
+
+import sys
+import json
+import logging
+import argparse
+import threading
+import urllib.parse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from storage_harvest import StorageHarvester, build_clients, STEPS
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+logger = logging.getLogger(__name__)
+
+DEFAULT_NODES = ['10.0.0.1', '10.0.0.2', '10.0.0.3']
+# Host names served as another name for a node, like -s node1 for a node gossip lists by IP
+DEFAULT_ALIASES = {'stub-seed.invalid': '10.0.0.1'}
+# Live bytes per node; total is live plus 10% not yet compacted away
+DEFAULT_LIVE_BYTES = {'comp_w_none': 3000000, 'comp_w_zstd_dict': 600000, 'comp_w_zstd': 900000, 'comp_w_lz4c': 1500000}
+CANNED_ESTIMATES = [
+    {'level': 1, 'chunk_length_in_kb': 4, 'dict': 'none', 'sstable_compression': 'ZstdWithDictsCompressor', 'ratio': 0.41},
+    {'level': 1, 'chunk_length_in_kb': 4, 'dict': 'past', 'sstable_compression': 'ZstdWithDictsCompressor', 'ratio': 0.22},
+    {'level': 1, 'chunk_length_in_kb': 4, 'dict': 'future', 'sstable_compression': 'ZstdWithDictsCompressor', 'ratio': 0.20},
+]
+ROUTES = {
+    ('GET', 'gossiper/endpoint/live'): 'live_nodes',
+    ('POST', 'storage_service/keyspace_flush'): 'flush',
+    ('POST', 'storage_service/keyspace_compaction'): 'compact',
+    ('POST', 'storage_service/retrain_dict'): 'retrain',
+    ('GET', 'storage_service/estimate_compression_ratios'): 'estimate',
+    ('GET', 'column_family/metrics/live_disk_space_used'): 'live_disk_space',
+    ('GET', 'column_family/metrics/total_disk_space_used'): 'total_disk_space',
+}
+
+
+class StubCluster:
+    """Canned cluster state plus the log of calls made against it"""
+
+    def __init__(self, nodes=None, live_bytes=None, aliases=None):
+        self.nodes = list(nodes or DEFAULT_NODES)
+        self.aliases = dict(DEFAULT_ALIASES if aliases is None else aliases)
+        self.live_bytes = dict(live_bytes or DEFAULT_LIVE_BYTES)
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def handle(self, method, node, route, target, params):
+        """JSON-able response for one call, or raises KeyError for an unknown node, route or table"""
+        node = self.aliases.get(node, node)
+        if node not in self.nodes:
+            raise KeyError(node)
+        step = ROUTES[(method, route)]
+        with self.lock:
+            self.calls.append({'node': node, 'step': step, 'target': target, 'params': params})
+        if step == 'live_nodes':
+            return self.nodes
+        if step == 'estimate':
+            return CANNED_ESTIMATES
+        if step in ('live_disk_space', 'total_disk_space'):
+            live = self.live_bytes[target.split(':', 1)[1]]
+            return live if step == 'live_disk_space' else live + live // 10
+        return None
+
+    def steps(self):
+        with self.lock:
+            return [(call['step'], call['node']) for call in self.calls]
+
+
+def make_server(cluster, host='127.0.0.1', port=0, log_level=logging.DEBUG):
+    class Handler(BaseHTTPRequestHandler):
+        def _serve(self, method):
+            url = urllib.parse.urlsplit(self.path)
+            parts = [urllib.parse.unquote(p) for p in url.path.strip('/').split('/')]
+            params = dict(urllib.parse.parse_qsl(url.query))
+            node, rest = parts[0], parts[1:]
+            # The longest known route prefix; what follows is the keyspace or keyspace:table
+            depth = next((d for d in (3, 2) if (method, '/'.join(rest[:d])) in ROUTES), 2)
+            route, target = '/'.join(rest[:depth]), '/'.join(rest[depth:])
+            try:
+                body = cluster.handle(method, node, route, target, params)
+            except KeyError as e:
+                self.send_error(404, f"Unknown node, route or table: {e}")
+                return
+            payload = b'' if body is None else json.dumps(body).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            self._serve('GET')
+
+        def do_POST(self):
+            self._serve('POST')
+
+        def log_message(self, format, *args):
+            # Quiet during --check; the standalone server logs every call
+            logger.log(log_level, format % args)
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def check():
+    """Run StorageHarvester against a stub cluster and verify step order and report math; returns failures"""
+    cluster = StubCluster()
+    server = make_server(cluster)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    template = f"http://127.0.0.1:{server.server_address[1]}/{{node}}"
+    tables = list(DEFAULT_LIVE_BYTES)
+    bytes_written = 4000000
+    failures = []
+
+    def expect(condition, message):
+        if not condition:
+            failures.append(message)
+            logger.error(f"check failed: {message}")
+
+    try:
+        clients, live_nodes = build_clients(cluster.nodes[:1], template, timeout=10)
+        report = StorageHarvester(clients, 'mykeyspace', tables, ['comp_w_zstd_dict'], STEPS,
+                                  rf=3, bytes_written=bytes_written, live_nodes=live_nodes).run()
+        steps = [step for step, _ in cluster.steps()]
+        expect(sorted(clients) == sorted(cluster.nodes), f"discovered {sorted(clients)}")
+        retrains = [i for i, step in enumerate(steps) if step == 'retrain']
+        flushes = [i for i, step in enumerate(steps) if step == 'flush']
+        compactions = [i for i, step in enumerate(steps) if step == 'compact']
+        expect(len(retrains) == 1, f"{len(retrains)} retrain_dict calls, expected 1")
+        expect(len(flushes) == len(cluster.nodes) and len(compactions) == len(cluster.nodes),
+               f"{len(flushes)} flushes and {len(compactions)} compactions on {len(cluster.nodes)} nodes")
+        expect(retrains and max(flushes) < retrains[0] < min(compactions), f"step order {steps}")
+        sizes = [i for i, step in enumerate(steps) if step.endswith('disk_space')]
+        expect(sizes and max(compactions) < min(sizes), "sizes read before compaction finished")
+
+        baseline = DEFAULT_LIVE_BYTES['comp_w_none'] * len(cluster.nodes) / 3
+        for table, per_node in DEFAULT_LIVE_BYTES.items():
+            entry = report['tables'][table]
+            per_replica = per_node * len(cluster.nodes) / 3
+            expect(entry['live_bytes'] == per_node * len(cluster.nodes), f"{table} live_bytes {entry['live_bytes']}")
+            expect(entry.get('live_bytes_per_replica') == per_replica, f"{table} per replica {entry.get('live_bytes_per_replica')}")
+            expect(abs(entry.get('stored_to_written_ratio', 0) - per_replica / bytes_written) < 1e-9,
+                   f"{table} stored/written {entry.get('stored_to_written_ratio')}")
+            expect(abs(entry.get('ratio_vs_baseline', 0) - per_replica / baseline) < 1e-9,
+                   f"{table} vs baseline {entry.get('ratio_vs_baseline')}")
+
+        # Seeded through an alias of the first node: gossip's addresses replace it, so no node is counted twice
+        alias = next(iter(cluster.aliases))
+        clients, live_nodes = build_clients([alias], template, timeout=10)
+        report = StorageHarvester(clients, 'mykeyspace', tables, [], ['sizes'], rf=3, bytes_written=bytes_written,
+                                  live_nodes=live_nodes).run()
+        expect(sorted(clients) == sorted(cluster.nodes), f"seeded by {alias}, harvested {sorted(clients)}")
+        for table, per_node in DEFAULT_LIVE_BYTES.items():
+            entry = report['tables'][table]
+            expect(entry['live_bytes'] == per_node * len(cluster.nodes), f"{table} live_bytes {entry['live_bytes']} via {alias}")
+
+        # The same node given by name and by address without discovery is still queried once
+        clients, _ = build_clients(['localhost', '127.0.0.1'], template, timeout=10, discover=False)
+        expect(list(clients) == ['127.0.0.1'], f"localhost and 127.0.0.1 gave clients {list(clients)}")
+
+        # Only one of three nodes queried: per-replica figures must be withheld
+        clients, live_nodes = build_clients(cluster.nodes[:1], template, timeout=10, discover=False)
+        report = StorageHarvester(clients, 'mykeyspace', tables, [], ['sizes'], rf=3, bytes_written=bytes_written,
+                                  live_nodes=live_nodes).run()
+        for table, entry in report['tables'].items():
+            expect('live_bytes_per_replica' not in entry and 'stored_to_written_ratio' not in entry
+                   and 'per_replica_skipped' in entry, f"{table} reported per-replica figures from a partial cluster")
+    finally:
+        server.shutdown()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stub of the Scylla REST API for storage_harvest.py')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on')
+    parser.add_argument('--port', type=int, default=18080, help='Port to listen on')
+    parser.add_argument('--nodes', default=','.join(DEFAULT_NODES), help='Comma-separated fake node addresses')
+    parser.add_argument('--check', action="store_true", help='Run storage_harvest against an in-process stub and verify the results')
+    opts = parser.parse_args()
+
+    if opts.check:
+        failures = check()
+        logger.info("Check passed" if not failures else f"Check failed: {len(failures)} problems")
+        sys.exit(1 if failures else 0)
+
+    cluster = StubCluster([n.strip() for n in opts.nodes.split(',') if n.strip()])
+    server = make_server(cluster, opts.host, opts.port, log_level=logging.INFO)
+    logger.info(f"Serving {len(cluster.nodes)} fake nodes on http://{opts.host}:{opts.port}/{{node}}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+In-process read-through row cache, modelling the cache an application tier
+keeps in front of ScyllaDB.
+
+Entries are bounded by count and/or estimated bytes and optionally expire
+after a TTL. Eviction is LRU; with the tinylfu policy a new key is only
+admitted if a count-min sketch of recent accesses says it is more popular
+than the entry it would evict, which keeps one-off keys from flushing the
+hot set. Writers call invalidate(key) when they issue the write and again
+when it completes (success or error). Fills are tokenized, so a read that is
+in flight during either call does not cache its rows, and an old row filled
+in between is dropped by the second call. Only writes made through this
+cache invalidate it; writes from other processes are bounded only by the TTL.
+
+Usage:
+    cache = RowCache(max_entries=10000, ttl=30, policy='tinylfu')
+    rows = cache.get(key)
+    if rows is None:
+        token = cache.reserve(key)
+        future = session.execute_async(prepared, (key,))
+        future.add_callbacks(lambda rows: cache.fill(key, rows, token), lambda _: cache.cancel(key, token))
+    # Writers
+    cache.invalidate(key)
+    future = session.execute_async(update, values)
+    future.add_callbacks(lambda _: cache.invalidate(key), lambda _: cache.invalidate(key))
+    log_cache_stats(logger, cache.stats())
+"""
+
+import sys
+import time
+import threading
+from collections import OrderedDict
+
+CACHE_POLICIES = ['lru', 'tinylfu']
+# Per-entry bookkeeping beyond the rows: OrderedDict node, entry list, key
+ENTRY_OVERHEAD = 200
+# Sketch counters saturate here and are halved every SAMPLE_FACTOR * width accesses
+COUNTER_MAX = 15
+SAMPLE_FACTOR = 10
+SKETCH_MULTIPLIERS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+STAT_KEYS = ['hits', 'misses', 'expired', 'evictions', 'rejected', 'invalidations', 'entries', 'bytes']
+
+
+def estimate_size(rows):
+    """Approximate bytes held by a cached result (list of driver rows)"""
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row)
+    return size
+
+
+class FrequencySketch:
+    """Count-min sketch with 4-bit style saturating counters and periodic halving (aging)"""
+
+    def __init__(self, width):
+        self.bits = max(10, (width - 1).bit_length())
+        self.width = 1 << self.bits
+        self.rows = [[0] * self.width for _ in SKETCH_MULTIPLIERS]
+        self.additions = 0
+        self.sample_size = SAMPLE_FACTOR * self.width
+
+    def _slots(self, key):
+        h = hash(key)
+        return [((h * m) & 0xFFFFFFFFFFFFFFFF) >> (64 - self.bits) for m in SKETCH_MULTIPLIERS]
+
+    def increment(self, key):
+        for row, slot in zip(self.rows, self._slots(key)):
+            if row[slot] < COUNTER_MAX:
+                row[slot] += 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            for row in self.rows:
+                row[:] = [count >> 1 for count in row]
+            self.additions //= 2
+
+    def frequency(self, key):
+        return min(row[slot] for row, slot in zip(self.rows, self._slots(key)))
+
+
+class CachedResult:
+    """Stands in for a ResponseFuture on a cache hit: callbacks run immediately"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def add_callbacks(self, callback, errback):
+        callback(self.rows)
+
+
+class RowCache:
+    def __init__(self, max_entries=10000, max_bytes=None, ttl=None, policy='lru'):
+        if policy not in CACHE_POLICIES:
+            raise ValueError(f"Unknown cache policy '{policy}', expected one of {', '.join(CACHE_POLICIES)}")
+        if not max_entries and not max_bytes:
+            raise ValueError("The cache needs max_entries or max_bytes")
+        self.max_entries = max_entries or None
+        self.max_bytes = max_bytes or None
+        self.ttl = ttl or None
+        self.policy = policy
+        self.entries = OrderedDict()      # key -> [rows, expires_at, size], least recently used first
+        self.fills = {}                   # key -> token of the read expected to fill it
+        self.sketch = FrequencySketch(max_entries or 65536) if policy == 'tinylfu' else None
+        self.lock = threading.Lock()
+        self.next_token = 0
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.rejected = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Cached rows (possibly an empty list), or None on a miss"""
+        with self.lock:
+            if self.sketch is not None:
+                self.sketch.increment(key)
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+                self._remove(key)
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def reserve(self, key):
+        """Token for a read about to fetch key; invalidate(key) voids it"""
+        with self.lock:
+            self.next_token += 1
+            self.fills[key] = self.next_token
+            return self.next_token
+
+    def cancel(self, key, token):
+        """Drop a reservation whose read failed"""
+        with self.lock:
+            if self.fills.get(key) == token:
+                del self.fills[key]
+
+    def fill(self, key, rows, token):
+        """Cache the rows of a reserved read unless the key was written (or re-reserved) since"""
+        with self.lock:
+            if self.fills.get(key) != token:
+                return False
+            del self.fills[key]
+            return self._put(key, list(rows))
+
+    def put(self, key, rows):
+        with self.lock:
+            return self._put(key, list(rows))
+
+    def invalidate(self, key):
+        with self.lock:
+            self.fills.pop(key, None)
+            if key in self.entries:
+                self._remove(key)
+                self.invalidations += 1
+
+    def _remove(self, key):
+        self.bytes -= self.entries.pop(key)[2]
+
+    def _over(self, extra_entries, extra_bytes):
+        return ((self.max_entries is not None and len(self.entries) + extra_entries > self.max_entries)
+                or (self.max_bytes is not None and self.bytes + extra_bytes > self.max_bytes))
+
+    def _put(self, key, rows):
+        size = estimate_size(rows) + ENTRY_OVERHEAD
+        if key in self.entries:
+            self._remove(key)
+        if self.max_bytes is not None and size > self.max_bytes:
+            self.rejected += 1
+            return False
+        if self.sketch is not None and self._over(1, size):
+            # Admit only if the newcomer is more popular than every entry it would push out
+            frequency = self.sketch.frequency(key)
+            needed_entries, needed_bytes = 0, 0
+            for victim, entry in self.entries.items():
+                if not self._over(1 - needed_entries, size - needed_bytes):
+                    break
+                if self.sketch.frequency(victim) >= frequency:
+                    self.rejected += 1
+                    return False
+                needed_entries += 1
+                needed_bytes += entry[2]
+        while self.entries and self._over(1, size):
+            self.bytes -= self.entries.popitem(last=False)[1][2]
+            self.evictions += 1
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        self.entries[key] = [rows, expires, size]
+        self.bytes += size
+        return True
+
+    @property
+    def hit_ratio(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        """Counters as a picklable dict; see merge_cache_stats"""
+        with self.lock:
+            return {'policy': self.policy, 'max_entries': self.max_entries, 'max_bytes': self.max_bytes,
+                    'ttl': self.ttl, 'hits': self.hits, 'misses': self.misses, 'expired': self.expired,
+                    'evictions': self.evictions, 'rejected': self.rejected, 'invalidations': self.invalidations,
+                    'entries': len(self.entries), 'bytes': self.bytes}
+
+
+def merge_cache_stats(stats_list):
+    """Sum per-process stats() dicts; every process has its own cache, like separate app instances"""
+    merged = dict(stats_list[0])
+    for key in STAT_KEYS:
+        merged[key] = sum(stats[key] for stats in stats_list)
+    merged['caches'] = len(stats_list)
+    return merged
+
+
+def log_cache_stats(logger, stats, name='cache'):
+    lookups = stats['hits'] + stats['misses']
+    ratio = 100.0 * stats['hits'] / lookups if lookups else 0.0
+    limits = ', '.join(part for part in (
+        f"{stats['max_entries']:,} entries" if stats['max_entries'] else '',
+        f"{stats['max_bytes'] / 1048576:,.1f} MB" if stats['max_bytes'] else '',
+        f"TTL {stats['ttl']:g}s" if stats['ttl'] else '') if part)
+    per_entry = stats['bytes'] / stats['entries'] if stats['entries'] else 0
+    caches = stats.get('caches', 1)
+    logger.info(f"[{name}] {stats['policy']} ({limits})" + (f" x {caches} processes" if caches > 1 else "")
+                + f": hit ratio {ratio:.1f}% ({stats['hits']} hits, {stats['misses']} misses)")
+    logger.info(f"[{name}] {stats['entries']:,} entries using ~{stats['bytes'] / 1048576:,.2f} MB "
+                f"(~{per_entry:,.0f} B/entry); {stats['evictions']} evicted, {stats['expired']} expired, "
+                f"{stats['invalidations']} invalidated, {stats['rejected']} not admitted")
+
+
+def add_cache_args(parser):
+    parser.add_argument('--cache', choices=CACHE_POLICIES, default=None,
+                        help='Serve point reads from an in-process read-through cache with this eviction policy')
+    parser.add_argument('--cache_entries', type=int, default=10000, help='Cache size in rows (0 = bounded by --cache_mb only)')
+    parser.add_argument('--cache_mb', type=float, default=0, help='Cache size in estimated MB (0 = bounded by --cache_entries only)')
+    parser.add_argument('--cache_ttl', type=float, default=0, help='Seconds a cached row stays valid (0 = until evicted or invalidated)')
+
+
+def cache_from_opts(opts):
+    """RowCache configured by add_cache_args() options, or None when --cache is not set"""
+    if not opts.cache:
+        return None
+    return RowCache(max_entries=opts.cache_entries, max_bytes=int(opts.cache_mb * 1048576),
+                    ttl=opts.cache_ttl, policy=opts.cache)
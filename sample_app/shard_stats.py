@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Shard-aware connection and request distribution diagnostics.
+
+Connection report: per host, the number of shards, connections the driver
+holds (ideally one per shard), excess connections that landed on an already
+covered shard, and the shard-aware port the node advertises.
+
+Request report: per host and shard, how many requests were served and their
+latency, taken from each ResponseFuture's coordinator host and connection.
+When token metadata is available every request with a routing key is also
+checked against the shard that owns it (the tablet replica's shard, or the
+token's shard for vnode tables); requests sent on another shard's
+connection pay a cross-shard hop on the server.
+
+Usage from a client:
+    stats = ShardStats(cluster)
+    stats.log_connection_report(logger)
+    future = session.execute_async(prepared, row)
+    stats.track(future)            # or stats.record(result.response_future, latency)
+    stats.log_request_report(logger)
+"""
+
+import random
+import threading
+import time
+
+RESERVOIR_SIZE = 10000
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+class ShardStats:
+    def __init__(self, cluster):
+        self.cluster = cluster
+        self.lock = threading.Lock()
+        # (host, shard) -> {'count', 'timed', 'latency_sum', 'latency_max', 'samples'}
+        self.requests = {}
+        self.routed = 0
+        self.misrouted = 0
+
+    # ----- connections -----
+
+    def connection_report(self):
+        """Per-host shard/connection counts from the driver's pools"""
+        shard_aware = self.cluster.is_shard_aware()
+        hosts = {}
+        for pool in self.cluster.get_all_pools():
+            sharding = pool.host.sharding_info
+            connections = dict(getattr(pool, '_connections', {}))
+            ports = sorted({c.endpoint.port for c in connections.values() if getattr(c, 'endpoint', None)})
+            hosts[str(pool.host.endpoint)] = {
+                'shards_count': sharding.shards_count if sharding else None,
+                'connected_shards': sorted(s for s in connections if s is not None),
+                'connected': len(connections),
+                'excess': len(getattr(pool, '_excess_connections', ())),
+                'shard_aware_port': sharding.shard_aware_port if sharding else None,
+                'connection_ports': ports,
+            }
+        return {'shard_aware': shard_aware, 'hosts': hosts}
+
+    def connection_warnings(self, report=None):
+        """Reasons shard-aware routing is not (fully) working"""
+        report = report or self.connection_report()
+        options = getattr(self.cluster, 'shard_aware_options', None)
+        warnings = []
+        if not report['hosts']:
+            return ["No connection pools open yet"]
+        if not report['shard_aware']:
+            warnings.append("Driver is not shard-aware: no sharding info from the nodes "
+                            "(not Scylla, or an old/non-Scylla Python driver)")
+            return warnings
+        if options is not None and options.disable:
+            warnings.append("Shard awareness is disabled in the cluster's shard_aware_options")
+        if options is not None and options.disable_shardaware_port:
+            warnings.append("Shard-aware port is disabled; connections to shards are assigned by chance")
+        for host, h in report['hosts'].items():
+            if h['shard_aware_port'] is None:
+                warnings.append(f"{host}: node does not advertise a shard-aware port; check native_shard_aware_transport_port")
+            if h['shards_count'] and h['connected'] < h['shards_count']:
+                warnings.append(f"{host}: {h['connected']}/{h['shards_count']} shards have a connection")
+            if h['excess']:
+                warnings.append(f"{host}: {h['excess']} connections landed on an already connected shard; "
+                                f"source ports are likely rewritten (NAT) or port {h['shard_aware_port']} is unreachable")
+        return warnings
+
+    def log_connection_report(self, logger):
+        report = self.connection_report()
+        logger.info(f"Shard-aware driver: {report['shard_aware']}")
+        for host, h in sorted(report['hosts'].items()):
+            logger.info(f"  {host}: shards={h['shards_count']} connected={h['connected']} excess={h['excess']} "
+                        f"shard_aware_port={h['shard_aware_port']} ports={h['connection_ports']}")
+        for warning in self.connection_warnings(report):
+            logger.warning(f"Shard-aware routing: {warning}")
+        return report
+
+    # ----- requests -----
+
+    def _expected_shard(self, future, host):
+        query = getattr(future, 'query', None)
+        routing_key = getattr(query, 'routing_key', None)
+        token_map = self.cluster.metadata.token_map
+        if routing_key is None or token_map is None or not getattr(host, 'sharding_info', None):
+            return None
+        token = token_map.token_class.from_key(routing_key)
+        # Tablet tables: the owning shard is the one this host holds for the tablet
+        keyspace = getattr(query, 'keyspace', None)
+        table = getattr(query, 'table', None)
+        if keyspace and table:
+            tablet = self.cluster.metadata._tablets.get_tablet_for_key(keyspace, table, token)
+            if tablet is not None:
+                for replica_host_id, replica_shard in tablet.replicas:
+                    if replica_host_id == host.host_id:
+                        return replica_shard
+        return host.sharding_info.shard_id_from_token(token.value)
+
+    def record(self, future, latency=None):
+        """Account one completed request; latency in seconds (None when unknown)"""
+        host = getattr(future, 'coordinator_host', None)
+        connection = getattr(future, '_connection', None)
+        shard = connection.features.shard_id if connection is not None else None
+        expected = self._expected_shard(future, host)
+        key = (str(host), shard)
+        with self.lock:
+            entry = self.requests.get(key)
+            if entry is None:
+                entry = self.requests[key] = {'count': 0, 'timed': 0, 'latency_sum': 0.0, 'latency_max': 0.0, 'samples': []}
+            entry['count'] += 1
+            if latency is not None:
+                entry['timed'] += 1
+                entry['latency_sum'] += latency
+                entry['latency_max'] = max(entry['latency_max'], latency)
+                # Reservoir sample keeps percentiles bounded in memory
+                if len(entry['samples']) < RESERVOIR_SIZE:
+                    entry['samples'].append(latency)
+                else:
+                    slot = random.randrange(entry['timed'])
+                    if slot < RESERVOIR_SIZE:
+                        entry['samples'][slot] = latency
+            if expected is not None and shard is not None:
+                self.routed += 1
+                if expected != shard:
+                    self.misrouted += 1
+
+    def track(self, future):
+        """Record the request when the future completes (success or error)"""
+        start = time.perf_counter()
+
+        def done(_):
+            self.record(future, time.perf_counter() - start)
+
+        future.add_callbacks(done, done)
+        return future
+
+    def snapshot(self):
+        """Picklable copy of the request counters, e.g. to send to a parent process"""
+        with self.lock:
+            return {
+                'requests': {key: dict(entry, samples=list(entry['samples'])) for key, entry in self.requests.items()},
+                'routed': self.routed,
+                'misrouted': self.misrouted,
+            }
+
+    def merge(self, snapshot):
+        with self.lock:
+            for key, other in snapshot['requests'].items():
+                entry = self.requests.setdefault(key, {'count': 0, 'timed': 0, 'latency_sum': 0.0, 'latency_max': 0.0, 'samples': []})
+                entry['count'] += other['count']
+                entry['timed'] += other['timed']
+                entry['latency_sum'] += other['latency_sum']
+                entry['latency_max'] = max(entry['latency_max'], other['latency_max'])
+                entry['samples'] = (entry['samples'] + other['samples'])[:RESERVOIR_SIZE]
+            self.routed += snapshot['routed']
+            self.misrouted += snapshot['misrouted']
+
+    def request_report(self):
+        with self.lock:
+            rows = []
+            total = sum(e['count'] for e in self.requests.values()) or 1
+            for (host, shard), e in sorted(self.requests.items(), key=lambda kv: (kv[0][0], kv[0][1] is None, kv[0][1] or 0)):
+                timed = e['timed']
+                rows.append({
+                    'host': host,
+                    'shard': shard,
+                    'count': e['count'],
+                    'share_pct': 100.0 * e['count'] / total,
+                    'mean_ms': 1000.0 * e['latency_sum'] / timed if timed else None,
+                    'p99_ms': 1000.0 * _percentile(e['samples'], 99) if timed else None,
+                    'max_ms': 1000.0 * e['latency_max'] if timed else None,
+                })
+            return {'rows': rows, 'routed': self.routed, 'misrouted': self.misrouted}
+
+    def log_request_report(self, logger):
+        report = self.request_report()
+        per_host = {}
+        for row in report['rows']:
+            per_host.setdefault(row['host'], []).append(row)
+        for host, rows in per_host.items():
+            counts = [r['count'] for r in rows]
+            logger.info(f"Requests on {host}: {sum(counts)} over {len(rows)} shards "
+                        f"(min/max per shard {min(counts)}/{max(counts)})")
+            for r in rows:
+                latency = (f", mean={r['mean_ms']:.2f}ms p99={r['p99_ms']:.2f}ms max={r['max_ms']:.2f}ms"
+                           if r['mean_ms'] is not None else "")
+                logger.info(f"  shard {r['shard']}: {r['count']} ({r['share_pct']:.1f}%){latency}")
+        if report['routed']:
+            pct = 100.0 * report['misrouted'] / report['routed']
+            log = logger.warning if report['misrouted'] else logger.info
+            log(f"Shard routing: {report['misrouted']}/{report['routed']} token-routed requests ({pct:.1f}%) "
+                f"were sent on another shard's connection")
+        return report
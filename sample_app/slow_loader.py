@@ -1,4 +1,19 @@
 #!/usr/bin/env python3
+"""
+Shaped background write load for myTable.
+
+Rows are written asynchronously at a target rate that follows a curve
+(constant, ramp, sine/diurnal or burst; see open_loop.shaped_rate), so the
+achieved rate tracks the target instead of the round-trip time. Every write
+binds an explicit USING TIMESTAMP, optionally backdated, to study compaction
+and cache behaviour under controlled, repeatable write pressure.
+
+Usage:
+    ./slow_loader.py -s node1 -r 1000000 --rate 500
+    ./slow_loader.py -s node1 -r 100000 --duration 3600 --shape sine --rate 200 --peak_rate 2000 --period 600
+    ./slow_loader.py -s node1 -r 100000 --shape burst --rate 100 --peak_rate 5000 --period 60 --burst_duration 5
+    ./slow_loader.py -s node1 -r 100000 --backdate 86400 --backdate_jitter 3600
+"""
 
 import logging
 import time
@@ -6,13 +21,12 @@ import datetime
 import random
 import sys
 import argparse
-from venv import logger
-from faker import Faker
+from rowgen import RowGenerator
+from open_loop import OpenLoopRunner, RATE_SHAPES, shaped_rate, log_open_loop_result
 from cassandra.cluster import Cluster, ExecutionProfile, EXEC_PROFILE_DEFAULT
 from cassandra import ConsistencyLevel
-from cassandra.concurrent import execute_concurrent_with_args
 from cassandra.auth import PlainTextAuthProvider
-from cassandra.policies import DCAwareRoundRobinPolicy, TokenAwarePolicy, RoundRobinPolicy
+from cassandra.policies import DCAwareRoundRobinPolicy, TokenAwarePolicy
 
 ## Script args and Help
 parser = argparse.ArgumentParser(add_help=True)
@@ -25,6 +39,17 @@ parser.add_argument('-r', '--row_count', type=int, action="store", dest="row_cou
 parser.add_argument('-d', '--drop', action="store_true", help='Drop keyspace if exists')
 parser.add_argument('--cl', dest="consistency_level", default="LOCAL_QUORUM", help="Consistency Level (ONE, TWO, QUORUM, ALL, LOCAL_QUORUM, EACH_QUORUM)")
 parser.add_argument('--dc', dest='local_dc', default='dc1', help='Local datacenter name for ScyllaDB')
+parser.add_argument('--rate', type=float, default=1000, help='Base target rows/s (0 = closed-loop, --concurrency in flight)')
+parser.add_argument('--shape', default='constant', choices=RATE_SHAPES, help='How the target rate changes over time')
+parser.add_argument('--peak_rate', type=float, default=None, help='Peak rows/s for ramp, sine and burst shapes')
+parser.add_argument('--period', type=float, default=60, help='Ramp length, sine period or burst interval in seconds')
+parser.add_argument('--burst_duration', type=float, default=5, help='Seconds at --peak_rate at the start of every burst period')
+parser.add_argument('--duration', type=float, default=0, help='Run for this many seconds, cycling over ids 1..row_count (0 = stop after row_count rows)')
+parser.add_argument('--concurrency', type=int, default=200, help='Maximum in-flight writes')
+parser.add_argument('--backdate', type=float, default=0, help='Write timestamps this many seconds in the past')
+parser.add_argument('--backdate_jitter', type=float, default=0, help='Move each timestamp up to this many extra seconds into the past, at random')
+parser.add_argument('--seed', type=int, default=None, help='Make every row a pure function of (seed, id)')
+parser.add_argument('--progress_interval', type=float, default=10, help='Seconds between progress reports')
 opts = parser.parse_args()
 
 hosts = [h.strip() for h in opts.hosts.split(',') if h.strip()]
@@ -53,14 +78,12 @@ logger.info(f"Local DC: {local_datacenter}")
 logger.info(f"Row count to insert: {row_count}") 
 logger.info(f"Using consistency level: {consistency_level}") 
 
-def strTimeProp(start, end, format, prop):
-    stime = time.mktime(time.strptime(start, format))
-    etime = time.mktime(time.strptime(end, format))
-    ptime = stime + prop * (etime - stime)
-    return time.strftime(format, time.localtime(ptime))
+# Rows generated per RowGenerator call
+GENERATE_CHUNK = 1000
 
-def randomDate(start, end, prop):
-    return strTimeProp(start, end, '%Y-%m-%d', prop)
+def write_timestamp(backdate, jitter):
+    """USING TIMESTAMP value in microseconds: now, minus the backdate and a random jitter"""
+    return int((time.time() - backdate - random.uniform(0, jitter)) * 1000000)
 
 def insert_data(session, row_count, table, compression):
     # print("")
@@ -89,50 +112,35 @@ def insert_data(session, row_count, table, compression):
     cql = f"""INSERT INTO {keyspace}.{table} (id, ssn, imei, os, phonenum, balance, pdate, v1, v2, v3, v4, v5) VALUES (?,?,?,?,?,?,?, ?,?,?,?,?) using TIMESTAMP ?"""
     cql_prepared = session.prepare(cql)
     cql_prepared.consistency_level = getattr(ConsistencyLevel, consistency_level)
-    # print("")
 
-    i = 0
-    while i < row_count:
-        ssn1 = [str(random.randint(100,999)), str(random.randint(10,99)), str(random.randint(1000,9999))]
-        ssn = '-'.join(ssn1)
-        imei = str(random.randint(100000000000000,999999999999999))
-        os1 = ['Android','iOS','Windows','Samsung','Nokia']
-        os = random.choice(os1)
-        phone1 = [str(random.randint(200,999)), str(random.randint(100,999)), str(random.randint(1000,9999))]
-        phone = '-'.join(phone1)
-        bal = round(random.uniform(10.5,999.5), 2)
-        dat = randomDate("2019-01-01", "2019-04-01", random.random())
-
-        v = [None] * 5
-        for j in range(5):
-            base_string = f"IMEI:{imei}|OS:{os}|Phone:{phone}"
-
-            # if len(base_string) < 200:
-            #     padding = ''.join(random.choices('      ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789', k=200 - len(base_string)))
-            #     final_string = base_string + padding
-            # else:
-            #     final_string = base_string[:200]
-            # v[j] = final_string
-            fake = Faker()
-            if len(base_string) < 200:
-                # Generate enough fake sentences to reach the desired length
-                sentences = []
-                while sum(len(s) for s in sentences) < 200 - len(base_string):
-                    sentences.append(fake.sentence())
-                padding = ' '.join(sentences)
-                # Trim to exactly fit 200 characters
-                padding = padding[:200 - len(base_string)]
-                v[j] = base_string + padding
-            else:
-                v[j] = base_string[:200]
-
-        if (i % 1000 == 0):
-            now = datetime.datetime.now()
-            logger.info("inserted records: %s, %s:", i, now.strftime('%Y-%m-%d %H:%M:%S'))
-        i += 1
-        session.execute(cql_prepared, (i, ssn, imei, os, phone, bal, dat, v[0], v[1], v[2], v[3], v[4]))
+    rowgen = RowGenerator(seed=opts.seed, deterministic=opts.seed is not None)
+    rows = []
+    next_id = [1]
+
+    def issue(i):
+        if not opts.duration and i >= row_count:
+            return None
+        if not rows:
+            # Ids run 1..row_count, then start over (overwrites) when running for a duration
+            count = min(GENERATE_CHUNK, row_count - next_id[0] + 1)
+            rows.extend(reversed(rowgen.generate(next_id[0], count)))
+            next_id[0] = next_id[0] + count if next_id[0] + count <= row_count else 1
+        row = rows.pop()
+        return session.execute_async(cql_prepared, (*row, write_timestamp(opts.backdate, opts.backdate_jitter)))
+
+    rate = shaped_rate(opts.shape, opts.rate, opts.peak_rate, opts.period, opts.burst_duration) if opts.rate else 0
+    target = (f"{opts.shape} {opts.rate:,.0f}" + (f"-{opts.peak_rate:,.0f}" if opts.peak_rate is not None else "")
+              + " rows/s" if opts.rate else f"closed-loop, {opts.concurrency} in flight")
+    length = f"for {opts.duration:.0f}s" if opts.duration else f"{row_count} rows"
+    logger.info(f"## Writing {length}: {target}, timestamps backdated {opts.backdate:.0f}s (+ up to {opts.backdate_jitter:.0f}s)")
+    runner = OpenLoopRunner(issue, rate=rate, duration=opts.duration or None, max_in_flight=opts.concurrency,
+                            report_interval=opts.progress_interval, logger=logger, name='slow_loader')
+    result = runner.run()
+    log_open_loop_result(logger, result)
+    if runner.last_error is not None:
+        logger.warning(f"Last write error: {runner.last_error}")
     now = datetime.datetime.now()
-    logger.info("inserted records: %s, %s", i, now.strftime("%Y-%m-%d %H:%M:%S"))
+    logger.info("inserted records: %s, %s", result['completed'] - result['errors'], now.strftime("%Y-%m-%d %H:%M:%S"))
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Storage-efficiency harvester for compression experiments.
+
+Replaces the manual flush / retrain_dict / compact / `nodetool tablestats`
+routine with the Scylla REST API (port 10000):
+
+    1. flush     POST /storage_service/keyspace_flush/{ks}?cf=...                      all nodes
+    2. retrain   POST /storage_service/retrain_dict?keyspace=..&cf=..                  one node, dictionary tables
+    3. compact   POST /storage_service/keyspace_compaction/{ks}?cf=...                 all nodes
+    4. estimate  GET  /storage_service/estimate_compression_ratios?keyspace=..&cf=..   one node
+    5. sizes     GET  /column_family/metrics/{live,total}_disk_space_used/{ks}:{cf}    all nodes
+
+Dictionary training is cluster-wide, so it is started once; compaction comes
+after it so dictionary tables are rewritten with the new dictionary. The
+report then describes dictionary compression rather than the old SSTables.
+
+The tool then writes a JSON comparison per table: bytes written by the
+client versus bytes stored (summed over nodes and per replica), the
+stored/written ratio, compressor and level, and the time spent in each step.
+
+The first --hosts entry is asked for the live nodes, and those addresses are
+harvested; with --no_discover (or no answer) --hosts is used as given,
+resolved to addresses. Per-replica and stored/written figures are only
+reported when every live node's sizes were collected; a partial sum divided
+by RF is meaningless.
+
+Bytes written and compression settings can be taken from compression.py's
+--summary_json output. --base_url points at a local stub for testing (see
+rest_stub.py).
+
+Usage:
+    ./compression.py --fanout -r 1000000 --summary_json fanout.json
+    ./storage_harvest.py -s node1,node2,node3 --load_summary fanout.json -o storage.json
+    ./rest_stub.py --port 18080 &
+    ./storage_harvest.py -s 10.0.0.1 --base_url 'http://127.0.0.1:18080/{node}' -t comp_w_none,comp_w_lz4c
+"""
+
+import re
+import sys
+import json
+import time
+import socket
+import logging
+import argparse
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+logger = logging.getLogger(__name__)
+
+DEFAULT_TABLES = ['comp_w_none', 'comp_w_zstd_dict', 'comp_w_zstd', 'comp_w_lz4c']
+STEPS = ['flush', 'retrain', 'compact', 'estimate', 'sizes']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Flush, retrain, compact and collect on-disk sizes through the Scylla REST API')
+    parser.add_argument('-s', '--hosts', default="127.0.0.1", help='Comma-separated ScyllaDB node names or IPs')
+    parser.add_argument('--port', type=int, default=10000, help='Scylla REST API port')
+    parser.add_argument('--base_url', default=None, help='Base URL template with {node} for the node address (e.g. a local stub), instead of http://{node}:<port>')
+    parser.add_argument('--no_discover', action="store_true", help='Only harvest --hosts instead of every live node reported by the first host')
+    parser.add_argument('-k', '--keyspace', default="mykeyspace", help='Keyspace name')
+    parser.add_argument('-t', '--tables', default=','.join(DEFAULT_TABLES), help='Comma-separated tables to harvest')
+    parser.add_argument('--retrain_tables', default='comp_w_zstd_dict', help='Comma-separated dictionary-compressed tables to retrain')
+    parser.add_argument('--steps', default=','.join(STEPS), help=f"Comma-separated steps to run, always in the order {', '.join(STEPS)}")
+    parser.add_argument('--baseline_table', default='comp_w_none', help='Table the other tables\' stored size is compared against')
+    parser.add_argument('--rf', type=int, default=3, help='Replication factor, to report stored bytes per replica')
+    parser.add_argument('--load_summary', default=None, help="compression.py --summary_json file (bytes written, compression per table)")
+    parser.add_argument('--bytes_written', type=int, default=None, help='Client bytes written per table (overrides --load_summary)')
+    parser.add_argument('--timeout', type=float, default=3600, help='Seconds to wait for a single REST call (compaction can be slow)')
+    parser.add_argument('-o', '--output', default=None, help='Write the JSON report here (default: stdout)')
+    return parser.parse_args()
+
+
+class ScyllaRestClient:
+    """Minimal client for the node-local Scylla REST API"""
+
+    def __init__(self, base_url, timeout=3600):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def request(self, method, path, params=None):
+        url = f"{self.base_url}{path}"
+        if params:
+            url += '?' + urllib.parse.urlencode(params)
+        req = urllib.request.Request(url, method=method)
+        with urllib.request.urlopen(req, timeout=self.timeout) as response:
+            body = response.read().decode('utf-8')
+        return json.loads(body) if body.strip() else None
+
+    def live_nodes(self):
+        return self.request('GET', '/gossiper/endpoint/live/')
+
+    def flush(self, keyspace, tables):
+        return self.request('POST', f"/storage_service/keyspace_flush/{keyspace}", {'cf': ','.join(tables)})
+
+    def compact(self, keyspace, tables):
+        return self.request('POST', f"/storage_service/keyspace_compaction/{keyspace}", {'cf': ','.join(tables)})
+
+    def retrain_dict(self, keyspace, table):
+        return self.request('POST', '/storage_service/retrain_dict', {'keyspace': keyspace, 'cf': table})
+
+    def estimate_compression_ratios(self, keyspace, table):
+        return self.request('GET', '/storage_service/estimate_compression_ratios', {'keyspace': keyspace, 'cf': table})
+
+    def disk_space(self, keyspace, table):
+        name = f"{keyspace}:{table}"
+        live = self.request('GET', f"/column_family/metrics/live_disk_space_used/{name}")
+        total = self.request('GET', f"/column_family/metrics/total_disk_space_used/{name}")
+        return int(live or 0), int(total or 0)
+
+
+def resolve_host(host):
+    """Address of host, or host itself if it does not resolve (e.g. a stub alias)"""
+    try:
+        return socket.gethostbyname(host)
+    except OSError as e:
+        logger.warning(f"Could not resolve {host}: {e}")
+        return host
+
+
+def build_clients(hosts, url_template, timeout=3600, discover=True):
+    """
+    ({node: ScyllaRestClient}, live_nodes); live_nodes is None if the first host
+    could not list them. With discover and a gossip answer, the clients are the
+    live node addresses and hosts only serve as the seed; otherwise hosts are
+    resolved to addresses so one node given twice (name and IP) is queried once.
+    """
+    try:
+        live_nodes = ScyllaRestClient(url_template.format(node=hosts[0]), timeout).live_nodes()
+    except Exception as e:
+        logger.warning(f"Could not list live nodes from {hosts[0]}: {e}")
+        live_nodes = None
+    if live_nodes is not None and discover:
+        nodes = list(live_nodes)
+    else:
+        nodes = list(dict.fromkeys(resolve_host(h) for h in hosts))
+    return {node: ScyllaRestClient(url_template.format(node=node), timeout) for node in nodes}, live_nodes
+
+
+def parse_compression(options):
+    """'sstable_compression': 'ZstdCompressor', ..., 'compression_level': '3' -> (compressor, level, chunk_kb)"""
+    def option(name):
+        m = re.search(rf"'{name}'\s*:\s*'?([^',]+)'?", options)
+        return m.group(1).strip() if m else None
+    if options is None:
+        return None, None, None
+    # An empty compression map leaves the table on the server default
+    compressor = option('sstable_compression') or ('default' if not options.strip() else None)
+    level = option('compression_level')
+    chunk = option('chunk_length_in_kb')
+    return compressor, int(level) if level else None, int(chunk) if chunk else None
+
+
+class StorageHarvester:
+    def __init__(self, clients, keyspace, tables, retrain_tables, steps, rf=3, bytes_written=None, load_summary=None,
+                 baseline_table='comp_w_none', live_nodes=None):
+        """live_nodes: every live node in the cluster, or None if unknown (per-replica figures are then skipped)"""
+        self.clients = clients
+        self.live_nodes = live_nodes
+        self.keyspace = keyspace
+        self.tables = tables
+        self.retrain_tables = [t for t in retrain_tables if t in tables]
+        self.steps = steps
+        self.rf = rf
+        self.baseline_table = baseline_table
+        self.load_summary = load_summary or {}
+        self.bytes_written = bytes_written if bytes_written is not None else self.load_summary.get('payload_bytes_per_table')
+        self.timings = []
+        self.step_seconds = {}
+
+    def _on_all_nodes(self, step, fn, table=None):
+        """Run fn(client) on every node in parallel and record per-node timing and errors"""
+        def run(node_client):
+            node, client = node_client
+            start = time.time()
+            try:
+                result, error = fn(client), None
+            except Exception as e:
+                result, error = None, str(e)
+            entry = {'step': step, 'node': node, 'table': table, 'seconds': time.time() - start, 'error': error}
+            if error:
+                logger.warning(f"{step} on {node}{' ' + table if table else ''} failed: {error}")
+            return entry, result
+
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=len(self.clients)) as pool:
+            outcomes = list(pool.map(run, self.clients.items()))
+        elapsed = time.time() - start
+        self.timings.extend(entry for entry, _ in outcomes)
+        self.step_seconds[step] = self.step_seconds.get(step, 0.0) + elapsed
+        logger.info(f"{step}{' ' + table if table else ''}: {elapsed:.1f}s on {len(self.clients)} nodes")
+        return {entry['node']: result for entry, result in outcomes if entry['error'] is None}
+
+    def _on_one_node(self, step, fn, table=None):
+        """Run a cluster-wide operation fn(client) on the first node; returns its result or None on error"""
+        node, client = next(iter(self.clients.items()))
+        start = time.time()
+        try:
+            result, error = fn(client), None
+        except Exception as e:
+            result, error = None, str(e)
+            logger.warning(f"{step} on {node}{' ' + table if table else ''} failed: {error}")
+        elapsed = time.time() - start
+        self.timings.append({'step': step, 'node': node, 'table': table, 'seconds': elapsed, 'error': error})
+        self.step_seconds[step] = self.step_seconds.get(step, 0.0) + elapsed
+        logger.info(f"{step}{' ' + table if table else ''}: {elapsed:.1f}s on {node}")
+        return result
+
+    def _missing_nodes(self, collected):
+        """Live nodes without sizes in `collected`, or None when the live node list is unknown"""
+        if self.live_nodes is None:
+            return None
+        return sorted(set(self.live_nodes) - set(collected))
+
+    def run(self):
+        report = {'keyspace': self.keyspace, 'nodes': list(self.clients), 'live_nodes': self.live_nodes, 'rf': self.rf,
+                  'steps': [step for step in STEPS if step in self.steps], 'tables': {}}
+        estimates = {}
+        sizes = {}
+
+        if 'flush' in self.steps:
+            self._on_all_nodes('flush', lambda c: c.flush(self.keyspace, self.tables))
+        if 'retrain' in self.steps:
+            # Training samples the whole cluster and distributes the dictionary; start it once
+            for table in self.retrain_tables:
+                self._on_one_node('retrain', lambda c, t=table: c.retrain_dict(self.keyspace, t), table)
+        if 'compact' in self.steps:
+            # After retraining, so dictionary tables are rewritten with the new dictionary
+            self._on_all_nodes('compact', lambda c: c.compact(self.keyspace, self.tables))
+        if 'estimate' in self.steps:
+            # Estimates are cluster-wide samples; one node is enough
+            for table in self.tables:
+                result = self._on_one_node('estimate', lambda c, t=table: c.estimate_compression_ratios(self.keyspace, t), table)
+                if result is not None:
+                    estimates[table] = result
+        if 'sizes' in self.steps:
+            for table in self.tables:
+                sizes[table] = self._on_all_nodes('sizes', lambda c, t=table: c.disk_space(self.keyspace, t), table)
+
+        load_tables = self.load_summary.get('tables', {})
+        for table in self.tables:
+            compressor, level, chunk_kb = parse_compression(load_tables.get(table, {}).get('compression'))
+            entry = {'compressor': compressor, 'level': level, 'chunk_length_in_kb': chunk_kb,
+                     'bytes_written': self.bytes_written}
+            if table in sizes:
+                per_node = {node: {'live_bytes': live, 'total_bytes': total} for node, (live, total) in sizes[table].items()}
+                live = sum(v['live_bytes'] for v in per_node.values())
+                entry.update({
+                    'per_node': per_node,
+                    'live_bytes': live,
+                    'total_bytes': sum(v['total_bytes'] for v in per_node.values()),
+                })
+                missing = self._missing_nodes(per_node)
+                if missing is None or missing:
+                    entry['per_replica_skipped'] = ('live nodes unknown' if missing is None
+                                                    else f"no sizes from {', '.join(missing)}")
+                    logger.warning(f"{table}: not reporting per-replica or stored/written figures, {entry['per_replica_skipped']}")
+                else:
+                    entry['live_bytes_per_replica'] = live / self.rf if self.rf else live
+                    if self.bytes_written:
+                        entry['stored_to_written_ratio'] = entry['live_bytes_per_replica'] / self.bytes_written
+            if table in estimates:
+                entry['estimated_ratios'] = estimates[table]
+            report['tables'][table] = entry
+
+        baseline = report['tables'].get(self.baseline_table, {}).get('live_bytes_per_replica')
+        if baseline:
+            report['baseline_table'] = self.baseline_table
+            for entry in report['tables'].values():
+                if entry.get('live_bytes_per_replica') is not None:
+                    entry['ratio_vs_baseline'] = entry['live_bytes_per_replica'] / baseline
+        # Wall-clock seconds per step; per-node and per-table durations are in 'timings'
+        report['step_seconds'] = self.step_seconds
+        report['timings'] = self.timings
+        return report
+
+
+def log_report(report):
+    logger.info(f"{'table':<18}{'compressor':<28}{'level':>6}{'stored/replica':>18}{'stored/written':>16}{'vs base':>9}")
+    for table, e in report['tables'].items():
+        stored = e.get('live_bytes_per_replica')
+        logger.info(f"{table:<18}{str(e['compressor'] or '-'):<28}{str(e['level'] or '-'):>6}"
+                    f"{(f'{stored / 1024 / 1024:.1f} MB' if stored is not None else '-'):>18}"
+                    f"{(format(e['stored_to_written_ratio'], '.3f') if 'stored_to_written_ratio' in e else '-'):>16}"
+                    f"{(format(e['ratio_vs_baseline'], '.3f') if 'ratio_vs_baseline' in e else '-'):>9}")
+    for step, seconds in report['step_seconds'].items():
+        logger.info(f"  {step}: {seconds:.1f}s")
+
+
+def main():
+    opts = parse_args()
+    steps = [s.strip() for s in opts.steps.split(',') if s.strip()]
+    unknown = set(steps) - set(STEPS)
+    if unknown:
+        logger.error(f"Unknown steps: {', '.join(sorted(unknown))}")
+        sys.exit(2)
+
+    hosts = [h.strip() for h in opts.hosts.split(',') if h.strip()]
+    clients, live_nodes = build_clients(hosts, opts.base_url or f"http://{{node}}:{opts.port}", opts.timeout,
+                                        discover=not opts.no_discover)
+    logger.info(f"Harvesting {opts.keyspace} on {len(clients)} nodes: {', '.join(clients)}; steps: {', '.join(steps)}")
+
+    load_summary = None
+    if opts.load_summary:
+        with open(opts.load_summary) as f:
+            load_summary = json.load(f)
+
+    tables = [t.strip() for t in opts.tables.split(',') if t.strip()]
+    retrain_tables = [t.strip() for t in opts.retrain_tables.split(',') if t.strip()]
+    harvester = StorageHarvester(clients, opts.keyspace, tables, retrain_tables, steps, opts.rf,
+                                 opts.bytes_written, load_summary, opts.baseline_table, live_nodes)
+    report = harvester.run()
+    log_report(report)
+
+    if opts.output:
+        with open(opts.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Report written to {opts.output}")
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
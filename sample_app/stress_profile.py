@@ -0,0 +1,665 @@
+#!/usr/bin/env python3
+"""
+Run cassandra-stress `user` profiles (YAML) from Python.
+
+Reads the same profile format as `cassandra-stress user profile=...`:
+
+    keyspace / keyspace_definition   created unless the keyspace exists
+    table / table_definition         created unless the table exists
+    columnspec                       per column: size, population, cluster distributions
+    insert                           partitions per batch and batchtype (UNLOGGED, LOGGED)
+    queries                          named CQL with fields: samerow | multirow
+
+Supported distributions are fixed(N), uniform(MIN..MAX), gaussian|normal(MIN..MAX[,STDVRNG]),
+exp(MIN..MAX), extreme(MIN..MAX,SHAPE) and seq(MIN..MAX); numbers may use k/m/b suffixes.
+Defaults follow cassandra-stress: size uniform(4..8), population uniform(1..100b), cluster fixed(1).
+
+Values are a function of (column, population seed), as in cassandra-stress, so a
+key seed always maps to the same key bytes and reads find what inserts wrote.
+They are generated a block of partitions at a time with NumPy. Operations run
+asynchronously in several processes through OpenLoopRunner, either at a fixed
+--rate (like `-rate fixed=N/s`) or closed-loop with --concurrency requests in
+flight per worker (like `-rate threads=N`).
+
+Usage:
+    ./stress_profile.py -s node1,node2 --ops insert=1 -n 1000000
+    ./stress_profile.py -s node1 --profile ../cassandra_stress/key_value.yaml \\
+        --ops insert=1,select=1 --duration 3600 --rate 100000 --pop "seq(1..1000000)"
+    ./stress_profile.py --dry_run -n 1000000     # generation speed only, no cluster
+"""
+
+import os
+import re
+import sys
+import time
+import uuid
+import zlib
+import queue
+import string
+import logging
+import argparse
+import datetime
+from multiprocessing import get_context, cpu_count
+
+import numpy as np
+import yaml
+
+from rowgen import id_words, id_uniforms
+from open_loop import OpenLoopRunner, log_open_loop_result, merge_results
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cassandra_stress', 'key_value.yaml')
+DEFAULT_SIZE = 'uniform(4..8)'
+DEFAULT_POPULATION = 'uniform(1..100b)'
+DEFAULT_CLUSTER = 'fixed(1)'
+# Partitions generated per NumPy call
+PARTITION_BLOCK = 1024
+# Row seeds within a partition are partition_seed * ROW_STRIDE + row
+ROW_STRIDE = 1 << 24
+MASK64 = 0xFFFFFFFFFFFFFFFF
+SUFFIXES = {'k': 10 ** 3, 'm': 10 ** 6, 'b': 10 ** 9}
+TEXT_CHARS = np.frombuffer((string.ascii_letters + string.digits + '_-').encode(), dtype=np.uint8)
+EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def parse_number(text):
+    text = text.strip().lower()
+    if text and text[-1] in SUFFIXES:
+        return int(float(text[:-1]) * SUFFIXES[text[-1]])
+    return int(float(text))
+
+
+class Distribution:
+    """Integer distribution over [low, high]; from_uniform maps uniforms in [0, 1) onto it"""
+
+    def __init__(self, low, high):
+        self.low = low
+        self.high = high
+
+    def from_uniform(self, u):
+        raise NotImplementedError
+
+    def sample(self, rng, n):
+        return self.from_uniform(rng.random(n))
+
+    def split(self, worker_index, workers):
+        """Per-worker view; only seq needs to partition its range"""
+        return self
+
+    def _clip(self, x):
+        return np.clip(np.floor(x), self.low, self.high).astype(np.int64)
+
+
+class Fixed(Distribution):
+    def from_uniform(self, u):
+        return np.full(len(u), self.low, dtype=np.int64)
+
+
+class Uniform(Distribution):
+    def from_uniform(self, u):
+        return self._clip(self.low + u * (self.high - self.low + 1))
+
+
+class Gaussian(Distribution):
+    def __init__(self, low, high, stdvrng=3.0):
+        super().__init__(low, high)
+        self.mean = (low + high) / 2.0
+        self.stdev = (self.mean - low) / stdvrng
+
+    def sample(self, rng, n):
+        return self._clip(rng.normal(self.mean, self.stdev, n) + 0.5)
+
+    def from_uniform(self, u):
+        # Box-Muller on the uniform and its golden-ratio rotation
+        v = (u + 0.6180339887498949) % 1.0
+        z = np.sqrt(-2.0 * np.log1p(-u)) * np.cos(2.0 * np.pi * v)
+        return self._clip(self.mean + z * self.stdev + 0.5)
+
+
+class Exponential(Distribution):
+    """Exponential from low, scaled so 99.9% of values fall below high"""
+
+    def from_uniform(self, u):
+        return self._clip(self.low + (self.high - self.low) * -np.log1p(-u) / np.log(1000.0))
+
+
+class Extreme(Distribution):
+    """Weibull with the given shape, scaled like Exponential"""
+
+    def __init__(self, low, high, shape):
+        super().__init__(low, high)
+        self.shape = shape
+
+    def from_uniform(self, u):
+        scale = np.log(1000.0) ** (1.0 / self.shape)
+        return self._clip(self.low + (self.high - self.low) * (-np.log1p(-u)) ** (1.0 / self.shape) / scale)
+
+
+class Sequence(Distribution):
+    """seq(low..high): walks the range in order and wraps; workers take interleaved values"""
+
+    def __init__(self, low, high, offset=0, stride=1):
+        super().__init__(low, high)
+        self.offset = offset
+        self.stride = stride
+        self.position = 0
+
+    def split(self, worker_index, workers):
+        return Sequence(self.low, self.high, worker_index, workers)
+
+    def sample(self, rng, n):
+        steps = self.offset + (self.position + np.arange(n, dtype=np.int64)) * self.stride
+        self.position += n
+        return self.low + steps % (self.high - self.low + 1)
+
+    def from_uniform(self, u):
+        return Uniform(self.low, self.high).from_uniform(u)
+
+
+def parse_distribution(spec):
+    m = re.match(r'^\s*(\w+)\((.*)\)\s*$', str(spec))
+    if not m:
+        raise ValueError(f"Invalid distribution '{spec}'")
+    name, args = m.group(1).lower(), [a.strip() for a in m.group(2).split(',')]
+    low, _, high = args[0].partition('..')
+    low = parse_number(low)
+    high = parse_number(high) if high else low
+    if name == 'fixed':
+        return Fixed(low, low)
+    if name == 'uniform':
+        return Uniform(low, high)
+    if name in ('gaussian', 'gauss', 'normal', 'norm'):
+        return Gaussian(low, high, float(args[1]) if len(args) > 1 else 3.0)
+    if name in ('exp', 'exponential'):
+        return Exponential(low, high)
+    if name in ('extreme', 'extr', 'weibull'):
+        return Extreme(low, high, float(args[1]) if len(args) > 1 else 1.0)
+    if name == 'seq':
+        return Sequence(low, high)
+    raise ValueError(f"Unsupported distribution '{name}' in '{spec}'")
+
+
+def _split_top_level(text):
+    """Split on commas that are not inside (), <> or quotes"""
+    parts, depth, quoted, current = [], 0, False, ''
+    for ch in text:
+        if ch in '\'"':
+            quoted = not quoted
+        elif not quoted and ch in '(<':
+            depth += 1
+        elif not quoted and ch in ')>':
+            depth -= 1
+        elif not quoted and depth == 0 and ch == ',':
+            parts.append(current.strip())
+            current = ''
+            continue
+        current += ch
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+def _column_name(token):
+    """Column name as CQL stores it: quoted names keep their case, unquoted ones are folded to lower case"""
+    token = token.strip()
+    return token[1:-1].replace('""', '"') if token.startswith('"') else token.lower()
+
+
+def _cql_name(name):
+    """Column name as it must be written in a statement, quoted unless it is a plain lower-case identifier"""
+    return name if re.match(r'^[a-z_][a-z0-9_]*$', name) else '"' + name.replace('"', '""') + '"'
+
+
+def match_columnspec(names, columnspec):
+    """
+    {column: spec} for the table's columns. A columnspec name matches a column
+    spelled exactly the same (quotes optional) or, failing that, the one column
+    equal to it ignoring case; entries matching nothing are logged and ignored.
+    """
+    by_lower = {}
+    for name in names:
+        by_lower.setdefault(name.lower(), []).append(name)
+    specs, unmatched = {}, []
+    for spec in columnspec or []:
+        raw = str(spec['name']).strip()
+        name = raw[1:-1].replace('""', '"') if raw.startswith('"') else raw
+        if name not in names and not raw.startswith('"'):
+            folded = by_lower.get(name.lower(), [])
+            name = folded[0] if len(folded) == 1 else None
+        if name not in names:
+            unmatched.append(raw)
+        else:
+            specs[name] = spec
+    if unmatched:
+        logger.warning(f"Ignoring columnspec entries that match no column: {', '.join(unmatched)} "
+                       f"(columns: {', '.join(names)})")
+    return specs
+
+
+def parse_table_definition(cql):
+    """CREATE TABLE ... -> ([(column, type)], partition key columns, clustering columns)"""
+    start = cql.index('(')
+    depth = 0
+    for end in range(start, len(cql)):
+        depth += {'(': 1, ')': -1}.get(cql[end], 0)
+        if depth == 0:
+            break
+    columns, partition_key, clustering = [], [], []
+    for item in _split_top_level(cql[start + 1:end]):
+        m = re.match(r'^primary\s+key\s*\((.*)\)$', item, re.IGNORECASE | re.DOTALL)
+        if m:
+            keys = _split_top_level(m.group(1))
+            first = keys[0]
+            if first.startswith('('):
+                partition_key = [_column_name(k) for k in _split_top_level(first[1:-1])]
+            else:
+                partition_key = [_column_name(first)]
+            clustering = [_column_name(k) for k in keys[1:]]
+            continue
+        name, cql_type = item.split(None, 1)
+        inline_key = re.search(r'\s+primary\s+key\s*$', cql_type, re.IGNORECASE)
+        if inline_key:
+            cql_type = cql_type[:inline_key.start()]
+            partition_key = [_column_name(name)]
+        columns.append((_column_name(name), cql_type.strip().lower()))
+    if not partition_key:
+        raise ValueError("Table definition has no PRIMARY KEY")
+    return columns, partition_key, clustering
+
+
+def load_profile(path):
+    with open(path) as f:
+        profile = yaml.safe_load(f)
+    for key in ('keyspace', 'table', 'table_definition'):
+        if not profile.get(key):
+            raise ValueError(f"Profile {path} has no '{key}'")
+    ignored = set(profile.get('insert') or {}) - {'partitions', 'batchtype'}
+    if ignored:
+        logger.warning(f"Ignoring unsupported insert options: {', '.join(sorted(ignored))}")
+    return profile
+
+
+class ProfileWorkload:
+    """
+    Vectorized row generation for one profile. Partitions are identified by a
+    seed drawn from the partition key population; every column value is a pure
+    function of (profile seed, column, value seed).
+    """
+
+    def __init__(self, profile, seed=0, population=None, worker_index=0, workers=1, rng=None):
+        self.profile = profile
+        self.keyspace = profile['keyspace']
+        self.table = profile['table']
+        self.columns, self.partition_key, self.clustering = parse_table_definition(profile['table_definition'])
+        self.names = [name for name, _ in self.columns]
+        self.types = dict(self.columns)
+        self.seed = seed
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+        specs = match_columnspec(self.names, profile.get('columnspec'))
+        self.size = {}
+        self.population = {}
+        self.cluster = {}
+        for name in self.names:
+            spec = specs.get(name, {})
+            self.size[name] = parse_distribution(spec.get('size', DEFAULT_SIZE))
+            self.population[name] = parse_distribution(spec.get('population', DEFAULT_POPULATION)).split(worker_index, workers)
+            self.cluster[name] = parse_distribution(spec.get('cluster', DEFAULT_CLUSTER))
+        # Partitions are drawn from the first partition key column's population (or -pop)
+        key_population = parse_distribution(population) if population else self.population[self.partition_key[0]]
+        self.write_keys = key_population.split(worker_index, workers)
+        self.read_keys = key_population.split(worker_index, workers)
+
+        insert = profile.get('insert') or {}
+        self.partitions_per_batch = parse_distribution(insert.get('partitions', 'fixed(1)'))
+        self.batch_type = str(insert.get('batchtype', 'LOGGED')).upper()
+        self.column_seeds = {name: (seed * 1000003 + zlib.crc32(name.encode())) & MASK64 for name in self.names}
+
+    def rows_per_partition(self, partition_seeds):
+        counts = np.ones(len(partition_seeds), dtype=np.int64)
+        if self.clustering:
+            u = id_uniforms(self.seed ^ 0x5bd1e995, partition_seeds, len(self.clustering))
+            for k, name in enumerate(self.clustering):
+                counts *= np.maximum(1, self.cluster[name].from_uniform(u[:, k]))
+        return np.minimum(counts, ROW_STRIDE)
+
+    def column_values(self, name, value_seeds):
+        """Python values for column `name`, one per value seed"""
+        cql_type = self.types[name]
+        n = len(value_seeds)
+        if n == 0:
+            return []
+        if cql_type in ('blob', 'text', 'varchar', 'ascii'):
+            sizes = self.size[name].from_uniform(id_uniforms(self.column_seeds[name] ^ 1, value_seeds, 1)[:, 0])
+            longest = int(sizes.max())
+            raw = id_words(self.column_seeds[name], value_seeds, max(1, (longest + 7) // 8)).view(np.uint8)
+            raw = raw.reshape(n, -1)[:, :longest]
+            if cql_type != 'blob':
+                raw = TEXT_CHARS[raw & 63]
+            if (sizes == longest).all():
+                values = [r.tobytes() for r in raw]
+            else:
+                values = [r.tobytes()[:s] for r, s in zip(raw, sizes.tolist())]
+            return values if cql_type == 'blob' else [v.decode('ascii') for v in values]
+
+        bits = id_words(self.column_seeds[name], value_seeds, 2)
+        if cql_type in ('int', 'bigint', 'smallint', 'tinyint', 'varint', 'counter'):
+            width = {'int': 31, 'smallint': 15, 'tinyint': 7}.get(cql_type, 63)
+            return (bits[:, 0] >> np.uint64(64 - width)).astype(np.int64).tolist()
+        if cql_type in ('float', 'double', 'decimal'):
+            return ((bits[:, 0] >> np.uint64(11)).astype(np.float64) * (1e6 / (1 << 53))).tolist()
+        if cql_type == 'boolean':
+            return (bits[:, 0] & np.uint64(1)).astype(bool).tolist()
+        if cql_type == 'timestamp':
+            millis = (bits[:, 0] % np.uint64(50 * 365 * 86400 * 1000)).astype(np.int64)
+            return [EPOCH + datetime.timedelta(milliseconds=ms) for ms in millis.tolist()]
+        if cql_type == 'date':
+            days = (bits[:, 0] % np.uint64(50 * 365)).astype(np.int64)
+            return [EPOCH.date() + datetime.timedelta(days=d) for d in days.tolist()]
+        if cql_type in ('uuid', 'timeuuid'):
+            version = 1 if cql_type == 'timeuuid' else 4
+            return [uuid.UUID(bytes=b, version=version) for b in (r.tobytes() for r in bits.view(np.uint8).reshape(n, 16))]
+        if cql_type == 'inet':
+            return ['.'.join(str(b) for b in r[:4]) for r in bits.view(np.uint8).reshape(n, 16).tolist()]
+        raise ValueError(f"Column {name}: CQL type '{cql_type}' is not supported")
+
+    def rows(self, partition_seeds, columns=None, row_index=None):
+        """
+        Row tuples (in `columns` order, default all table columns) for the given
+        partitions: every row of each partition, or only row `row_index[i]` of partition i.
+        """
+        columns = columns or self.names
+        partition_seeds = np.asarray(partition_seeds, dtype=np.int64)
+        if row_index is None:
+            counts = self.rows_per_partition(partition_seeds)
+            seeds = np.repeat(partition_seeds, counts)
+            rows_in = np.arange(len(seeds), dtype=np.int64) - np.repeat(np.cumsum(counts) - counts, counts)
+        else:
+            counts = np.ones(len(partition_seeds), dtype=np.int64)
+            seeds, rows_in = partition_seeds, np.asarray(row_index, dtype=np.int64)
+        with np.errstate(over='ignore'):
+            row_seeds = seeds * ROW_STRIDE + rows_in
+
+        values = []
+        for name in columns:
+            if name in self.partition_key:
+                values.append(self.column_values(name, seeds))
+            elif name in self.clustering:
+                values.append(self.column_values(name, row_seeds))
+            else:
+                values.append(self.column_values(name, self.population[name].sample(self.rng, len(seeds))))
+        return list(zip(*values)), counts
+
+    def insert_rows(self, partitions):
+        """Rows of `partitions` partitions drawn from the write population, and the row count of each"""
+        return self.rows(self.write_keys.sample(self.rng, partitions))
+
+    def read_rows(self, count, columns, multirow=False):
+        """One row per partition drawn from the read population, restricted to `columns`"""
+        seeds = self.read_keys.sample(self.rng, count)
+        row_index = np.zeros(count, dtype=np.int64)
+        if self.clustering:
+            counts = self.rows_per_partition(seeds)
+            row_index = (self.rng.random(count) * counts).astype(np.int64) if multirow else row_index
+        rows, _ = self.rows(seeds, columns, row_index)
+        return rows
+
+
+def parse_ops(spec, queries):
+    """'ops(insert=1,select=1)' or 'insert=1,select=1' -> {'insert': 1.0, 'select': 1.0}"""
+    m = re.match(r'^\s*ops\((.*)\)\s*$', spec)
+    weights = {}
+    for part in (m.group(1) if m else spec).split(','):
+        name, _, weight = part.strip().partition('=')
+        if name != 'insert' and name not in queries:
+            raise ValueError(f"Unknown operation '{name}'; the profile defines insert and {', '.join(queries) or 'no queries'}")
+        weights[name] = float(weight or 1)
+    if not weights or sum(weights.values()) <= 0:
+        raise ValueError("At least one operation needs a positive weight")
+    return weights
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Run a cassandra-stress user profile with async multi-process execution')
+    parser.add_argument('-s', '--hosts', default="127.0.0.1", help='Comma-separated ScyllaDB node Names or IPs')
+    parser.add_argument('-u', '--username', default="cassandra", help='Cassandra username')
+    parser.add_argument('-p', '--password', default="cassandra", help='Cassandra password')
+    parser.add_argument('--profile', default=DEFAULT_PROFILE, help='cassandra-stress YAML profile')
+    parser.add_argument('--ops', default='insert=1', help="Operation weights, e.g. 'ops(insert=1,select=1)'")
+    parser.add_argument('-n', '--ops_count', type=int, default=0, help='Total operations across workers (0 = run for --duration)')
+    parser.add_argument('--duration', type=float, default=60, help='Run time in seconds when -n is not given')
+    parser.add_argument('--warmup', type=float, default=0, help='Seconds at the start excluded from the histograms')
+    parser.add_argument('--rate', type=float, default=0, help='Total target ops/s across workers (0 = closed-loop)')
+    parser.add_argument('--concurrency', type=int, default=200, help='Maximum in-flight operations per worker')
+    parser.add_argument('--pop', default=None, help="Override the partition key population, e.g. 'seq(1..1000000)'")
+    parser.add_argument('--seed', type=int, default=0, help='Seed mapping population values to column values')
+    parser.add_argument('--cl', default="LOCAL_QUORUM", help="Consistency Level (ONE, TWO, QUORUM, etc.)")
+    parser.add_argument('--dc', default='dc1', help='Local datacenter name for ScyllaDB')
+    parser.add_argument('--workers', type=int, default=0, help='Number of worker processes (0 = cpu_count())')
+    parser.add_argument('--shard_aware', action="store_true", help='If set, you should pass host:19042 to connect to shard-aware port')
+    parser.add_argument('--progress_interval', type=float, default=10.0, help='Seconds between progress reports (worker 0)')
+    parser.add_argument('--dry_run', action="store_true", help='Only generate -n insert batches and report generation speed; no cluster needed')
+    return parser.parse_args()
+
+
+class ProfileOperations:
+    """Turns operation numbers into async requests; issue(i) is OpenLoopRunner's callback"""
+
+    def __init__(self, session, workload, weights, consistency_level, ops_limit, rng):
+        from cassandra import ConsistencyLevel
+        from cassandra.query import BatchStatement, BatchType
+
+        self.session = session
+        self.workload = workload
+        self.ops_limit = ops_limit
+        self.rng = rng
+        self.labels = list(weights)
+        p = np.array([weights[op] for op in self.labels], dtype=np.float64)
+        self.probabilities = p / p.sum()
+        self.ops_block = []
+        self.consistency = getattr(ConsistencyLevel, consistency_level)
+        self.rows_written = 0
+
+        self.prepared = {}
+        self.bind_columns = {}
+        self.multirow = {}
+        self.read_blocks = {}
+        queries = workload.profile.get('queries') or {}
+        for label in self.labels:
+            if label == 'insert':
+                cql = (f"INSERT INTO {workload.keyspace}.{workload.table} ({', '.join(_cql_name(n) for n in workload.names)}) "
+                       f"VALUES ({', '.join('?' for _ in workload.names)})")
+            else:
+                cql = queries[label]['cql']
+                self.multirow[label] = str(queries[label].get('fields', 'samerow')).lower() == 'multirow'
+                self.read_blocks[label] = []
+            prepared = session.prepare(cql)
+            prepared.consistency_level = self.consistency
+            self.prepared[label] = prepared
+            self.bind_columns[label] = [c.name for c in prepared.column_metadata]
+
+        self.batch_type = getattr(BatchType, workload.batch_type, BatchType.LOGGED)
+        self.batch_statement = BatchStatement
+        self.insert_block = []
+        self.rows_per_batch = max(1.0, float(workload.partitions_per_batch.sample(rng, 256).mean()
+                                             * workload.rows_per_partition(np.arange(1, 257)).mean()))
+
+    def _next_insert(self):
+        if not self.insert_block:
+            # Keep blocks near PARTITION_BLOCK rows so generation never stalls issuing for long
+            batches = max(1, min(PARTITION_BLOCK, int(PARTITION_BLOCK / self.rows_per_batch)))
+            sizes = self.workload.partitions_per_batch.sample(self.rng, batches)
+            rows, counts = self.workload.insert_rows(int(sizes.sum()))
+            self.rows_per_batch = max(1.0, len(rows) / batches)
+            # Batch i holds every row of its sizes[i] partitions
+            row_ends = np.concatenate(([0], np.cumsum(counts)))
+            partition_ends = np.concatenate(([0], np.cumsum(sizes)))
+            self.insert_block = [rows[row_ends[partition_ends[b]]:row_ends[partition_ends[b + 1]]]
+                                 for b in range(len(sizes) - 1, -1, -1)]
+        return self.insert_block.pop()
+
+    def _next_read(self, label):
+        block = self.read_blocks[label]
+        if not block:
+            block.extend(self.workload.read_rows(PARTITION_BLOCK, self.bind_columns[label], self.multirow[label])[::-1])
+        return block.pop()
+
+    def issue(self, i):
+        if self.ops_limit and i >= self.ops_limit:
+            return None
+        if not self.ops_block:
+            self.ops_block = self.rng.choice(len(self.labels), size=PARTITION_BLOCK, p=self.probabilities).tolist()
+        label = self.labels[self.ops_block.pop()]
+        if label != 'insert':
+            return label, self.session.execute_async(self.prepared[label], self._next_read(label))
+        rows = self._next_insert()
+        self.rows_written += len(rows)
+        if len(rows) == 1:
+            return label, self.session.execute_async(self.prepared[label], rows[0])
+        batch = self.batch_statement(batch_type=self.batch_type, consistency_level=self.consistency)
+        for row in rows:
+            batch.add(self.prepared[label], row)
+        return label, self.session.execute_async(batch)
+
+
+def create_schema(session, profile):
+    from cassandra import AlreadyExists
+
+    for key in ('keyspace_definition', 'table_definition'):
+        if profile.get(key):
+            try:
+                session.execute(profile[key])
+            except AlreadyExists:
+                pass
+
+
+def _worker_run(worker_index, opts, profile, weights, hosts, local_loopback, workers, ops_limit, rate, result_queue):
+    from loader_multithread import _build_cluster_and_session, _worker_seed
+
+    cluster = session = None
+    try:
+        rng = np.random.default_rng(_worker_seed(worker_index))
+        workload = ProfileWorkload(profile, opts.seed, opts.pop, worker_index, workers, rng)
+        cluster, session = _build_cluster_and_session(hosts, opts.username, opts.password, opts.dc, local_loopback, opts.shard_aware)
+        session.set_keyspace(workload.keyspace)
+        ops = ProfileOperations(session, workload, weights, opts.cl, ops_limit, rng)
+        runner = OpenLoopRunner(ops.issue, rate=rate, duration=None if ops_limit else opts.duration,
+                                max_in_flight=opts.concurrency, warmup=opts.warmup, report_interval=opts.progress_interval,
+                                logger=logger if worker_index == 0 else None, name=f"worker {worker_index}")
+        result = runner.run()
+        if runner.last_error is not None:
+            logger.warning(f"Worker {worker_index} last error: {runner.last_error}")
+        result_queue.put(('done', worker_index, result, ops.rows_written))
+    except Exception as e:
+        result_queue.put(('error', worker_index, str(e), 0))
+    finally:
+        try:
+            if session is not None:
+                session.shutdown()
+        except Exception:
+            pass
+        try:
+            if cluster is not None:
+                cluster.shutdown()
+        except Exception:
+            pass
+
+
+def run_profile(opts, profile, weights, hosts):
+    from loader_multithread import _build_cluster_and_session
+
+    local_loopback = (hosts and hosts[0] == '127.0.0.1')
+    ctrl_cluster, ctrl_session = _build_cluster_and_session(hosts, opts.username, opts.password, opts.dc, local_loopback, opts.shard_aware)
+    try:
+        create_schema(ctrl_session, profile)
+    finally:
+        ctrl_cluster.shutdown()
+
+    procs = max(1, opts.workers if opts.workers > 0 else cpu_count())
+    rate = opts.rate / procs if opts.rate else 0
+    mix = ', '.join(f"{op}={w:g}" for op, w in weights.items())
+    length = f"{opts.ops_count} ops" if opts.ops_count else f"{opts.duration:.0f}s"
+    logger.info(f"Running {profile['keyspace']}.{profile['table']} with {procs} workers for {length}: ops({mix}), "
+                + (f"{opts.rate:,.0f} ops/s open-loop" if opts.rate else f"closed-loop with {opts.concurrency} in flight/worker"))
+
+    ctx = get_context("spawn")
+    result_queue = ctx.Queue()
+    processes = {}
+    for w in range(procs):
+        # Spread -n over the workers; the first ones take the remainder
+        ops_limit = opts.ops_count // procs + (1 if w < opts.ops_count % procs else 0) if opts.ops_count else 0
+        proc = ctx.Process(target=_worker_run,
+                           args=(w, opts, profile, weights, hosts, local_loopback, procs, ops_limit, rate, result_queue))
+        proc.start()
+        processes[w] = proc
+
+    results = []
+    rows_written = 0
+    pending = set(processes)
+    while pending:
+        try:
+            kind, w, payload, rows = result_queue.get(timeout=1)
+        except queue.Empty:
+            for w, proc in processes.items():
+                if w in pending and not proc.is_alive() and proc.exitcode not in (None, 0):
+                    logger.error(f"Worker {w} exited with code {proc.exitcode} without reporting")
+                    pending.discard(w)
+            continue
+        pending.discard(w)
+        if kind == 'error':
+            logger.error(f"Worker {w} failed: {payload}")
+        else:
+            results.append(payload)
+            rows_written += rows
+    for proc in processes.values():
+        proc.join()
+
+    if results:
+        merged = merge_results(results, name=profile['table'])
+        log_open_loop_result(logger, merged)
+        if rows_written:
+            logger.info(f"[{profile['table']}] rows written: {rows_written} ({rows_written / max(merged['elapsed'], 1e-9):,.0f} rows/s)")
+    return results
+
+
+def dry_run(opts, profile):
+    workload = ProfileWorkload(profile, opts.seed, opts.pop)
+    batches = opts.ops_count or 100000
+    start = time.perf_counter()
+    rows = payload = 0
+    for first in range(0, batches, PARTITION_BLOCK):
+        sizes = workload.partitions_per_batch.sample(workload.rng, min(PARTITION_BLOCK, batches - first))
+        block, _ = workload.insert_rows(int(sizes.sum()))
+        rows += len(block)
+        payload += sum(len(v) if isinstance(v, (bytes, str)) else 8 for row in block for v in row)
+    elapsed = time.perf_counter() - start
+    logger.info(f"Generated {batches} insert batches, {rows} rows, {payload / 1024 / 1024:.1f} MB in {elapsed:.2f}s: "
+                f"{rows / elapsed:,.0f} rows/s, {payload / 1024 / 1024 / elapsed:.1f} MB/s")
+    logger.info(f"Sample row: {workload.insert_rows(1)[0][0]!r:.200}")
+
+
+def main():
+    opts = parse_args()
+    try:
+        profile = load_profile(opts.profile)
+        weights = parse_ops(opts.ops, profile.get('queries') or {})
+        # Fail on unsupported types or distributions before starting workers
+        ProfileWorkload(profile, opts.seed, opts.pop).insert_rows(1)
+        if opts.dry_run:
+            dry_run(opts, profile)
+            return
+    except ValueError as e:
+        logger.error(str(e))
+        sys.exit(2)
+    hosts = [h.strip() for h in opts.hosts.split(',') if h.strip()]
+    start = time.time()
+    results = run_profile(opts, profile, weights, hosts)
+    logger.info(f"Total run time: {time.time() - start:.1f}s")
+    sys.exit(0 if results else 1)
+
+
+if __name__ == "__main__":
+    main()
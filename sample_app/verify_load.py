@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Verify a seeded load by reading every id back and comparing it, field by
+field, with the row regenerated from (seed, id).
+
+Nothing is stored: each worker process pulls id ranges from a shared queue,
+regenerates the expected chunk with RowGenerator(seed, deterministic=True)
+and keeps --concurrency SELECTs in flight, comparing rows in the driver
+callbacks. Verification therefore runs at read throughput.
+
+Usage:
+    ./loader_multithread.py -s node1,node2 -r 10000000 --seed 42
+    ./verify_load.py -s node1,node2 -r 10000000 --seed 42 --workers 8
+"""
+
+import sys
+import time
+import queue
+import logging
+import argparse
+import threading
+from multiprocessing import get_context, cpu_count
+
+import numpy as np
+from cassandra import ConsistencyLevel
+
+from rowgen import RowGenerator, COLUMNS
+from loader_multithread import _build_cluster_and_session, chunked_ids
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Read back a seeded load and verify every row')
+    parser.add_argument('-s', '--hosts', default="127.0.0.1", help='Comma-separated ScyllaDB node Names or IPs')
+    parser.add_argument('-u', '--username', default="cassandra", help='Cassandra username')
+    parser.add_argument('-p', '--password', default="cassandra", help='Cassandra password')
+    parser.add_argument('-k', '--keyspace', default="mykeyspace", help='Keyspace name')
+    parser.add_argument('-t', '--table', default="myTable", help='Table name')
+    parser.add_argument('-r', '--row_count', type=int, default=100000, help='Number of ids to verify')
+    parser.add_argument('--start_id', type=int, default=1, help='First id to verify')
+    parser.add_argument('--seed', type=int, required=True, help='Seed the load was generated with')
+    parser.add_argument('-b', '--batch_size', type=int, default=2000, help='Ids regenerated per chunk')
+    parser.add_argument('--range_size', type=int, default=20000, help='Ids per work range handed to a worker on demand')
+    parser.add_argument('--concurrency', type=int, default=200, help='In-flight reads per worker')
+    parser.add_argument('--cl', default="LOCAL_QUORUM", help="Consistency Level (ONE, TWO, QUORUM, etc.)")
+    parser.add_argument('--dc', default='dc1', help='Local datacenter name for ScyllaDB')
+    parser.add_argument('--workers', type=int, default=0, help='Number of worker processes (0 = cpu_count())')
+    parser.add_argument('--shard_aware', action="store_true", help='If set, you should pass host:19042 to connect to shard-aware port')
+    parser.add_argument('--progress_interval', type=float, default=5.0, help='Seconds between aggregate progress reports')
+    parser.add_argument('--max_samples', type=int, default=10, help='Mismatched ids to print per worker')
+    return parser.parse_args()
+
+
+def compare_row(expected, row):
+    """
+    Names of the columns where a row read back differs from the generated tuple.
+    balance is a CQL float, so it is compared at float32 precision; pdate comes
+    back as a cassandra.util.Date and is compared as 'YYYY-MM-DD'.
+    """
+    mismatched = []
+    for name, value in zip(COLUMNS, expected):
+        actual = getattr(row, name.lower(), None)
+        if name == 'balance':
+            same = actual is not None and np.float32(actual) == np.float32(value)
+        elif name == 'pdate':
+            same = actual is not None and str(actual) == value
+        else:
+            same = actual == value
+        if not same:
+            mismatched.append(name)
+    return mismatched
+
+
+def new_counters():
+    return {'checked': 0, 'ok': 0, 'missing': 0, 'mismatched': 0, 'errors': 0, 'fields': {}, 'samples': []}
+
+
+class InflightVerifier:
+    """Keeps up to `concurrency` reads in flight and compares each result in its callback"""
+
+    def __init__(self, session, prepared, concurrency, max_samples):
+        self.session = session
+        self.prepared = prepared
+        self.concurrency = concurrency
+        self.max_samples = max_samples
+        self.slots = threading.Semaphore(concurrency)
+        self.lock = threading.Lock()
+        self.counters = new_counters()
+
+    def _on_success(self, rows, expected):
+        row = rows[0] if rows else None
+        mismatched = compare_row(expected, row) if row is not None else None
+        with self.lock:
+            c = self.counters
+            c['checked'] += 1
+            if row is None:
+                c['missing'] += 1
+                if len(c['samples']) < self.max_samples:
+                    c['samples'].append((expected[0], 'missing'))
+            elif mismatched:
+                c['mismatched'] += 1
+                for name in mismatched:
+                    c['fields'][name] = c['fields'].get(name, 0) + 1
+                if len(c['samples']) < self.max_samples:
+                    c['samples'].append((expected[0], ','.join(mismatched)))
+            else:
+                c['ok'] += 1
+        self.slots.release()
+
+    def _on_error(self, exc, expected):
+        with self.lock:
+            self.counters['checked'] += 1
+            self.counters['errors'] += 1
+            if len(self.counters['samples']) < self.max_samples:
+                self.counters['samples'].append((expected[0], f"error: {exc}"))
+        self.slots.release()
+
+    def submit(self, expected_rows):
+        for expected in expected_rows:
+            self.slots.acquire()
+            future = self.session.execute_async(self.prepared, (expected[0],))
+            future.add_callbacks(self._on_success, self._on_error,
+                                 callback_args=(expected,), errback_args=(expected,))
+
+    def snapshot(self):
+        with self.lock:
+            c = self.counters
+            return dict(c, fields=dict(c['fields']), samples=list(c['samples']))
+
+    def drain(self):
+        for _ in range(self.concurrency):
+            self.slots.acquire()
+        for _ in range(self.concurrency):
+            self.slots.release()
+
+
+def _worker_verify_ranges(worker_index, opts, hosts, local_loopback, range_queue, progress_queue):
+    rowgen = RowGenerator(seed=opts.seed, deterministic=True)
+    verifier = None
+    cluster = session = None
+    try:
+        cluster, session = _build_cluster_and_session(hosts, opts.username, opts.password, opts.dc, local_loopback, opts.shard_aware)
+        prepared = session.prepare(f"SELECT {', '.join(COLUMNS)} FROM {opts.keyspace}.{opts.table} WHERE id = ?")
+        prepared.consistency_level = getattr(ConsistencyLevel, opts.cl)
+        verifier = InflightVerifier(session, prepared, opts.concurrency, opts.max_samples)
+
+        while True:
+            id_range = range_queue.get()
+            if id_range is None:
+                break
+            start_id, end_id = id_range
+            for (s_id, e_id) in chunked_ids(start_id, end_id, opts.batch_size):
+                verifier.submit(rowgen.generate(s_id, e_id - s_id + 1))
+                progress_queue.put(('progress', worker_index, verifier.snapshot()))
+        verifier.drain()
+        progress_queue.put(('done', worker_index, verifier.snapshot()))
+    except Exception as e:
+        progress_queue.put(('error', worker_index, verifier.snapshot() if verifier else new_counters(), str(e)))
+    finally:
+        try:
+            if session is not None:
+                session.shutdown()
+        except Exception:
+            pass
+        try:
+            if cluster is not None:
+                cluster.shutdown()
+        except Exception:
+            pass
+
+
+def _merge(counters_by_worker):
+    total = new_counters()
+    for c in counters_by_worker.values():
+        for key in ('checked', 'ok', 'missing', 'mismatched', 'errors'):
+            total[key] += c[key]
+        for name, n in c['fields'].items():
+            total['fields'][name] = total['fields'].get(name, 0) + n
+        total['samples'].extend(c['samples'])
+    return total
+
+
+def verify_parallel(opts, hosts):
+    local_loopback = (hosts and hosts[0] == '127.0.0.1')
+    procs = max(1, opts.workers if opts.workers > 0 else cpu_count())
+    end_id = opts.start_id + opts.row_count - 1
+
+    ctx = get_context("spawn")
+    range_queue = ctx.Queue()
+    progress_queue = ctx.Queue()
+    ranges = list(chunked_ids(opts.start_id, end_id, max(opts.batch_size, opts.range_size)))
+    for id_range in ranges:
+        range_queue.put(id_range)
+    for _ in range(procs):
+        range_queue.put(None)
+
+    logger.info(f"Verifying ids [{opts.start_id}-{end_id}] with seed {opts.seed}: {procs} workers, "
+                f"{len(ranges)} ranges, in-flight/worker={opts.concurrency}")
+    processes = {}
+    for w in range(procs):
+        proc = ctx.Process(target=_worker_verify_ranges,
+                           args=(w, opts, hosts, local_loopback, range_queue, progress_queue))
+        proc.start()
+        processes[w] = proc
+
+    counters = {w: new_counters() for w in processes}
+    finished = set()
+    start = last_report = time.time()
+    checked_at_last_report = 0
+    while len(finished) < len(processes):
+        try:
+            message = progress_queue.get(timeout=1)
+        except queue.Empty:
+            message = None
+            for w, proc in processes.items():
+                if w not in finished and not proc.is_alive() and proc.exitcode not in (None, 0):
+                    logger.error(f"Worker {w} exited with code {proc.exitcode} without reporting")
+                    finished.add(w)
+        if message is not None:
+            kind, w, snapshot = message[0], message[1], message[2]
+            counters[w] = snapshot
+            if kind == 'error':
+                logger.error(f"Worker {w} failed after {snapshot['checked']} rows: {message[3]}")
+            if kind in ('done', 'error'):
+                finished.add(w)
+
+        now = time.time()
+        if now - last_report >= opts.progress_interval:
+            total = _merge(counters)
+            logger.info(f"Progress: {total['checked']}/{opts.row_count} checked, ok={total['ok']}, "
+                        f"missing={total['missing']}, mismatched={total['mismatched']}, errors={total['errors']}, "
+                        f"{(total['checked'] - checked_at_last_report) / (now - last_report):,.0f} rows/s")
+            last_report, checked_at_last_report = now, total['checked']
+
+    for proc in processes.values():
+        proc.join()
+    total = _merge(counters)
+    elapsed = time.time() - start
+    logger.info(f"Verified {total['checked']} rows in {elapsed:.1f}s ({total['checked'] / max(elapsed, 1e-9):,.0f} rows/s): "
+                f"ok={total['ok']}, missing={total['missing']}, mismatched={total['mismatched']}, errors={total['errors']}")
+    for name, n in sorted(total['fields'].items(), key=lambda kv: -kv[1]):
+        logger.info(f"  {name}: {n} mismatches")
+    for row_id, reason in total['samples'][:opts.max_samples]:
+        logger.info(f"  id {row_id}: {reason}")
+    return total
+
+
+def main():
+    opts = parse_args()
+    hosts = [h.strip() for h in opts.hosts.split(',') if h.strip()]
+    total = verify_parallel(opts, hosts)
+    unchecked = opts.row_count - total['checked']
+    if unchecked:
+        logger.error(f"{unchecked} ids were not checked")
+    sys.exit(0 if total['ok'] == opts.row_count else 1)
+
+
+if __name__ == "__main__":
+    main()